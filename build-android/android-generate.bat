@@ -25,9 +25,7 @@ python ../vk_helper.py --gen_enum_string_helper ../include/vulkan/vulkan.h --abs
 python ../vk_helper.py --gen_struct_wrappers ../include/vulkan/vulkan.h --abs_out_dir generated/include
 
 cd generated/include
-python ../../../lvl_genvk.py -registry ../../../vk.xml thread_check.h
-python ../../../lvl_genvk.py -registry ../../../vk.xml parameter_validation.h
-python ../../../lvl_genvk.py -registry ../../../vk.xml unique_objects_wrappers.h
+python ../../../lvl_genvk.py -registry ../../../vk.xml thread_check.h parameter_validation.h unique_objects_wrappers.h
 cd ../..
 
 copy /Y ..\layers\vk_layer_config.cpp   generated\common\
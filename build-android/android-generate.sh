@@ -26,9 +26,7 @@ python ../vk-generate.py Android dispatch-table-ops layer > generated/include/vk
 python ../vk_helper.py --gen_enum_string_helper ../include/vulkan/vulkan.h --abs_out_dir generated/include
 python ../vk_helper.py --gen_struct_wrappers ../include/vulkan/vulkan.h --abs_out_dir generated/include
 
-( cd generated/include; python ../../../lvl_genvk.py -registry ../../../vk.xml thread_check.h )
-( cd generated/include; python ../../../lvl_genvk.py -registry ../../../vk.xml parameter_validation.h )
-( cd generated/include; python ../../../lvl_genvk.py -registry ../../../vk.xml unique_objects_wrappers.h )
+( cd generated/include; python ../../../lvl_genvk.py -registry ../../../vk.xml thread_check.h parameter_validation.h unique_objects_wrappers.h )
 
 cp -f ../layers/vk_layer_config.cpp   generated/common/
 cp -f ../layers/vk_layer_extension_utils.cpp  generated/common/
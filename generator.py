@@ -14,13 +14,36 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import os,re,sys
+import io,os,re,string,sys,time
 
 def write( *args, **kwargs ):
     file = kwargs.pop('file',sys.stdout)
     end = kwargs.pop( 'end','\n')
-    file.write( ' '.join([str(arg) for arg in args]) )
-    file.write( end )
+    file.write( ' '.join([str(arg) for arg in args]) + end )
+
+# writeIfChanged - replace a file with new contents, unless it already has
+#   exactly those contents, and return whether it was written. The file is
+#   written under a temporary name and renamed into place, so readers never
+#   see a partially written file. The temporary file is removed if writing
+#   it fails.
+#   filename - file to write
+#   contents - string to write
+def writeIfChanged(filename, contents):
+    if (os.path.exists(filename)):
+        with open(filename, 'r') as f:
+            if (f.read() == contents):
+                return False
+    tmpname = filename + '.' + str(os.getpid()) + '.tmp'
+    replaced = False
+    try:
+        with open(tmpname, 'w') as f:
+            f.write(contents)
+        os.replace(tmpname, filename)
+        replaced = True
+    finally:
+        if (not replaced and os.path.exists(tmpname)):
+            os.remove(tmpname)
+    return True
 
 # noneStr - returns string argument, or "" if argument is None.
 # Used in converting etree Elements into text.
@@ -111,6 +134,13 @@ def regSortFeatures(featureList):
 #     them in place to a preferred order in the generated output.
 #     Default is core API versions, ARB/KHR/OES extensions, all
 #     other extensions, alphabetically within each group.
+#   writeIfChanged - if True, generate into memory and only replace
+#     filename (atomically) when the contents have changed, so an
+#     unchanged file keeps its modification time. Defaults to False.
+#   streamOutput - if True, write output directly to filename as it is
+#     generated, instead of assembling it in memory and writing it once
+#     at the end. Useful for very large outputs; writeIfChanged is
+#     ignored in this mode. Defaults to False.
 # The regex patterns can be None or empty, in which case they match
 #   nothing.
 class GeneratorOptions:
@@ -125,7 +155,9 @@ class GeneratorOptions:
                  defaultExtensions = None,
                  addExtensions = None,
                  removeExtensions = None,
-                 sortProcedure = regSortFeatures):
+                 sortProcedure = regSortFeatures,
+                 writeIfChanged = False,
+                 streamOutput = False):
         self.filename          = filename
         self.directory         = directory
         self.apiname           = apiname
@@ -136,6 +168,8 @@ class GeneratorOptions:
         self.addExtensions     = self.emptyRegex(addExtensions)
         self.removeExtensions  = self.emptyRegex(removeExtensions)
         self.sortProcedure     = sortProcedure
+        self.writeIfChanged    = writeIfChanged
+        self.streamOutput      = streamOutput
     #
     # Substitute a regular expression which matches no version
     # or extension names for None or the empty string.
@@ -145,6 +179,319 @@ class GeneratorOptions:
         else:
             return pat
 
+# GeneratorTimer - records the wall clock and CPU time spent in phases of
+# API generation, and how often each phase ran, for performance reports.
+#   phases - dictionary of { 'count', 'wall', 'cpu' } dictionaries, keyed
+#     by phase name. Times are in seconds.
+#   features - dictionary, keyed by feature (version / extension) name, of
+#     dictionaries counting the generator hooks called for that feature
+#   hookNames - OutputGenerator methods timed by instrument()
+# ---- methods ----
+# start() - return the starting point of a phase, to pass to stop()
+# stop(name, start) - add the time since start to the named phase
+# instrument(gen) - time each of gen's hooks as a phase, and count hook
+#   calls per feature, until uninstrument(gen) is called. Hook times are
+#   inclusive; e.g. genType includes any genStruct calls it makes.
+# uninstrument(gen) - stop timing gen's hooks
+# report() - return the recorded phases and feature counts, as a
+#   dictionary which can be written with json.dump()
+class GeneratorTimer:
+    """Record time spent in phases of API generation"""
+    hookNames = [ 'beginFile', 'endFile', 'beginFeature', 'endFeature',
+                  'genType', 'genStruct', 'genGroup', 'genEnum', 'genCmd' ]
+    def __init__(self):
+        self.phases = {}
+        self.features = {}
+        self.featureName = None
+    def start(self):
+        return (time.perf_counter(), time.process_time())
+    def stop(self, name, start):
+        wall = time.perf_counter() - start[0]
+        cpu = time.process_time() - start[1]
+        if (name not in self.phases):
+            self.phases[name] = { 'count' : 0, 'wall' : 0.0, 'cpu' : 0.0 }
+        phase = self.phases[name]
+        phase['count'] += 1
+        phase['wall'] += wall
+        phase['cpu'] += cpu
+    def instrument(self, gen):
+        for name in self.hookNames:
+            setattr(gen, name, self.makeTimedHook(name, getattr(gen, name)))
+    def uninstrument(self, gen):
+        for name in self.hookNames:
+            if (name in gen.__dict__):
+                delattr(gen, name)
+    #
+    # makeTimedHook - return a wrapper for a bound generator method which
+    # times it as the phase 'name'
+    def makeTimedHook(self, name, hook):
+        def timedHook(*args):
+            if (name == 'beginFeature'):
+                self.featureName = args[0].get('name')
+            if (self.featureName != None):
+                counts = self.features.setdefault(self.featureName, {})
+                counts[name] = counts.get(name, 0) + 1
+            start = self.start()
+            try:
+                return hook(*args)
+            finally:
+                self.stop(name, start)
+                if (name == 'endFeature'):
+                    self.featureName = None
+        return timedHook
+    def report(self):
+        return { 'phases' : self.phases, 'features' : self.features }
+
+# CodeTemplate - a fragment of generated code containing named fields,
+# which can be bound and rendered repeatedly without parsing the code
+# again. Templates are built with format() from constant format strings,
+# each parsed only once, so literal braces in generated code are escaped
+# as in str.format, and never need escaping in field values.
+#   parts - list alternating literal text and field names, always
+#     starting and ending with literal text
+# ---- methods ----
+# CodeTemplate.field(name) - return a template consisting of one field
+# CodeTemplate.format(fmt, *args, **kwargs) - like fmt.format(*args,
+#   **kwargs), for arguments which may be CodeTemplates. The fields of a
+#   CodeTemplate argument become fields of the result. Returns a string
+#   if the result has no fields, and a CodeTemplate otherwise. Format
+#   specs and conversions ({:d}, {!r}) are not supported, and raise a
+#   UserWarning.
+# bind(values) - return a new template with fields substituted
+#   values - dictionary, keyed by field name, of strings or CodeTemplates.
+#     Strings are inserted as literal text; the fields of a CodeTemplate
+#     value remain fields of the result. Fields without a value are kept.
+# isLiteral() - return True if no fields remain
+# text() - return the template as a string, with any remaining fields
+#   written back as {name} placeholders
+# template + str, str + template - return a template with literal text
+#   appended or prepended
+class CodeTemplate:
+    """Fragment of generated code with named fields"""
+    formats = {}
+    def __init__(self, parts):
+        self.parts = parts
+    @classmethod
+    def field(cls, name):
+        return cls(['', name, ''])
+    @classmethod
+    def format(cls, fmt, *args, **kwargs):
+        template = cls.formats.get(fmt)
+        if (template == None):
+            # Positional fields are named by their argument index
+            parts = ['']
+            index = 0
+            for (literal, name, spec, conversion) in string.Formatter().parse(fmt):
+                parts[-1] += literal
+                if (name != None):
+                    if (spec or conversion):
+                        raise UserWarning('CodeTemplate.format: unsupported format spec or conversion in ' + repr(fmt))
+                    if (name == ''):
+                        name = str(index)
+                        index += 1
+                    parts.append(name)
+                    parts.append('')
+            template = cls(parts)
+            cls.formats[fmt] = template
+        values = {}
+        for (index, value) in enumerate(args):
+            values[str(index)] = value
+        values.update(kwargs)
+        for name, value in values.items():
+            if (not isinstance(value, CodeTemplate)):
+                values[name] = str(value)
+        result = template.bind(values)
+        if (result.isLiteral()):
+            return result.parts[0]
+        return result
+    def bind(self, values):
+        parts = self.parts
+        result = []
+        literal = [parts[0]]
+        for i in range(1, len(parts), 2):
+            name = parts[i]
+            value = values.get(name)
+            if (value == None):
+                result.append(''.join(literal))
+                result.append(name)
+                literal = []
+            elif (isinstance(value, CodeTemplate)):
+                literal.append(value.parts[0])
+                for j in range(1, len(value.parts), 2):
+                    result.append(''.join(literal))
+                    result.append(value.parts[j])
+                    literal = [value.parts[j + 1]]
+            else:
+                literal.append(value)
+            literal.append(parts[i + 1])
+        result.append(''.join(literal))
+        return CodeTemplate(result)
+    def isLiteral(self):
+        return len(self.parts) == 1
+    def text(self):
+        parts = list(self.parts)
+        for i in range(1, len(parts), 2):
+            parts[i] = '{' + parts[i] + '}'
+        return ''.join(parts)
+    def __add__(self, text):
+        return CodeTemplate(self.parts[:-1] + [self.parts[-1] + text])
+    def __radd__(self, text):
+        return CodeTemplate([text + self.parts[0]] + self.parts[1:])
+
+# CodeBlock - builds a block of generated code from indented lines,
+# assembling the result with a single join instead of repeated string
+# concatenation.
+#   indent - current indentation, prepended to each appended line
+#   indentSpaces - number of spaces added by each incIndent()
+# ---- methods ----
+# append(*lines) - add lines, each ending with its own newline, at the
+#   current indentation. A list of lines may be given in place of a line.
+# blank() - add an empty, unindented line
+# incIndent(), decIndent() - increase or decrease the indentation
+# text() - return the block as a string
+class CodeBlock:
+    """Indentation-aware builder for generated code"""
+    def __init__(self, indent = '', indentSpaces = 4):
+        self.parts = []
+        self.indent = indent
+        self.indentSpaces = indentSpaces
+    def append(self, *lines):
+        for line in lines:
+            if (type(line) is list):
+                for sub in line:
+                    self.parts.append(self.indent + sub)
+            else:
+                self.parts.append(self.indent + line)
+    def blank(self):
+        self.parts.append('\n')
+    def incIndent(self):
+        self.indent += ' ' * self.indentSpaces
+    def decIndent(self):
+        self.indent = self.indent[:-self.indentSpaces]
+    def text(self):
+        return ''.join(self.parts)
+
+# nameHash - return the 32-bit FNV-1a hash of a string, starting from
+# seed in place of the FNV offset basis. Generated lookup code computes
+# the same hash in C.
+FNV_OFFSET_BASIS = 2166136261
+FNV_PRIME = 16777619
+def nameHash(name, seed = FNV_OFFSET_BASIS):
+    hash = seed
+    for byte in name.encode():
+        hash = ((hash ^ byte) * FNV_PRIME) & 0xffffffff
+    return hash
+
+# findPerfectHash - find a minimal perfect hash of a list of distinct
+# names, for generated lookup tables. Each name is put in one of
+# len(names) / 2 buckets by nameHash(name) % len(seeds), and each bucket
+# in turn, largest first, is given the smallest seed placing all of its
+# names in distinct free slots nameHash(name, seed) % len(names).
+# Returns (seeds, slots), with slots the list of names in slot order, or
+# None if some bucket has no such seed below maxSeed.
+def findPerfectHash(names, maxSeed = 1 << 16):
+    buckets = [[] for i in range(max(1, (len(names) + 1) // 2))]
+    for name in names:
+        buckets[nameHash(name) % len(buckets)].append(name)
+    seeds = [0] * len(buckets)
+    slots = [None] * len(names)
+    for index in sorted(range(len(buckets)), key = lambda index: -len(buckets[index])):
+        bucket = buckets[index]
+        if (not bucket):
+            break
+        for seed in range(1, maxSeed):
+            bucketSlots = set([nameHash(name, seed) % len(slots) for name in bucket])
+            if (len(bucketSlots) == len(bucket) and
+                not [slot for slot in bucketSlots if slots[slot] != None]):
+                break
+        else:
+            return None
+        for name in bucket:
+            slots[nameHash(name, seed) % len(slots)] = name
+        seeds[index] = seed
+    return seeds, slots
+
+# makeProcmap - return the source of procmap[], the table of functions
+# a layer intercepts, for its GetProcAddr functions to look names up in
+#   intercepts - list of (name, function, protect) tuples: the Vulkan
+#     command name, the layer function intercepting it, and the #ifdef
+#     symbol the command depends on, or None
+#   hashed - False for a table in the order of intercepts, which the
+#     layer searches linearly. True to also define PROCMAP_LOOKUP and
+#     procmap_lookup(name), finding names with a perfect hash of them,
+#     or if findPerfectHash() fails, a binary search of a sorted table.
+def makeProcmap(intercepts, hashed = False):
+    def entryLines(name, function, protect):
+        lines = ['    {"%s", reinterpret_cast<PFN_vkVoidFunction>(%s)},' % (name, function)]
+        if (protect != None):
+            lines = ['#ifdef %s' % protect] + lines + ['#endif']
+        return lines
+    lines = []
+    if (not hashed):
+        lines.append('// intercepts')
+        lines.append('struct { const char* name; PFN_vkVoidFunction pFunc;} procmap[] = {')
+        for intercept in intercepts:
+            lines += entryLines(*intercept)
+        lines.append('};')
+        return '\n'.join(lines) + '\n'
+    entries = dict([(intercept[0], intercept) for intercept in reversed(intercepts)])
+    perfectHash = findPerfectHash(sorted(entries.keys()))
+    lines.append('#define PROCMAP_LOOKUP 1')
+    lines.append('')
+    if (perfectHash != None):
+        seeds, slots = perfectHash
+        lines.append('static inline uint32_t procmap_hash(const char *name, uint32_t seed) {')
+        lines.append('    for (; *name; name++) {')
+        lines.append('        seed = (seed ^ (uint8_t)*name) * %du;' % FNV_PRIME)
+        lines.append('    }')
+        lines.append('    return seed;')
+        lines.append('}')
+        lines.append('')
+        lines.append('// intercepts, in the slots of a perfect hash of their names')
+        lines.append('struct { const char* name; PFN_vkVoidFunction pFunc;} procmap[] = {')
+        for name in slots:
+            entry = entryLines(*entries[name])
+            if (len(entry) > 1):
+                entry.insert(2, '#else')
+                entry.insert(3, '    {nullptr, nullptr},')
+            lines += entry
+        lines.append('};')
+        lines.append('static const uint16_t procmap_seeds[] = {')
+        for index in range(0, len(seeds), 16):
+            lines.append('    ' + ' '.join(['%d,' % seed for seed in seeds[index:index+16]]))
+        lines.append('};')
+        lines.append('')
+        lines.append('static inline PFN_vkVoidFunction procmap_lookup(const char *name) {')
+        lines.append('    uint16_t seed = procmap_seeds[procmap_hash(name, %du) %% %d];' % (FNV_OFFSET_BASIS, len(seeds)))
+        lines.append('    uint32_t slot = procmap_hash(name, seed) %% %d;' % len(slots))
+        lines.append('    if (procmap[slot].name && !strcmp(name, procmap[slot].name))')
+        lines.append('        return procmap[slot].pFunc;')
+        lines.append('    return nullptr;')
+        lines.append('}')
+    else:
+        lines.append('// intercepts, sorted by name')
+        lines.append('struct { const char* name; PFN_vkVoidFunction pFunc;} procmap[] = {')
+        for name in sorted(entries.keys()):
+            lines += entryLines(*entries[name])
+        lines.append('};')
+        lines.append('')
+        lines.append('static inline PFN_vkVoidFunction procmap_lookup(const char *name) {')
+        lines.append('    size_t first = 0;')
+        lines.append('    size_t last = sizeof(procmap) / sizeof(procmap[0]);')
+        lines.append('    while (first < last) {')
+        lines.append('        size_t middle = (first + last) / 2;')
+        lines.append('        int order = strcmp(name, procmap[middle].name);')
+        lines.append('        if (order == 0)')
+        lines.append('            return procmap[middle].pFunc;')
+        lines.append('        if (order < 0)')
+        lines.append('            last = middle;')
+        lines.append('        else')
+        lines.append('            first = middle + 1;')
+        lines.append('    }')
+        lines.append('    return nullptr;')
+        lines.append('}')
+    return '\n'.join(lines) + '\n'
+
 # OutputGenerator - base class for generating API interfaces.
 # Manages basic logic, logging, and output file control
 # Derived classes actually generate formatted output.
@@ -153,10 +500,14 @@ class GeneratorOptions:
 # OutputGenerator(errFile, warnFile, diagFile)
 #   errFile, warnFile, diagFile - file handles to write errors,
 #     warnings, diagnostics to. May be None to not write.
+#   Also creates logCounts, a dictionary of the number of messages
+#   written so far, keyed by level.
 # logMsg(level, *args) - log messages of different categories
 #   level - 'error', 'warn', or 'diag'. 'error' will also
 #     raise a UserWarning exception
-#   *args - print()-style arguments
+#   *args - print()-style arguments, or a single callable returning
+#     the message, called only if it will be written
+# logEnabled(level) - return True if messages of a category are written
 # setExtMap(map) - specify a dictionary map from extension names to
 #   numbers, used in creating values for extension enumerants.
 # makeDir(directory) - create a directory, if not already done.
@@ -164,6 +515,8 @@ class GeneratorOptions:
 # beginFile(genOpts) - start a new interface file
 #   genOpts - GeneratorOptions controlling what's generated and how
 # endFile() - finish an interface file, closing it when done
+# writeFileIfChanged(filename, contents) - atomically replace filename
+#   with contents, unless it already has those contents
 # beginFeature(interface, emit) - write interface for a feature
 # and tag generated features as having been done.
 #   interface - element for the <version> / <extension> to generate
@@ -185,6 +538,8 @@ class GeneratorOptions:
 # makeCDecls(cmd) - return C prototype and function pointer typedef for a
 #     <command> Element, as a list of two strings
 #   cmd - Element for the <command>
+# makeCParamDecls(cmd) - return the indented and single-line parameter
+#     lists of a <command> Element, cached in the Registry
 # newline() - print a newline to the output file (utility function)
 #
 class OutputGenerator:
@@ -206,9 +561,11 @@ class OutputGenerator:
                  warnFile = sys.stderr,
                  diagFile = sys.stdout):
         self.outFile = None
+        self.outFilename = None
         self.errFile = errFile
         self.warnFile = warnFile
         self.diagFile = diagFile
+        self.logCounts = { 'error' : 0, 'warn' : 0, 'diag' : 0 }
         # Internal state
         self.featureName = None
         self.genOpts = None
@@ -218,15 +575,39 @@ class OutputGenerator:
         self.extBlockSize = 1000
         self.madeDirs = {}
     #
+    # logEnabled - return True if messages at the given level are written
+    #   somewhere. Hot paths can test this before building the arguments
+    #   of a 'diag' message.
+    # level - 'error', 'warn' or 'diag'
+    def logEnabled(self, level):
+        if (level == 'error'):
+            return True
+        elif (level == 'warn'):
+            return self.warnFile != None
+        elif (level == 'diag'):
+            return self.diagFile != None
+        else:
+            return False
+    #
     # logMsg - write a message of different categories to different
-    #   destinations.
+    #   destinations. Messages are counted per level in logCounts
+    #   when they are written, so levels with no destination count 0.
     # level -
     #   'diag' (diagnostic, voluminous)
     #   'warn' (warning)
     #   'error' (fatal error - raises exception after logging)
-    # *args - print()-style arguments to direct to corresponding log
+    # *args - print()-style arguments to direct to corresponding log.
+    #   A single callable argument is only called, to produce the
+    #   message, if the message is written:
+    #     logMsg('diag', lambda: '...'.format(...))
     def logMsg(self, level, *args):
         """Log a message at the given level. Can be ignored or log to a file"""
+        if (level in self.logCounts):
+            if (not self.logEnabled(level)):
+                return
+            self.logCounts[level] += 1
+        if (len(args) == 1 and callable(args[0])):
+            args = (args[0](),)
         if (level == 'error'):
             strfile = io.StringIO()
             write('ERROR:', *args, file=strfile)
@@ -272,14 +653,16 @@ class OutputGenerator:
             # t = enuminfo.elem.get('type')
             # if (t != None and t != '' and t != 'i' and t != 's'):
             #     value += enuminfo.type
-            self.logMsg('diag', 'Enum', name, '-> value [', numVal, ',', value, ']')
+            if (self.logEnabled('diag')):
+                self.logMsg('diag', 'Enum', name, '-> value [', numVal, ',', value, ']')
             return [numVal, value]
         if ('bitpos' in elem.keys()):
             value = elem.get('bitpos')
             numVal = int(value, 0)
             numVal = 1 << numVal
             value = '0x%08x' % numVal
-            self.logMsg('diag', 'Enum', name, '-> bitpos [', numVal, ',', value, ']')
+            if (self.logEnabled('diag')):
+                self.logMsg('diag', 'Enum', name, '-> bitpos [', numVal, ',', value, ']')
             return [numVal, value]
         if ('offset' in elem.keys()):
             # Obtain values in the mapping from the attributes
@@ -289,9 +672,10 @@ class OutputGenerator:
             extends = elem.get('extends')
             if ('dir' in elem.keys()):
                 enumNegative = True
-            self.logMsg('diag', 'Enum', name, 'offset =', offset,
-                'extnumber =', extnumber, 'extends =', extends,
-                'enumNegative =', enumNegative)
+            if (self.logEnabled('diag')):
+                self.logMsg('diag', 'Enum', name, 'offset =', offset,
+                    'extnumber =', extnumber, 'extends =', extends,
+                    'enumNegative =', enumNegative)
             # Now determine the actual enumerant value, as defined
             # in the "Layers and Extensions" appendix of the spec.
             numVal = self.extBase + (extnumber - 1) * self.extBlockSize + offset
@@ -299,7 +683,8 @@ class OutputGenerator:
                 numVal = -numVal
             value = '%d' % numVal
             # More logic needed!
-            self.logMsg('diag', 'Enum', name, '-> offset [', numVal, ',', value, ']')
+            if (self.logEnabled('diag')):
+                self.logMsg('diag', 'Enum', name, '-> offset [', numVal, ',', value, ']')
             return [numVal, value]
         return [None, None]
     #
@@ -312,13 +697,28 @@ class OutputGenerator:
                 os.makedirs(path)
             self.madeDirs[path] = None
     #
+    # writeFileIfChanged - replace a file with new contents, unless it
+    #   already has exactly those contents. See writeIfChanged.
+    # filename - file to write
+    # contents - string to write
+    def writeFileIfChanged(self, filename, contents):
+        if (writeIfChanged(filename, contents)):
+            return True
+        self.logMsg('diag', 'OutputGenerator::writeFileIfChanged(' + filename + '): unchanged')
+        return False
+    #
     def beginFile(self, genOpts):
         self.genOpts = genOpts
         #
         # Open specified output file. Not done in constructor since a
-        # Generator can be used without writing to a file.
+        # Generator can be used without writing to a file. Unless
+        # streaming, output is assembled in memory and written by endFile.
         if (self.genOpts.filename != None):
-            self.outFile = open(self.genOpts.directory + '/' + self.genOpts.filename, 'w')
+            self.outFilename = self.genOpts.directory + '/' + self.genOpts.filename
+            if (self.genOpts.streamOutput):
+                self.outFile = open(self.outFilename, 'w')
+            else:
+                self.outFile = io.StringIO()
         else:
             self.outFile = sys.stdout
     def endFile(self):
@@ -327,6 +727,12 @@ class OutputGenerator:
         self.diagFile and self.diagFile.flush()
         self.outFile.flush()
         if (self.outFile != sys.stdout and self.outFile != sys.stderr):
+            if (not self.genOpts.streamOutput):
+                if (self.genOpts.writeIfChanged):
+                    self.writeFileIfChanged(self.outFilename, self.outFile.getvalue())
+                else:
+                    with open(self.outFilename, 'w') as f:
+                        f.write(self.outFile.getvalue())
             self.outFile.close()
         self.genOpts = None
     #
@@ -430,7 +836,6 @@ class OutputGenerator:
     def makeCDecls(self, cmd):
         """Generate C function pointer typedef for <command> Element"""
         proto = cmd.find('proto')
-        params = cmd.findall('param')
         # Begin accumulating prototype and typedef strings
         pdecl = self.genOpts.apicall
         tdecl = 'typedef '
@@ -457,9 +862,25 @@ class OutputGenerator:
                 pdecl += text + tail
                 tdecl += text + tail
         # Now add the parameter declaration list, which is identical
-        # for prototypes and typedefs. Concatenate all the text from
-        # a <param> node without the tags. No tree walking required
-        # since all tags are ignored.
+        # for prototypes and typedefs.
+        (indentdecl, paramdecl) = self.makeCParamDecls(cmd)
+        return [ pdecl + indentdecl, tdecl + paramdecl ]
+    #
+    # makeCParamDecls - return the parameter lists of a command for
+    #   makeCDecls(), as a two-element tuple of strings: indented and
+    #   aligned for prototypes, and on a single line for typedefs.
+    #   The lists depend only on the command and the alignment, so they
+    #   are built once per registry load and kept in its declCache.
+    #   When diagnostics are written the lists are always rebuilt, so
+    #   every target logs its makeCParamDecl alignment messages.
+    # cmd - Element containing a <command> tag
+    def makeCParamDecls(self, cmd):
+        key = (cmd, self.genOpts.alignFuncParam)
+        if (self.registry != None and not self.logEnabled('diag') and key in self.registry.declCache):
+            return self.registry.declCache[key]
+        params = cmd.findall('param')
+        # Concatenate all the text from a <param> node without the tags.
+        # No tree walking required since all tags are ignored.
         # Uses: self.indentFuncProto
         # self.indentFuncPointer
         # self.alignFuncParam
@@ -488,7 +909,10 @@ class OutputGenerator:
         else:
             paramdecl += 'void'
         paramdecl += ");";
-        return [ pdecl + indentdecl, tdecl + paramdecl ]
+        decls = (indentdecl, paramdecl)
+        if (self.registry != None):
+            self.registry.declCache[key] = decls
+        return decls
     #
     def newline(self):
         write('', file=self.outFile)
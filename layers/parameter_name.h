@@ -19,6 +19,7 @@
 #define PARAMETER_NAME_H
 
 #include <cassert>
+#include <cstring>
 #include <sstream>
 #include <string>
 #include <vector>
@@ -102,8 +103,43 @@ class ParameterName {
         assert(IsValid());
     }
 
+    /**
+    * Construct a ParameterName object for a member of a struct, from the name of the struct, without formatting.  The names
+    * are not copied or concatenated until the name is retrieved, so the struct name and member name string must outlive
+    * the ParameterName object.
+    *
+    * @param parent Name of the struct, including the trailing '.' or '->'.
+    * @param member Member name string without format specifiers.
+    *
+    * @pre The member name string must not contain the %i format specifier.
+    */
+    ParameterName(const ParameterName &parent, const char *member) : parent_(&parent), member_(member) {
+        assert(CountMemberFormatSpecifiers() == 0);
+    }
+
+    /**
+    * Construct a ParameterName object for an element of an array member of a struct, from the name of the struct, with
+    * formatting.  The names are not copied or concatenated until the name is retrieved, so the struct name and member name
+    * string must outlive the ParameterName object.
+    *
+    * @param parent Name of the struct, including the trailing '.' or '->'.
+    * @param member Member name string with one format specifier.
+    * @param index Array index value to be used for formatting.
+    *
+    * @pre The member name string must contain one %i format specifier.
+    */
+    ParameterName(const ParameterName &parent, const char *member, size_t index)
+        : parent_(&parent), member_(member), member_index_(index) {
+        assert(CountMemberFormatSpecifiers() == 1);
+    }
+
     /// Retrive the formatted name string.
-    std::string get_name() const { return (args_.empty()) ? source_ : Format(); }
+    std::string get_name() const {
+        if (parent_ != nullptr) {
+            return parent_->get_name() + FormatMember();
+        }
+        return (args_.empty()) ? source_ : Format();
+    }
 
   private:
     /// Replace the %i format specifiers in the source string with the values from the index vector.
@@ -126,7 +162,19 @@ class ParameterName {
         return format.str();
     }
 
-    /// Check that the number of %i format specifiers in the source string matches the number of elements in the index vector.
+    /// Replace the %i format specifier in the member name string, if any, with the member index value.
+    std::string FormatMember() const {
+        std::string member(member_);
+        std::string::size_type current = member.find(IndexFormatSpecifier);
+
+        if (current != std::string::npos) {
+            member.replace(current, IndexFormatSpecifier.length(), std::to_string(member_index_));
+        }
+
+        return member;
+    }
+
+    /// Check that the number of %i format specifiers in the source or member name string matches the number of index values.
     bool IsValid() {
         // Count the number of occurances of the format specifier
         uint32_t count = 0;
@@ -140,9 +188,25 @@ class ParameterName {
         return (count == args_.size());
     }
 
+    /// Count the number of %i format specifiers in the member name string.
+    uint32_t CountMemberFormatSpecifiers() const {
+        uint32_t count = 0;
+        const char *pos = strstr(member_, IndexFormatSpecifier.c_str());
+
+        while (pos != nullptr) {
+            ++count;
+            pos = strstr(pos + 1, IndexFormatSpecifier.c_str());
+        }
+
+        return count;
+    }
+
   private:
-    std::string source_; ///< Format string.
-    IndexVector args_;   ///< Array index values for formatting.
+    std::string source_;                    ///< Format string.
+    IndexVector args_;                      ///< Array index values for formatting.
+    const ParameterName *parent_ = nullptr; ///< Name of the struct containing a member, prefixed to the member name.
+    const char *member_ = nullptr;          ///< Member name format string, when parent_ is set.
+    size_t member_index_ = 0;               ///< Array index value for formatting the member name, if it has a format specifier.
 };
 
 #endif // PARAMETER_NAME_H
@@ -183,11 +183,16 @@ static const VkLayerProperties layerProps = {
 };
 
 static inline PFN_vkVoidFunction layer_intercept_proc(const char *name) {
+#ifdef PROCMAP_LOOKUP
+    // Generated with lvl_genvk.py -hashprocmap
+    return procmap_lookup(name);
+#else
     for (int i = 0; i < sizeof(procmap) / sizeof(procmap[0]); i++) {
         if (!strcmp(name, procmap[i].name))
             return procmap[i].pFunc;
     }
     return NULL;
+#endif
 }
 
 VKAPI_ATTR VkResult VKAPI_CALL
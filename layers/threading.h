@@ -75,10 +75,10 @@ template <typename T> class counter {
     std::unordered_map<T, object_use_data> uses;
     std::mutex counter_lock;
     std::condition_variable counter_condition;
-    void startWrite(debug_report_data *report_data, T object) {
+    // Record a write of object by thread tid, with lock holding counter_lock
+    void startWriteLocked(debug_report_data *report_data, T object, loader_platform_thread_id tid,
+                          std::unique_lock<std::mutex> &lock) {
         bool skipCall = false;
-        loader_platform_thread_id tid = loader_platform_get_thread_id();
-        std::unique_lock<std::mutex> lock(counter_lock);
         if (uses.find(object) == uses.end()) {
             // There is no current use of the object.  Record writer thread.
             struct object_use_data *use_data = &uses[object];
@@ -145,22 +145,69 @@ template <typename T> class counter {
         }
     }
 
-    void finishWrite(T object) {
-        // Object is no longer in use
+    void startWrite(debug_report_data *report_data, T object) {
+        loader_platform_thread_id tid = loader_platform_get_thread_id();
         std::unique_lock<std::mutex> lock(counter_lock);
+        startWriteLocked(report_data, object, tid, lock);
+    }
+
+    // Record writes of an array of objects, taking counter_lock once for the whole array
+    void startWrites(debug_report_data *report_data, const T *objects, uint32_t count) {
+        loader_platform_thread_id tid = loader_platform_get_thread_id();
+        std::unique_lock<std::mutex> lock(counter_lock);
+        for (uint32_t index = 0; index < count; index++) {
+            startWriteLocked(report_data, objects[index], tid, lock);
+        }
+    }
+
+    // Record writes of the member object of each of an array of structs, taking counter_lock once
+    template <typename S> void startWrites(debug_report_data *report_data, const S *structs, uint32_t count, T S::*member) {
+        loader_platform_thread_id tid = loader_platform_get_thread_id();
+        std::unique_lock<std::mutex> lock(counter_lock);
+        for (uint32_t index = 0; index < count; index++) {
+            startWriteLocked(report_data, structs[index].*member, tid, lock);
+        }
+    }
+
+    // Object is no longer in use by a writer, with counter_lock held
+    void finishWriteLocked(T object) {
         uses[object].writer_count -= 1;
         if ((uses[object].reader_count == 0) && (uses[object].writer_count == 0)) {
             uses.erase(object);
         }
+    }
+
+    void finishWrite(T object) {
+        // Object is no longer in use
+        std::unique_lock<std::mutex> lock(counter_lock);
+        finishWriteLocked(object);
         // Notify any waiting threads that this object may be safe to use
         lock.unlock();
         counter_condition.notify_all();
     }
 
-    void startRead(debug_report_data *report_data, T object) {
-        bool skipCall = false;
-        loader_platform_thread_id tid = loader_platform_get_thread_id();
+    void finishWrites(const T *objects, uint32_t count) {
+        std::unique_lock<std::mutex> lock(counter_lock);
+        for (uint32_t index = 0; index < count; index++) {
+            finishWriteLocked(objects[index]);
+        }
+        lock.unlock();
+        counter_condition.notify_all();
+    }
+
+    template <typename S> void finishWrites(const S *structs, uint32_t count, T S::*member) {
         std::unique_lock<std::mutex> lock(counter_lock);
+        for (uint32_t index = 0; index < count; index++) {
+            finishWriteLocked(structs[index].*member);
+        }
+        lock.unlock();
+        counter_condition.notify_all();
+    }
+
+    // Record a read of object by thread tid, with lock holding counter_lock
+    void startReadLocked(debug_report_data *report_data, T object, loader_platform_thread_id tid,
+                         std::unique_lock<std::mutex> &lock) {
+        bool skipCall = false;
         if (uses.find(object) == uses.end()) {
             // There is no current use of the object.  Record reader count
             struct object_use_data *use_data = &uses[object];
@@ -191,16 +238,45 @@ template <typename T> class counter {
             uses[object].reader_count += 1;
         }
     }
-    void finishRead(T object) {
+    void startRead(debug_report_data *report_data, T object) {
+        loader_platform_thread_id tid = loader_platform_get_thread_id();
+        std::unique_lock<std::mutex> lock(counter_lock);
+        startReadLocked(report_data, object, tid, lock);
+    }
+
+    // Record reads of an array of objects, taking counter_lock once for the whole array
+    void startReads(debug_report_data *report_data, const T *objects, uint32_t count) {
+        loader_platform_thread_id tid = loader_platform_get_thread_id();
         std::unique_lock<std::mutex> lock(counter_lock);
+        for (uint32_t index = 0; index < count; index++) {
+            startReadLocked(report_data, objects[index], tid, lock);
+        }
+    }
+
+    // Object is no longer in use by a reader, with counter_lock held
+    void finishReadLocked(T object) {
         uses[object].reader_count -= 1;
         if ((uses[object].reader_count == 0) && (uses[object].writer_count == 0)) {
             uses.erase(object);
         }
+    }
+
+    void finishRead(T object) {
+        std::unique_lock<std::mutex> lock(counter_lock);
+        finishReadLocked(object);
         // Notify any waiting threads that this object may be safe to use
         lock.unlock();
         counter_condition.notify_all();
     }
+
+    void finishReads(const T *objects, uint32_t count) {
+        std::unique_lock<std::mutex> lock(counter_lock);
+        for (uint32_t index = 0; index < count; index++) {
+            finishReadLocked(objects[index]);
+        }
+        lock.unlock();
+        counter_condition.notify_all();
+    }
     counter(const char *name = "", VkDebugReportObjectTypeEXT type = VK_DEBUG_REPORT_OBJECT_TYPE_UNKNOWN_EXT) {
         typeName = name;
         objectType = type;
@@ -289,7 +365,27 @@ struct layer_data {
     static void startReadObject(struct layer_data *my_data, type object) {                                                         \
         my_data->c_##type.startRead(my_data->report_data, object);                                                                 \
     }                                                                                                                              \
-    static void finishReadObject(struct layer_data *my_data, type object) { my_data->c_##type.finishRead(object); }
+    static void finishReadObject(struct layer_data *my_data, type object) { my_data->c_##type.finishRead(object); }              \
+    static void startWriteObjects(struct layer_data *my_data, const type *objects, uint32_t count) {                              \
+        my_data->c_##type.startWrites(my_data->report_data, objects, count);                                                       \
+    }                                                                                                                              \
+    static void finishWriteObjects(struct layer_data *my_data, const type *objects, uint32_t count) {                             \
+        my_data->c_##type.finishWrites(objects, count);                                                                            \
+    }                                                                                                                              \
+    template <typename S>                                                                                                          \
+    static void startWriteObjects(struct layer_data *my_data, const S *structs, uint32_t count, type S::*member) {                \
+        my_data->c_##type.startWrites(my_data->report_data, structs, count, member);                                               \
+    }                                                                                                                              \
+    template <typename S>                                                                                                          \
+    static void finishWriteObjects(struct layer_data *my_data, const S *structs, uint32_t count, type S::*member) {               \
+        my_data->c_##type.finishWrites(structs, count, member);                                                                    \
+    }                                                                                                                              \
+    static void startReadObjects(struct layer_data *my_data, const type *objects, uint32_t count) {                               \
+        my_data->c_##type.startReads(my_data->report_data, objects, count);                                                        \
+    }                                                                                                                              \
+    static void finishReadObjects(struct layer_data *my_data, const type *objects, uint32_t count) {                              \
+        my_data->c_##type.finishReads(objects, count);                                                                             \
+    }
 
 WRAPPER(VkDevice)
 WRAPPER(VkInstance)
@@ -357,4 +453,25 @@ static void finishReadObject(struct layer_data *my_data, VkCommandBuffer object)
     lock.unlock();
     finishReadObject(my_data, pool);
 }
+// Command buffer arrays are checked one at a time, as each also uses its command pool
+static void startWriteObjects(struct layer_data *my_data, const VkCommandBuffer *objects, uint32_t count) {
+    for (uint32_t index = 0; index < count; index++) {
+        startWriteObject(my_data, objects[index]);
+    }
+}
+static void finishWriteObjects(struct layer_data *my_data, const VkCommandBuffer *objects, uint32_t count) {
+    for (uint32_t index = 0; index < count; index++) {
+        finishWriteObject(my_data, objects[index]);
+    }
+}
+static void startReadObjects(struct layer_data *my_data, const VkCommandBuffer *objects, uint32_t count) {
+    for (uint32_t index = 0; index < count; index++) {
+        startReadObject(my_data, objects[index]);
+    }
+}
+static void finishReadObjects(struct layer_data *my_data, const VkCommandBuffer *objects, uint32_t count) {
+    for (uint32_t index = 0; index < count; index++) {
+        finishReadObject(my_data, objects[index]);
+    }
+}
 #endif // THREADING_H
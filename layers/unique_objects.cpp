@@ -257,11 +257,16 @@ static const VkLayerProperties globalLayerProps = {"VK_LAYER_GOOGLE_unique_objec
                                                    "Google Validation Layer"};
 
 static inline PFN_vkVoidFunction layer_intercept_proc(const char *name) {
+#ifdef PROCMAP_LOOKUP
+    // Generated with lvl_genvk.py -hashprocmap
+    return procmap_lookup(name);
+#else
     for (int i = 0; i < sizeof(procmap) / sizeof(procmap[0]); i++) {
         if (!strcmp(name, procmap[i].name))
             return procmap[i].pFunc;
     }
     return NULL;
+#endif
 }
 
 VKAPI_ATTR VkResult VKAPI_CALL EnumerateInstanceLayerProperties(uint32_t *pCount, VkLayerProperties *pProperties) {
@@ -353,7 +358,7 @@ VKAPI_ATTR VkResult VKAPI_CALL AllocateMemory(VkDevice device, const VkMemoryAll
                 safe_dedicated_allocate_info->initialize(
                     reinterpret_cast<const VkDedicatedAllocationMemoryAllocateInfoNV *>(orig_pnext));
 
-                std::unique_lock<std::mutex> lock(global_lock);
+                std::unique_lock<global_mutex_t> lock(global_lock);
 
                 if (safe_dedicated_allocate_info->buffer != VK_NULL_HANDLE) {
                     uint64_t local_buffer = reinterpret_cast<uint64_t &>(safe_dedicated_allocate_info->buffer);
@@ -381,7 +386,7 @@ VKAPI_ATTR VkResult VKAPI_CALL AllocateMemory(VkDevice device, const VkMemoryAll
     VkResult result = device_data->device_dispatch_table->AllocateMemory(device, input_allocate_info, pAllocator, pMemory);
 
     if (VK_SUCCESS == result) {
-        std::lock_guard<std::mutex> lock(global_lock);
+        std::lock_guard<global_mutex_t> lock(global_lock);
         uint64_t unique_id = global_unique_id++;
         device_data->unique_id_mapping[unique_id] = reinterpret_cast<uint64_t &>(*pMemory);
         *pMemory = reinterpret_cast<VkDeviceMemory &>(unique_id);
@@ -396,7 +401,7 @@ VKAPI_ATTR VkResult VKAPI_CALL CreateComputePipelines(VkDevice device, VkPipelin
     layer_data *my_device_data = get_my_data_ptr(get_dispatch_key(device), layer_data_map);
     safe_VkComputePipelineCreateInfo *local_pCreateInfos = NULL;
     if (pCreateInfos) {
-        std::lock_guard<std::mutex> lock(global_lock);
+        std::lock_guard<global_mutex_t> lock(global_lock);
         local_pCreateInfos = new safe_VkComputePipelineCreateInfo[createInfoCount];
         for (uint32_t idx0 = 0; idx0 < createInfoCount; ++idx0) {
             local_pCreateInfos[idx0].initialize(&pCreateInfos[idx0]);
@@ -418,7 +423,7 @@ VKAPI_ATTR VkResult VKAPI_CALL CreateComputePipelines(VkDevice device, VkPipelin
         }
     }
     if (pipelineCache) {
-        std::lock_guard<std::mutex> lock(global_lock);
+        std::lock_guard<global_mutex_t> lock(global_lock);
         pipelineCache = (VkPipelineCache)my_device_data->unique_id_mapping[reinterpret_cast<uint64_t &>(pipelineCache)];
     }
 
@@ -427,7 +432,7 @@ VKAPI_ATTR VkResult VKAPI_CALL CreateComputePipelines(VkDevice device, VkPipelin
     delete[] local_pCreateInfos;
     if (VK_SUCCESS == result) {
         uint64_t unique_id = 0;
-        std::lock_guard<std::mutex> lock(global_lock);
+        std::lock_guard<global_mutex_t> lock(global_lock);
         for (uint32_t i = 0; i < createInfoCount; ++i) {
             unique_id = global_unique_id++;
             my_device_data->unique_id_mapping[unique_id] = reinterpret_cast<uint64_t &>(pPipelines[i]);
@@ -444,7 +449,7 @@ VKAPI_ATTR VkResult VKAPI_CALL CreateGraphicsPipelines(VkDevice device, VkPipeli
     safe_VkGraphicsPipelineCreateInfo *local_pCreateInfos = NULL;
     if (pCreateInfos) {
         local_pCreateInfos = new safe_VkGraphicsPipelineCreateInfo[createInfoCount];
-        std::lock_guard<std::mutex> lock(global_lock);
+        std::lock_guard<global_mutex_t> lock(global_lock);
         for (uint32_t idx0 = 0; idx0 < createInfoCount; ++idx0) {
             local_pCreateInfos[idx0].initialize(&pCreateInfos[idx0]);
             if (pCreateInfos[idx0].basePipelineHandle) {
@@ -474,7 +479,7 @@ VKAPI_ATTR VkResult VKAPI_CALL CreateGraphicsPipelines(VkDevice device, VkPipeli
         }
     }
     if (pipelineCache) {
-        std::lock_guard<std::mutex> lock(global_lock);
+        std::lock_guard<global_mutex_t> lock(global_lock);
         pipelineCache = (VkPipelineCache)my_device_data->unique_id_mapping[reinterpret_cast<uint64_t &>(pipelineCache)];
     }
 
@@ -483,7 +488,7 @@ VKAPI_ATTR VkResult VKAPI_CALL CreateGraphicsPipelines(VkDevice device, VkPipeli
     delete[] local_pCreateInfos;
     if (VK_SUCCESS == result) {
         uint64_t unique_id = 0;
-        std::lock_guard<std::mutex> lock(global_lock);
+        std::lock_guard<global_mutex_t> lock(global_lock);
         for (uint32_t i = 0; i < createInfoCount; ++i) {
             unique_id = global_unique_id++;
             my_device_data->unique_id_mapping[unique_id] = reinterpret_cast<uint64_t &>(pPipelines[i]);
@@ -527,7 +532,7 @@ VKAPI_ATTR VkResult VKAPI_CALL CreateSwapchainKHR(VkDevice device, const VkSwapc
     layer_data *my_map_data = get_my_data_ptr(get_dispatch_key(device), layer_data_map);
     safe_VkSwapchainCreateInfoKHR *local_pCreateInfo = NULL;
     if (pCreateInfo) {
-        std::lock_guard<std::mutex> lock(global_lock);
+        std::lock_guard<global_mutex_t> lock(global_lock);
         local_pCreateInfo = new safe_VkSwapchainCreateInfoKHR(pCreateInfo);
         local_pCreateInfo->oldSwapchain =
             (VkSwapchainKHR)my_map_data->unique_id_mapping[reinterpret_cast<const uint64_t &>(pCreateInfo->oldSwapchain)];
@@ -543,7 +548,7 @@ VKAPI_ATTR VkResult VKAPI_CALL CreateSwapchainKHR(VkDevice device, const VkSwapc
         delete local_pCreateInfo;
     }
     if (VK_SUCCESS == result) {
-        std::lock_guard<std::mutex> lock(global_lock);
+        std::lock_guard<global_mutex_t> lock(global_lock);
         uint64_t unique_id = global_unique_id++;
         my_map_data->unique_id_mapping[unique_id] = reinterpret_cast<uint64_t &>(*pSwapchain);
         *pSwapchain = reinterpret_cast<VkSwapchainKHR &>(unique_id);
@@ -555,7 +560,7 @@ VKAPI_ATTR VkResult VKAPI_CALL GetSwapchainImagesKHR(VkDevice device, VkSwapchai
                                                      VkImage *pSwapchainImages) {
     layer_data *my_device_data = get_my_data_ptr(get_dispatch_key(device), layer_data_map);
     if (VK_NULL_HANDLE != swapchain) {
-        std::lock_guard<std::mutex> lock(global_lock);
+        std::lock_guard<global_mutex_t> lock(global_lock);
         swapchain = (VkSwapchainKHR)my_device_data->unique_id_mapping[reinterpret_cast<uint64_t &>(swapchain)];
     }
     VkResult result =
@@ -564,7 +569,7 @@ VKAPI_ATTR VkResult VKAPI_CALL GetSwapchainImagesKHR(VkDevice device, VkSwapchai
     if (VK_SUCCESS == result) {
         if ((*pSwapchainImageCount > 0) && pSwapchainImages) {
             uint64_t unique_id = 0;
-            std::lock_guard<std::mutex> lock(global_lock);
+            std::lock_guard<global_mutex_t> lock(global_lock);
             for (uint32_t i = 0; i < *pSwapchainImageCount; ++i) {
                 unique_id = global_unique_id++;
                 my_device_data->unique_id_mapping[unique_id] = reinterpret_cast<uint64_t &>(pSwapchainImages[i]);
@@ -581,7 +586,7 @@ VKAPI_ATTR VkResult VKAPI_CALL GetPhysicalDeviceDisplayPropertiesKHR(VkPhysicalD
     layer_data *my_map_data = get_my_data_ptr(get_dispatch_key(physicalDevice), layer_data_map);
     safe_VkDisplayPropertiesKHR *local_pProperties = NULL;
     {
-        std::lock_guard<std::mutex> lock(global_lock);
+        std::lock_guard<global_mutex_t> lock(global_lock);
         if (pProperties) {
             local_pProperties = new safe_VkDisplayPropertiesKHR[*pPropertyCount];
             for (uint32_t idx0 = 0; idx0 < *pPropertyCount; ++idx0) {
@@ -598,7 +603,7 @@ VKAPI_ATTR VkResult VKAPI_CALL GetPhysicalDeviceDisplayPropertiesKHR(VkPhysicalD
         physicalDevice, pPropertyCount, (VkDisplayPropertiesKHR *)local_pProperties);
     if (result == VK_SUCCESS && pProperties) {
         for (uint32_t idx0 = 0; idx0 < *pPropertyCount; ++idx0) {
-            std::lock_guard<std::mutex> lock(global_lock);
+            std::lock_guard<global_mutex_t> lock(global_lock);
 
             uint64_t unique_id = global_unique_id++;
             my_map_data->unique_id_mapping[unique_id] = reinterpret_cast<uint64_t &>(local_pProperties[idx0].display);
@@ -624,7 +629,7 @@ VKAPI_ATTR VkResult VKAPI_CALL GetDisplayPlaneSupportedDisplaysKHR(VkPhysicalDev
                                                                                                 pDisplayCount, pDisplays);
     if (VK_SUCCESS == result) {
         if ((*pDisplayCount > 0) && pDisplays) {
-            std::lock_guard<std::mutex> lock(global_lock);
+            std::lock_guard<global_mutex_t> lock(global_lock);
             for (uint32_t i = 0; i < *pDisplayCount; i++) {
                 auto it = my_map_data->unique_id_mapping.find(reinterpret_cast<const uint64_t &>(pDisplays[i]));
                 assert(it != my_map_data->unique_id_mapping.end());
@@ -640,7 +645,7 @@ VKAPI_ATTR VkResult VKAPI_CALL GetDisplayModePropertiesKHR(VkPhysicalDevice phys
     layer_data *my_map_data = get_my_data_ptr(get_dispatch_key(physicalDevice), layer_data_map);
     safe_VkDisplayModePropertiesKHR *local_pProperties = NULL;
     {
-        std::lock_guard<std::mutex> lock(global_lock);
+        std::lock_guard<global_mutex_t> lock(global_lock);
         display = (VkDisplayKHR)my_map_data->unique_id_mapping[reinterpret_cast<uint64_t &>(display)];
         if (pProperties) {
             local_pProperties = new safe_VkDisplayModePropertiesKHR[*pPropertyCount];
@@ -654,7 +659,7 @@ VKAPI_ATTR VkResult VKAPI_CALL GetDisplayModePropertiesKHR(VkPhysicalDevice phys
         physicalDevice, display, pPropertyCount, (VkDisplayModePropertiesKHR *)local_pProperties);
     if (result == VK_SUCCESS && pProperties) {
         for (uint32_t idx0 = 0; idx0 < *pPropertyCount; ++idx0) {
-            std::lock_guard<std::mutex> lock(global_lock);
+            std::lock_guard<global_mutex_t> lock(global_lock);
 
             uint64_t unique_id = global_unique_id++;
             my_map_data->unique_id_mapping[unique_id] = reinterpret_cast<uint64_t &>(local_pProperties[idx0].displayMode);
@@ -25,6 +25,9 @@
 #include "vk_safe_struct.h"
 #include "vk_layer_utils.h"
 #include "mutex"
+#include "condition_variable"
+#include "new"
+#include "type_traits"
 
 #pragma once
 
@@ -118,7 +121,118 @@ struct instance_extension_enables {
 static std::unordered_map<void *, struct instance_extension_enables> instance_ext_map;
 static std::unordered_map<void *, layer_data *> layer_data_map;
 
-static std::mutex global_lock; // Protect map accesses and unique_id increments
+// Reader-writer lock for unique_id_mapping, used when the layer is built with UNIQUE_OBJECTS_SHARED_HANDLE_LOCK
+// (and unique_objects_wrappers.h is generated with lvl_genvk.py -sharedhandlelock). Looking up handles takes it
+// shared, so concurrent lookups don't serialize; creating and destroying handles takes it exclusively. C++11 has
+// no std::shared_mutex, so it is built from a mutex and condition variable. Waiting writers hold off new readers,
+// so a stream of lookups can't starve creates and destroys.
+class rw_mutex {
+  public:
+    rw_mutex() : readers_(0), writing_(false), waiting_writers_(0) {}
+    void lock() {
+        std::unique_lock<std::mutex> lock(mutex_);
+        waiting_writers_++;
+        cond_.wait(lock, [this] { return !writing_ && (readers_ == 0); });
+        waiting_writers_--;
+        writing_ = true;
+    }
+    void unlock() {
+        std::lock_guard<std::mutex> lock(mutex_);
+        writing_ = false;
+        cond_.notify_all();
+    }
+    void lock_shared() {
+        std::unique_lock<std::mutex> lock(mutex_);
+        cond_.wait(lock, [this] { return !writing_ && (waiting_writers_ == 0); });
+        readers_++;
+    }
+    void unlock_shared() {
+        std::lock_guard<std::mutex> lock(mutex_);
+        if (--readers_ == 0) {
+            cond_.notify_all();
+        }
+    }
+
+  private:
+    rw_mutex(const rw_mutex &) = delete;
+    rw_mutex &operator=(const rw_mutex &) = delete;
+
+    std::mutex mutex_;
+    std::condition_variable cond_;
+    uint32_t readers_;
+    bool writing_;
+    uint32_t waiting_writers_;
+};
+
+// Holds a mutex shared for its lifetime, the shared counterpart of std::lock_guard
+template <typename T> class shared_lock_guard {
+  public:
+    explicit shared_lock_guard(T &mutex) : mutex_(mutex) { mutex_.lock_shared(); }
+    ~shared_lock_guard() { mutex_.unlock_shared(); }
+
+  private:
+    shared_lock_guard(const shared_lock_guard &) = delete;
+    shared_lock_guard &operator=(const shared_lock_guard &) = delete;
+
+    T &mutex_;
+};
+
+#ifdef UNIQUE_OBJECTS_SHARED_HANDLE_LOCK
+typedef rw_mutex global_mutex_t;
+#else
+typedef std::mutex global_mutex_t;
+#endif
+
+static global_mutex_t global_lock; // Protect map accesses and unique_id increments
+
+// Return the handle wrapped by a unique id, or 0 if the id is unknown, like unique_id_mapping[unique_id] but
+// without inserting into the map, so it is safe with global_lock held shared
+static inline uint64_t unique_id_lookup(const layer_data *data, uint64_t unique_id) {
+    auto it = data->unique_id_mapping.find(unique_id);
+    return (it == data->unique_id_mapping.end()) ? 0 : it->second;
+}
+
+// Storage for the local copies wrappers make of their parameters to unwrap the handles in them, used by
+// unique_objects_wrappers.h when generated with lvl_genvk.py -scratchcount N. Up to N objects are held in the
+// storage itself, on the wrapper's stack, and only larger arrays are allocated on the heap. The objects are
+// destroyed, and any heap array freed, along with the storage.
+template <typename T, size_t N> class scratch_storage {
+  public:
+    scratch_storage() : data_(nullptr), count_(0) {}
+    ~scratch_storage() {
+        for (size_t i = 0; i < count_; ++i) {
+            data_[i].~T();
+        }
+        if (data_ != reinterpret_cast<T *>(storage_)) {
+            ::operator delete(data_);
+        }
+    }
+
+    // Default-construct an array of count objects, like new T[count]
+    T *allocate(size_t count) {
+        data_ = (count <= N) ? reinterpret_cast<T *>(storage_) : static_cast<T *>(::operator new(count * sizeof(T)));
+        for (; count_ < count; ++count_) {
+            new (&data_[count_]) T;
+        }
+        return data_;
+    }
+
+    // Construct a single object from src, like new T(src)
+    template <typename S> T *copy(const S *src) {
+        data_ = reinterpret_cast<T *>(storage_);
+        new (data_) T(src);
+        count_ = 1;
+        return data_;
+    }
+
+  private:
+    scratch_storage(const scratch_storage &) = delete;
+    scratch_storage &operator=(const scratch_storage &) = delete;
+
+    typename std::aligned_storage<sizeof(T), alignof(T)>::type storage_[N];
+    T *data_;
+    size_t count_;
+};
 
 struct GenericHeader {
     VkStructureType sType;
@@ -27,6 +27,7 @@ main_path = os.path.abspath(ld_path + "/../")
 sys.path.append(main_path)
 
 import vulkan
+from generator import findPerfectHash, FNV_OFFSET_BASIS, FNV_PRIME
 
 def generate_get_proc_addr_check(name):
     return "    if (!%s || %s[0] != 'v' || %s[1] != 'k')\n" \
@@ -116,19 +117,28 @@ class Subcommand(object):
         pass
 
 class DispatchTableOpsSubcommand(Subcommand):
+    # <prefix>_lookup_dispatch_table() implementations: a chain of strcmp()
+    # calls, or a table of dispatch table offsets indexed by a perfect hash
+    # of the names
+    lookups = ["strcmp", "hash"]
+
     def run(self):
-        if len(self.argv) != 1:
-            print("DispatchTableOpsSubcommand: <prefix> unspecified")
+        if len(self.argv) not in (1, 2) or self.argv[1:] and self.argv[1] not in self.lookups:
+            print("DispatchTableOpsSubcommand: <prefix> [%s] unspecified" % "|".join(self.lookups))
             return
 
         self.prefix = self.argv[0]
+        self.lookup = self.argv[1] if len(self.argv) > 1 else "strcmp"
         super().run()
 
     def generate_header(self):
-        return "\n".join(["#include <vulkan/vulkan.h>",
-                          "#include <vkLayer.h>",
-                          "#include <string.h>",
-                          "#include \"loader_platform.h\""])
+        headers = ["#include <vulkan/vulkan.h>",
+                   "#include <vkLayer.h>",
+                   "#include <string.h>",
+                   "#include \"loader_platform.h\""]
+        if self.lookup == "hash":
+            headers.insert(2, "#include <stddef.h>")
+        return "\n".join(headers)
 
     def _generate_init(self, type):
         stmts = []
@@ -160,7 +170,97 @@ class DispatchTableOpsSubcommand(Subcommand):
 
         return "\n".join(func)
 
+    # Table of the dispatch table offsets of the entrypoints named in names,
+    # in the order of names, which may contain None for empty entries
+    def _generate_offset_table(self, names):
+        table = []
+        table.append("static const struct {")
+        table.append("    const char *name;")
+        table.append("    size_t offset;")
+        table.append("} %s_dispatch_offsets[] = {" % self.prefix)
+        for name in names:
+            if name is None:
+                table.append("    {NULL, 0},")
+            else:
+                table.append("    {\"%s\", offsetof(VkLayerDispatchTable, %s)}," % (name, name))
+        table.append("};")
+        return table
+
+    # Lookup through a minimal perfect hash of the entrypoint names: the
+    # FNV-1a hash of a name selects a seed, and its hash from that seed
+    # the one entry it can match. If no perfect hash is found, the names
+    # are binary searched instead.
+    def _generate_hash_lookup(self):
+        names = sorted(set([proto.name for proto in self.protos
+                            if self.is_dispatchable_object_first_param(proto)]))
+        perfect_hash = findPerfectHash(names)
+
+        func = []
+        if perfect_hash:
+            seeds, slots = perfect_hash
+            func.append("static inline uint32_t %s_dispatch_hash(const char *name, uint32_t seed)" % self.prefix)
+            func.append("{")
+            func.append("    for (; *name; name++)")
+            func.append("        seed = (seed ^ (uint8_t) *name) * %du;" % FNV_PRIME)
+            func.append("    return seed;")
+            func.append("}")
+            func.append("")
+            func.extend(self._generate_offset_table(slots))
+            func.append("")
+            func.append("static const uint16_t %s_dispatch_seeds[] = {" % self.prefix)
+            for i in range(0, len(seeds), 16):
+                func.append("    " + " ".join(["%d," % seed for seed in seeds[i:i + 16]]))
+            func.append("};")
+        else:
+            func.extend(self._generate_offset_table(names))
+        func.append("")
+        func.append("static inline void *%s_lookup_dispatch_table(const VkLayerDispatchTable *table,"
+                % self.prefix)
+        func.append("%s                                           const char *name)"
+                % (" " * len(self.prefix)))
+        func.append("{")
+        func.append("    PFN_vkVoidFunction addr;")
+        if perfect_hash:
+            func.append("    uint32_t slot;")
+        else:
+            func.append("    size_t first = 0, last = %d, slot;" % len(names))
+            func.append("    int order;")
+        func.append("")
+        func.append(generate_get_proc_addr_check("name"))
+        func.append("")
+        func.append("    name += 2;")
+        if perfect_hash:
+            func.append("    slot = %s_dispatch_seeds[%s_dispatch_hash(name, %du) %% %d];"
+                    % (self.prefix, self.prefix, FNV_OFFSET_BASIS, len(seeds)))
+            func.append("    slot = %s_dispatch_hash(name, slot) %% %d;" % (self.prefix, len(slots)))
+            func.append("    if (!%s_dispatch_offsets[slot].name || strcmp(name, %s_dispatch_offsets[slot].name))"
+                    % (self.prefix, self.prefix))
+            func.append("        return NULL;")
+        else:
+            func.append("    for (;;) {")
+            func.append("        if (first >= last)")
+            func.append("            return NULL;")
+            func.append("        slot = (first + last) / 2;")
+            func.append("        order = strcmp(name, %s_dispatch_offsets[slot].name);" % self.prefix)
+            func.append("        if (order == 0)")
+            func.append("            break;")
+            func.append("        if (order < 0)")
+            func.append("            last = slot;")
+            func.append("        else")
+            func.append("            first = slot + 1;")
+            func.append("    }")
+        func.append("")
+        func.append("    memcpy(&addr, (const char *) table + %s_dispatch_offsets[slot].offset, sizeof(addr));"
+                % self.prefix)
+        func.append("    return (void *) addr;")
+        func.append("}")
+
+        return "\n".join(func)
+
     def _generate_lookup(self):
+        if self.lookup == "hash":
+            return self._generate_hash_lookup()
+
         lookups = []
         for proto in self.protos:
             if self.is_dispatchable_object_first_param(proto):
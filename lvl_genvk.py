@@ -14,9 +14,9 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import argparse, cProfile, pdb, string, sys, time
+import argparse, cProfile, json, multiprocessing, pdb, string, sys, time
 from reg import *
-from generator import write
+from generator import write, GeneratorTimer
 
 #
 # LoaderAndValidationLayer Generator Additions
@@ -29,11 +29,11 @@ startTime = None
 
 def startTimer(timeit):
     global startTime
-    startTime = time.clock()
+    startTime = time.perf_counter()
 
 def endTimer(timeit, msg):
     global startTime
-    endTime = time.clock()
+    endTime = time.perf_counter()
     if (timeit):
         write(msg, endTime - startTime, file=sys.stderr)
         startTime = None
@@ -49,7 +49,22 @@ def makeREstring(list):
 # extensions - list of extension names to include.
 # protect - True if re-inclusion protection should be added to headers
 # directory - path to directory in which to generate the target(s)
-def makeGenOpts(extensions = [], protect = True, directory = '.'):
+# structHelpers - True if parameter validation should call a generated
+#   function for each validated struct, instead of expanding its checks
+#   inline
+# sharedHandleLock - True if unique objects wrappers should look up
+#   handles with a shared lock, for UNIQUE_OBJECTS_SHARED_HANDLE_LOCK builds
+# scratchCount - if nonzero, the largest array unique objects wrappers copy
+#   on the stack rather than the heap to unwrap handles in
+# batchArrays - True if threading checks should check arrays of objects
+#   with one call, taking the counter lock once
+# elideUnwrittenReads - True if threading checks should not track reads
+#   of handle types only written by destroying them
+# hashProcmap - True if the threading and unique objects layers should
+#   look up intercepted functions with a perfect hash
+def makeGenOpts(extensions = [], protect = True, directory = '.', structHelpers = False,
+                sharedHandleLock = False, scratchCount = 0, batchArrays = False,
+                elideUnwrittenReads = False, hashProcmap = False):
     global genOpts
     genOpts = {}
 
@@ -110,12 +125,16 @@ def makeGenOpts(extensions = [], protect = True, directory = '.'):
             defaultExtensions = 'vulkan',
             addExtensions     = addExtensions,
             removeExtensions  = removeExtensions,
+            writeIfChanged    = True,
             prefixText        = prefixStrings + vkPrefixStrings,
             protectFeature    = False,
             apicall           = 'VKAPI_ATTR ',
             apientry          = 'VKAPI_CALL ',
             apientryp         = 'VKAPI_PTR *',
-            alignFuncParam    = 48)
+            alignFuncParam    = 48,
+            batchArrays       = batchArrays,
+            elideUnwrittenReads = elideUnwrittenReads,
+            hashProcmap       = hashProcmap)
         ]
 
     # Options for parameter validation layer
@@ -131,12 +150,14 @@ def makeGenOpts(extensions = [], protect = True, directory = '.'):
             defaultExtensions = 'vulkan',
             addExtensions     = addExtensions,
             removeExtensions  = removeExtensions,
+            writeIfChanged    = True,
             prefixText        = prefixStrings + vkPrefixStrings,
             protectFeature    = False,
             apicall           = 'VKAPI_ATTR ',
             apientry          = 'VKAPI_CALL ',
             apientryp         = 'VKAPI_PTR *',
-            alignFuncParam    = 48)
+            alignFuncParam    = 48,
+            genStructHelpers  = structHelpers)
         ]
 
     # Options for unique objects layer
@@ -152,34 +173,48 @@ def makeGenOpts(extensions = [], protect = True, directory = '.'):
             defaultExtensions = 'vulkan',
             addExtensions     = addExtensions,
             removeExtensions  = removeExtensions,
+            writeIfChanged    = True,
             prefixText        = prefixStrings + vkPrefixStrings,
             protectFeature    = False,
             apicall           = 'VKAPI_ATTR ',
             apientry          = 'VKAPI_CALL ',
             apientryp         = 'VKAPI_PTR *',
-            alignFuncParam    = 48)
+            alignFuncParam    = 48,
+            sharedHandleLock  = sharedHandleLock,
+            scratchCount      = scratchCount,
+            hashProcmap       = hashProcmap)
         ]
 
 # Generate a target based on the options in the matching genOpts{} object.
 # This is encapsulated in a function so it can be profiled and/or timed.
 # The args parameter is an parsed argument object containing the following
 # fields that are used:
-#   target - target to generate
 #   directory - directory to generate it in
 #   protect - True if re-inclusion wrappers should be created
 #   extensions - list of additional extensions to include in generated
 #   interfaces
-def genTarget(args):
+#   time - True if generation should be timed
+#   timefile - file to write a JSON timing report to, or None
+#   structhelpers - True to generate parameter validation struct helpers
+#   sharedhandlelock - True to generate unique objects wrappers for a
+#     reader-writer handle map lock
+#   scratchcount - largest array unique objects wrappers copy on the
+#     stack, or 0 to copy on the heap
+#   batcharrays - True to check arrays of objects in threading checks
+#     with one call
+#   elideunwrittenreads - True to not track reads of handle types only
+#     written by destroying them in threading checks
+#   hashprocmap - True to look up layer intercepts with a perfect hash
+# target - target to generate
+# Returns the GeneratorTimer report for the target, with its output size
+# and the number of messages written at each level, if args.timefile is
+# set, otherwise None.
+def genTarget(args, target):
     global genOpts
 
-    # Create generator options with specified parameters
-    makeGenOpts(extensions = args.extension,
-                protect = args.protect,
-                directory = args.directory)
-
-    if (args.target in genOpts.keys()):
-        createGenerator = genOpts[args.target][0]
-        options = genOpts[args.target][1]
+    if (target in genOpts.keys()):
+        createGenerator = genOpts[target][0]
+        options = genOpts[target][1]
 
         write('* Building', options.filename, file=sys.stderr)
 
@@ -187,13 +222,85 @@ def genTarget(args):
         gen = createGenerator(errFile=errWarn,
                               warnFile=errWarn,
                               diagFile=diag)
-        reg.setGenerator(gen)
-        reg.apiGen(options)
+        timer = None
+        if (args.timefile):
+            timer = GeneratorTimer()
+        reg.apiGen(options, gen, timer)
         write('* Generated', options.filename, file=sys.stderr)
         endTimer(args.time, '* Time to generate ' + options.filename + ' =')
+        output = None
+        if ((args.time or timer != None) and gen.outFilename != None):
+            with open(gen.outFilename) as f:
+                contents = f.read()
+            output = { 'bytes' : len(contents), 'lines' : contents.count('\n') }
+        if (args.time):
+            write('* Messages written for', options.filename, '=',
+                  ', '.join(['%s: %d' % (level, gen.logCounts[level])
+                             for level in sorted(gen.logCounts)]),
+                  file=sys.stderr)
+            if (output != None):
+                write('* Size of', options.filename, '=', output['bytes'],
+                      'bytes,', output['lines'], 'lines', file=sys.stderr)
+        if (timer != None):
+            report = timer.report()
+            report['messages'] = gen.logCounts
+            report['output'] = output
+            return report
     else:
         write('No generator options for unknown target:',
-              args.target, file=sys.stderr)
+              target, file=sys.stderr)
+    return None
+
+# Entry point for genTargets() worker processes.
+#   job - (args, target) tuple of genTarget() arguments
+def genTargetJob(job):
+    return genTarget(*job)
+
+# Generate all the targets requested in args from the same loaded registry.
+# Uses the args fields listed for genTarget(), and:
+#   target - list of targets to generate
+#   all - True to generate every known target
+#   jobs - maximum number of targets to generate in parallel
+# registryTimer - GeneratorTimer holding the registry load phases, or None
+# If args.timefile is set, a JSON report of the registry load phases and
+# of each target's generation is written to it.
+def genTargets(args, registryTimer = None):
+    global genOpts
+
+    # Create generator options with specified parameters
+    makeGenOpts(extensions = args.extension,
+                protect = args.protect,
+                directory = args.directory,
+                structHelpers = args.structhelpers,
+                sharedHandleLock = args.sharedhandlelock,
+                scratchCount = args.scratchcount,
+                batchArrays = args.batcharrays,
+                elideUnwrittenReads = args.elideunwrittenreads,
+                hashProcmap = args.hashprocmap)
+
+    if (args.all):
+        targets = list(genOpts.keys())
+    else:
+        targets = args.target
+    if (not targets):
+        write('No target specified', file=sys.stderr)
+
+    # Workers are forked after the registry is loaded, so they share it
+    # copy-on-write rather than each loading vk.xml again. Platforms
+    # without fork() generate the targets serially.
+    jobs = min(args.jobs, len(targets))
+    if (jobs > 1 and 'fork' in multiprocessing.get_all_start_methods()):
+        with multiprocessing.get_context('fork').Pool(jobs) as pool:
+            reports = pool.map(genTargetJob, [(args, target) for target in targets], 1)
+    else:
+        reports = [genTarget(args, target) for target in targets]
+
+    if (args.timefile):
+        with open(args.timefile, 'w') as f:
+            json.dump({ 'registry' : args.registry,
+                        'phases' : registryTimer.phases if registryTimer != None else {},
+                        'targets' : dict(zip(targets, reports)) },
+                      f, indent = 4, sort_keys = True)
 
 # -extension name - may be a single extension name, a a space-separated list
 # of names, or a regular expression.
@@ -203,6 +310,10 @@ if __name__ == '__main__':
     parser.add_argument('-extension', action='append',
                         default=[],
                         help='Specify an extension or extensions to add to targets')
+    parser.add_argument('-all', action='store_true',
+                        help='Generate all targets')
+    parser.add_argument('-batcharrays', action='store_true',
+                        help='Check each array of objects in thread_check.h with one call, taking the counter lock once')
     parser.add_argument('-debug', action='store_true',
                         help='Enable debugging')
     parser.add_argument('-dump', action='store_true',
@@ -210,9 +321,16 @@ if __name__ == '__main__':
     parser.add_argument('-diagfile', action='store',
                         default=None,
                         help='Write diagnostics to specified file')
+    parser.add_argument('-elideunwrittenreads', action='store_true',
+                        help='Do not track reads in thread_check.h of handle types which are only externally synchronized where deleted, by commands named vkDestroy* or vkFree*')
     parser.add_argument('-errfile', action='store',
                         default=None,
                         help='Write errors and warnings to specified file instead of stderr')
+    parser.add_argument('-hashprocmap', action='store_true',
+                        help='Look up the functions the threading and unique objects layers intercept with a perfect hash of their names')
+    parser.add_argument('-j', action='store', dest='jobs',
+                        type=int, default=1,
+                        help='Generate up to specified number of targets in parallel')
     parser.add_argument('-noprotect', dest='protect', action='store_false',
                         help='Disable inclusion protection in output headers')
     parser.add_argument('-profile', action='store_true',
@@ -220,30 +338,48 @@ if __name__ == '__main__':
     parser.add_argument('-registry', action='store',
                         default='vk.xml',
                         help='Use specified registry file instead of vk.xml')
+    parser.add_argument('-scratchcount', action='store',
+                        type=int, default=0,
+                        help='Make unique objects wrappers copy arrays of up to specified number of elements on the stack instead of the heap')
+    parser.add_argument('-sharedhandlelock', action='store_true',
+                        help='Generate unique objects wrappers for a layer built with UNIQUE_OBJECTS_SHARED_HANDLE_LOCK')
+    parser.add_argument('-structhelpers', action='store_true',
+                        help='Generate a validation function for each struct in parameter_validation.h, instead of expanding its checks inline')
     parser.add_argument('-time', action='store_true',
                         help='Enable timing')
+    parser.add_argument('-timefile', action='store',
+                        default=None,
+                        help='Write a JSON report of time spent in each generation phase to specified file')
     parser.add_argument('-validate', action='store_true',
                         help='Enable group validation')
     parser.add_argument('-o', action='store', dest='directory',
                         default='.',
                         help='Create target and related files in specified directory')
-    parser.add_argument('target', metavar='target', nargs='?',
-                        help='Specify target')
+    parser.add_argument('target', metavar='target', nargs='*',
+                        help='Specify target(s)')
 
     args = parser.parse_args()
 
+    if (args.scratchcount < 0):
+        parser.error('-scratchcount must not be negative')
+
     # This splits arguments which are space-separated lists
     args.extension = [name for arg in args.extension for name in arg.split()]
 
     # Load & parse registry
     reg = Registry()
 
+    registryTimer = GeneratorTimer()
     startTimer(args.time)
+    start = registryTimer.start()
     tree = etree.parse(args.registry)
+    registryTimer.stop('XML parse', start)
     endTimer(args.time, '* Time to make ElementTree =')
 
     startTimer(args.time)
+    start = registryTimer.start()
     reg.loadElementTree(tree)
+    registryTimer.stop('parseTree', start)
     endTimer(args.time, '* Time to parse ElementTree =')
 
     if (args.validate):
@@ -265,11 +401,11 @@ if __name__ == '__main__':
         diag = None
 
     if (args.debug):
-        pdb.run('genTarget(args)')
+        pdb.run('genTargets(args, registryTimer)')
     elif (args.profile):
         import cProfile, pstats
-        cProfile.run('genTarget(args)', 'profile.txt')
+        cProfile.run('genTargets(args, registryTimer)', 'profile.txt')
         p = pstats.Stats('profile.txt')
         p.strip_dirs().sort_stats('time').print_stats(50)
     else:
-        genTarget(args)
+        genTargets(args, registryTimer)
@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+#
+# Copyright (c) 2013-2016 The Khronos Group Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Measure how registry loading and the lvl_genvk.py generators scale with
+# the size of the registry. Synthetic registries are built from vk.xml by
+# adding scale-1 renamed copies of every command, struct / union type and
+# extension, then each one is loaded and every requested target generated
+# from it, reporting the time taken and the peak memory allocated.
+#
+# The 'vs linear' column divides each time by scale times the time taken
+# at the smallest scale, so values growing well above 1 point at
+# super-linear behavior.
+
+import argparse, copy, json, shutil, sys, tempfile, time, tracemalloc
+import xml.etree.ElementTree as etree
+from reg import Registry
+from generator import write
+import lvl_genvk
+
+# renameElems - rename the text of each Element in elems found in the
+# rename dictionary
+def renameElems(elems, rename):
+    for elem in elems:
+        if (elem.text in rename):
+            elem.text = rename[elem.text]
+
+# scaleRegistry - return the root of a synthetic registry containing
+# scale copies of the commands, struct / union types and extensions of
+# a registry
+#   root - <registry> Element to copy. Not modified.
+#   scale - integer number of copies, 1 for an unmodified copy
+# Copy k renames commands and types by appending 'Syn<k>', and enums
+# defined by extensions by appending '_SYN<k>'. An extra extension in
+# each copy requires the copies of the core API commands and types.
+# Global commands (vkCreateInstance etc.), whose first parameter is not
+# a handle, are not copied since the generators special-case them.
+def scaleRegistry(root, scale):
+    root = copy.deepcopy(root)
+    types = root.find('types')
+    commands = root.find('commands')
+    extensions = root.find('extensions')
+    structs = [type for type in types.findall('type')
+               if type.get('category') in ('struct', 'union')]
+    handles = set([type.find('name').text for type in types.findall('type')
+                   if type.get('category') == 'handle'])
+    cmds = [cmd for cmd in commands.findall('command')
+            if cmd.find('param/type').text in handles]
+    exts = extensions.findall('extension')
+    # Extension numbers of each copy are offset to keep them unique
+    numberBase = max([int(ext.get('number')) for ext in exts]) + 1
+    # Names of core commands and types
+    coreNames = []
+    for feature in root.findall('feature'):
+        for require in feature.findall('require'):
+            for elem in require.findall('command') + require.findall('type'):
+                coreNames.append((elem.tag, elem.get('name')))
+    for k in range(1, scale):
+        suffix = 'Syn' + str(k)
+        enumSuffix = '_SYN' + str(k)
+        rename = {}
+        for type in structs:
+            rename[type.get('name')] = type.get('name') + suffix
+        for cmd in cmds:
+            name = cmd.find('proto/name').text
+            rename[name] = name + suffix
+        for type in structs:
+            newType = copy.deepcopy(type)
+            newType.attrib['name'] = rename[type.get('name')]
+            renameElems(newType.findall('.//type'), rename)
+            types.append(newType)
+        for cmd in cmds:
+            newCmd = copy.deepcopy(cmd)
+            if ('name' in newCmd.attrib):
+                newCmd.attrib['name'] = rename[newCmd.get('name')]
+            renameElems(newCmd.findall('proto/name'), rename)
+            renameElems(newCmd.findall('.//type'), rename)
+            commands.append(newCmd)
+        for ext in exts:
+            newExt = copy.deepcopy(ext)
+            newExt.attrib['name'] = ext.get('name') + suffix
+            newExt.attrib['number'] = str(int(ext.get('number')) + k * numberBase)
+            for elem in newExt.findall('require/command') + newExt.findall('require/type'):
+                if (elem.get('name') in rename):
+                    elem.attrib['name'] = rename[elem.get('name')]
+            for elem in newExt.findall('require/enum'):
+                elem.attrib['name'] = elem.get('name') + enumSuffix
+            extensions.append(newExt)
+        coreExt = etree.SubElement(extensions, 'extension',
+                                   { 'name' : 'VK_SYN_core' + suffix,
+                                     'number' : str(scale * numberBase + k),
+                                     'supported' : 'vulkan' })
+        require = etree.SubElement(coreExt, 'require')
+        for (tag, name) in coreNames:
+            if (name in rename):
+                etree.SubElement(require, tag, { 'name' : rename[name] })
+    return root
+
+# measure - run a function, returning its result, the wall clock time it
+# took, and the peak memory allocated while running it (or None)
+#   traceMemory - True to trace memory allocations. This is slow, so the
+#   time taken is only meaningful when False.
+def measure(func, traceMemory):
+    if (traceMemory):
+        tracemalloc.start()
+    startTime = time.perf_counter()
+    result = func()
+    endTime = time.perf_counter()
+    peak = None
+    if (traceMemory):
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return result, endTime - startTime, peak
+
+# benchmarkRegistry - load a registry and generate each target from it,
+# returning a dictionary of { 'time', 'peak' } results keyed by phase
+# ('loadElementTree' or a target name)
+#   root - <registry> Element to load. Not modified.
+#   targets - list of lvl_genvk.py target names
+#   traceMemory - True to measure peak memory, with a second, traced run
+def benchmarkRegistry(root, targets, traceMemory):
+    results = {}
+    for traced in [False, True] if traceMemory else [False]:
+        # loadElementTree modifies the tree, so load a fresh copy each time
+        tree = etree.ElementTree(copy.deepcopy(root))
+        reg = Registry()
+        reg.gen.warnFile = None
+        result, seconds, peak = measure(lambda: reg.loadElementTree(tree), traced)
+        results.setdefault('loadElementTree', {})['peak' if traced else 'time'] = peak if traced else seconds
+        for target in targets:
+            createGenerator, options = lvl_genvk.genOpts[target]
+            gen = createGenerator(errFile=sys.stderr, warnFile=None, diagFile=None)
+            result, seconds, peak = measure(lambda: reg.apiGen(options, gen), traced)
+            results.setdefault(target, {})['peak' if traced else 'time'] = peak if traced else seconds
+    return results
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument('-registry', action='store',
+                        default='vk.xml',
+                        help='Use specified registry file instead of vk.xml')
+    parser.add_argument('-scale', action='append', type=int,
+                        default=[],
+                        help='Benchmark a registry this many times the size of the input (may be repeated; default 1, 5, 20 and 50)')
+    parser.add_argument('-nomemory', dest='memory', action='store_false',
+                        help='Do not measure peak memory (halves the run time)')
+    parser.add_argument('-json', action='store',
+                        default=None,
+                        help='Also write the results as JSON to specified file')
+    parser.add_argument('target', metavar='target', nargs='*',
+                        help='Specify target(s) to generate (default all)')
+
+    args = parser.parse_args()
+
+    scales = sorted(args.scale) if args.scale else [1, 5, 20, 50]
+
+    # Generated files are written to a scratch directory
+    directory = tempfile.mkdtemp()
+    lvl_genvk.makeGenOpts(directory = directory)
+    targets = args.target if args.target else sorted(lvl_genvk.genOpts.keys())
+
+    root = etree.parse(args.registry).getroot()
+    report = []
+    baseTimes = {}
+    write('%6s %8s %8s %10s  %-26s %10s %10s %10s' %
+          ('scale', 'commands', 'structs', 'extensions', 'phase',
+           'seconds', 'vs linear', 'peak MiB'))
+    try:
+        # Warm up, so the first scale measured doesn't include one-time
+        # costs such as compiling regular expressions
+        benchmarkRegistry(root, targets, False)
+        for scale in scales:
+            scaled = scaleRegistry(root, scale)
+            sizes = { 'commands' : len(scaled.findall('commands/command')),
+                      'structs' : len([type for type in scaled.findall('types/type')
+                                       if type.get('category') in ('struct', 'union')]),
+                      'extensions' : len(scaled.findall('extensions/extension')) }
+            results = benchmarkRegistry(scaled, targets, args.memory)
+            for phase in ['loadElementTree'] + targets:
+                seconds = results[phase]['time']
+                peak = results[phase].get('peak')
+                if (phase not in baseTimes):
+                    baseTimes[phase] = (scale, seconds)
+                baseScale, baseSeconds = baseTimes[phase]
+                ratio = seconds * baseScale / (baseSeconds * scale)
+                write('%6d %8d %8d %10d  %-26s %10.3f %10.2f %10s' %
+                      (scale, sizes['commands'], sizes['structs'], sizes['extensions'],
+                       phase, seconds, ratio,
+                       '%.1f' % (peak / 1048576.0) if peak != None else '-'))
+                sys.stdout.flush()
+                report.append(dict(sizes, scale = scale, phase = phase,
+                                   seconds = seconds, peakBytes = peak))
+    finally:
+        shutil.rmtree(directory)
+
+    if (args.json):
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent = 4, sort_keys = True)
@@ -58,6 +58,10 @@ from collections import namedtuple
 #     parameter on a separate line
 #   alignFuncParam - if nonzero and parameters are being put on a
 #     separate line, align parameter names at the specified column
+#   genStructHelpers - True to generate a validate_<struct>() function
+#     for each struct with members to validate, called wherever the
+#     struct is validated, instead of expanding the struct's member
+#     checks inline at each use. Defaults to False.
 class ParamCheckerGeneratorOptions(GeneratorOptions):
     def __init__(self,
                  filename = None,
@@ -70,6 +74,8 @@ class ParamCheckerGeneratorOptions(GeneratorOptions):
                  addExtensions = None,
                  removeExtensions = None,
                  sortProcedure = regSortFeatures,
+                 writeIfChanged = False,
+                 streamOutput = False,
                  prefixText = "",
                  genFuncPointers = True,
                  protectFile = True,
@@ -81,10 +87,12 @@ class ParamCheckerGeneratorOptions(GeneratorOptions):
                  apientryp = '',
                  indentFuncProto = True,
                  indentFuncPointer = False,
-                 alignFuncParam = 0):
+                 alignFuncParam = 0,
+                 genStructHelpers = False):
         GeneratorOptions.__init__(self, filename, directory, apiname, profile,
                                   versions, emitversions, defaultExtensions,
-                                  addExtensions, removeExtensions, sortProcedure)
+                                  addExtensions, removeExtensions, sortProcedure,
+                                  writeIfChanged, streamOutput)
         self.prefixText      = prefixText
         self.genFuncPointers = genFuncPointers
         self.protectFile     = protectFile
@@ -97,6 +105,7 @@ class ParamCheckerGeneratorOptions(GeneratorOptions):
         self.indentFuncProto = indentFuncProto
         self.indentFuncPointer = indentFuncPointer
         self.alignFuncParam  = alignFuncParam
+        self.genStructHelpers = genStructHelpers
 
 # ParamCheckerOutputGenerator - subclass of OutputGenerator.
 # Generates param checker layer code.
@@ -117,7 +126,7 @@ class ParamCheckerGeneratorOptions(GeneratorOptions):
 class ParamCheckerOutputGenerator(OutputGenerator):
     """Generate ParamChecker code based on XML element attributes"""
     # This is an ordered list of sections in the header file.
-    ALL_SECTIONS = ['command']
+    ALL_SECTIONS = ['struct', 'command']
     def __init__(self,
                  errFile = sys.stderr,
                  warnFile = sys.stderr,
@@ -147,16 +156,19 @@ class ParamCheckerOutputGenerator(OutputGenerator):
         self.commands = []                                # List of CommandData records for all Vulkan commands
         self.structMembers = []                           # List of StructMemberData records for all Vulkan structs
         self.validatedStructs = dict()                    # Map of structs type names to generated validation code for that struct type
+        self.structHelpers = []                           # List of StructHelperData records for struct validation helpers
+        self.structHelperCalls = set()                    # Set of struct type names with helpers called by the code being generated
         self.enumRanges = dict()                          # Map of enum name to BEGIN/END range values
         self.flags = set()                                # Map of flags typenames
         self.flagBits = dict()                            # Map of flag bits typename to list of values
         # Named tuples to store struct and command data
         self.StructType = namedtuple('StructType', ['name', 'value'])
         self.CommandParam = namedtuple('CommandParam', ['type', 'name', 'ispointer', 'isstaticarray', 'isbool', 'israngedenum',
-                                                        'isconst', 'isoptional', 'iscount', 'noautovalidity', 'len', 'extstructs',
+                                                        'isconst', 'isoptional', 'iscount', 'noautovalidity', 'len', 'lenInfo', 'extstructs',
                                                         'condition', 'cdecl'])
         self.CommandData = namedtuple('CommandData', ['name', 'params', 'cdecl'])
         self.StructMemberData = namedtuple('StructMemberData', ['name', 'members'])
+        self.StructHelperData = namedtuple('StructHelperData', ['name', 'code', 'calls'])
     #
     def incIndent(self, indent):
         inc = ' ' * self.INDENT_SPACES
@@ -228,6 +240,8 @@ class ParamCheckerOutputGenerator(OutputGenerator):
         self.commands = []
         self.structMembers = []
         self.validatedStructs = dict()
+        self.structHelpers = []
+        self.structHelperCalls = set()
         self.enumRanges = dict()
         self.flags = set()
         self.flagBits = dict()
@@ -245,6 +259,8 @@ class ParamCheckerOutputGenerator(OutputGenerator):
             self.processStructMemberData()
             # Generate the command parameter checking code from the captured data
             self.processCmdData()
+            # Keep the struct validation helpers called by the command parameter checking code
+            self.processStructHelperData()
             # Write the declaration for the HeaderVersion
             if self.headerVersion:
                 write('const uint32_t GeneratedHeaderVersion = {};'.format(self.headerVersion), file=self.outFile)
@@ -260,7 +276,9 @@ class ParamCheckerOutputGenerator(OutputGenerator):
                     decl += ';'
                     write(decl, file=self.outFile)
             self.newline()
-            # Write the parameter validation code to the file
+            # Write the struct validation helpers and parameter validation code to the file
+            if (self.sections['struct']):
+                write('\n'.join(self.sections['struct']), file=self.outFile)
             if (self.sections['command']):
                 if (self.genOpts.protectProto):
                     write(self.genOpts.protectProto,
@@ -307,24 +325,21 @@ class ParamCheckerOutputGenerator(OutputGenerator):
     def genStruct(self, typeinfo, typeName):
         OutputGenerator.genStruct(self, typeinfo, typeName)
         conditions = self.structMemberValidationConditions[typeName] if typeName in self.structMemberValidationConditions else None
-        members = typeinfo.elem.findall('.//member')
+        members = typeinfo.members
         #
         # Iterate over members once to get length parameters for arrays
         lens = set()
         for member in members:
-            len = self.getLen(member)
-            if len:
-                lens.add(len)
+            if member.len:
+                lens.add(member.len)
         #
         # Generate member info
         membersInfo = []
         for member in members:
             # Get the member's type and name
-            info = self.getTypeNameTuple(member)
-            type = info[0]
-            name = info[1]
+            type = member.type
+            name = member.name
             stypeValue = ''
-            cdecl = self.makeCParamDecl(member, 0)
             # Process VkStructureType
             if type == 'VkStructureType':
                 # Extract the required struct type value from the comments
@@ -347,23 +362,24 @@ class ParamCheckerOutputGenerator(OutputGenerator):
             # optional for parameter NULL checks.  Static array members
             # are also treated as optional to skip NULL pointer validation, as
             # they won't be NULL.
-            isstaticarray = self.paramIsStaticArray(member)
+            isstaticarray = member.staticArrayDepth
             isoptional = False
-            if self.paramIsOptional(member) or (name == 'pNext') or (isstaticarray):
+            if member.optional or (name == 'pNext') or (isstaticarray):
                 isoptional = True
             membersInfo.append(self.CommandParam(type=type, name=name,
                                                 ispointer=self.paramIsPointer(member),
                                                 isstaticarray=isstaticarray,
                                                 isbool=True if type == 'VkBool32' else False,
                                                 israngedenum=True if type in self.enumRanges else False,
-                                                isconst=True if 'const' in cdecl else False,
+                                                isconst=member.isconst,
                                                 isoptional=isoptional,
                                                 iscount=iscount,
-                                                noautovalidity=True if member.attrib.get('noautovalidity') is not None else False,
-                                                len=self.getLen(member),
-                                                extstructs=member.attrib.get('validextensionstructs') if name == 'pNext' else None,
+                                                noautovalidity=member.noautovalidity,
+                                                len=member.len,
+                                                lenInfo=member.lenInfo,
+                                                extstructs=member.validextensionstructs if name == 'pNext' else None,
                                                 condition=conditions[name] if conditions and name in conditions else None,
-                                                cdecl=cdecl))
+                                                cdecl=member.cdecl))
         self.structMembers.append(self.StructMemberData(name=typeName, members=membersInfo))
     #
     # Capture group (e.g. C "enum" type) info to be used for
@@ -402,79 +418,43 @@ class ParamCheckerOutputGenerator(OutputGenerator):
     def genCmd(self, cmdinfo, name):
         OutputGenerator.genCmd(self, cmdinfo, name)
         if name not in self.blacklist:
-            params = cmdinfo.elem.findall('param')
+            params = cmdinfo.params
             # Get list of array lengths
             lens = set()
             for param in params:
-                len = self.getLen(param)
-                if len:
-                    lens.add(len)
+                if param.len:
+                    lens.add(param.len)
             # Get param info
             paramsInfo = []
             for param in params:
-                paramInfo = self.getTypeNameTuple(param)
-                cdecl = self.makeCParamDecl(param, 0)
                 # Check for parameter name in lens set
                 iscount = False
-                if paramInfo[1] in lens:
+                if param.name in lens:
                     iscount = True
-                paramsInfo.append(self.CommandParam(type=paramInfo[0], name=paramInfo[1],
+                paramsInfo.append(self.CommandParam(type=param.type, name=param.name,
                                                     ispointer=self.paramIsPointer(param),
-                                                    isstaticarray=self.paramIsStaticArray(param),
-                                                    isbool=True if paramInfo[0] == 'VkBool32' else False,
-                                                    israngedenum=True if paramInfo[0] in self.enumRanges else False,
-                                                    isconst=True if 'const' in cdecl else False,
-                                                    isoptional=self.paramIsOptional(param),
+                                                    isstaticarray=param.staticArrayDepth,
+                                                    isbool=True if param.type == 'VkBool32' else False,
+                                                    israngedenum=True if param.type in self.enumRanges else False,
+                                                    isconst=param.isconst,
+                                                    isoptional=param.optional,
                                                     iscount=iscount,
-                                                    noautovalidity=True if param.attrib.get('noautovalidity') is not None else False,
-                                                    len=self.getLen(param),
+                                                    noautovalidity=param.noautovalidity,
+                                                    len=param.len,
+                                                    lenInfo=param.lenInfo,
                                                     extstructs=None,
                                                     condition=None,
-                                                    cdecl=cdecl))
+                                                    cdecl=param.cdecl))
             self.commands.append(self.CommandData(name=name, params=paramsInfo, cdecl=self.makeCDecls(cmdinfo.elem)[0]))
     #
-    # Check if the parameter passed in is a pointer
+    # Check if the parameter (a ParamInfo) passed in is a pointer
     def paramIsPointer(self, param):
-        ispointer = 0
-        paramtype = param.find('type')
-        if (paramtype.tail is not None) and ('*' in paramtype.tail):
-            ispointer = paramtype.tail.count('*')
-        elif paramtype.text[:4] == 'PFN_':
+        ispointer = param.pointerDepth
+        if not ispointer and param.type[:4] == 'PFN_':
             # Treat function pointer typedefs as a pointer to a single value
             ispointer = 1
         return ispointer
     #
-    # Check if the parameter passed in is a static array
-    def paramIsStaticArray(self, param):
-        isstaticarray = 0
-        paramname = param.find('name')
-        if (paramname.tail is not None) and ('[' in paramname.tail):
-            isstaticarray = paramname.tail.count('[')
-        return isstaticarray
-    #
-    # Check if the parameter passed in is optional
-    # Returns a list of Boolean values for comma separated len attributes (len='false,true')
-    def paramIsOptional(self, param):
-        # See if the handle is optional
-        isoptional = False
-        # Simple, if it's optional, return true
-        optString = param.attrib.get('optional')
-        if optString:
-            if optString == 'true':
-                isoptional = True
-            elif ',' in optString:
-                opts = []
-                for opt in optString.split(','):
-                    val = opt.strip()
-                    if val == 'true':
-                        opts.append(True)
-                    elif val == 'false':
-                        opts.append(False)
-                    else:
-                        print('Unrecognized len attribute value',val)
-                isoptional = opts
-        return isoptional
-    #
     # Check if the handle passed in is optional
     # Uses the same logic as ValidityOutputGenerator.isHandleOptional
     def isHandleOptional(self, param, lenParam):
@@ -506,83 +486,28 @@ class ParamCheckerOutputGenerator(OutputGenerator):
             value = self.structTypes[typename].value
         else:
             value = self.genVkStructureType(typename)
-            self.logMsg('diag', 'ParameterValidation: Generating {} for {} structure type that was not defined by the current feature'.format(value, typename))
+            self.logMsg('diag', lambda: 'ParameterValidation: Generating {} for {} structure type that was not defined by the current feature'.format(value, typename))
         return value
     #
-    # Retrieve the value of the len tag
-    def getLen(self, param):
-        result = None
-        len = param.attrib.get('len')
-        if len and len != 'null-terminated':
-            # For string arrays, 'len' can look like 'count,null-terminated',
-            # indicating that we have a null terminated array of strings.  We
-            # strip the null-terminated from the 'len' field and only return
-            # the parameter specifying the string count
-            if 'null-terminated' in len:
-                result = len.split(',')[0]
-            else:
-                result = len
-            result = str(result).replace('::', '->')
-        return result
-    #
-    # Retrieve the type and name for a parameter
-    def getTypeNameTuple(self, param):
-        type = ''
-        name = ''
-        for elem in param:
-            if elem.tag == 'type':
-                type = noneStr(elem.text)
-            elif elem.tag == 'name':
-                name = noneStr(elem.text)
-        return (type, name)
-    #
-    # Find a named parameter in a parameter list
-    def getParamByName(self, params, name):
-        for param in params:
-            if param.name == name:
-                return param
-        return None
-    #
-    # Extract length values from latexmath.  Currently an inflexible solution that looks for specific
-    # patterns that are found in vk.xml.  Will need to be updated when new patterns are introduced.
-    def parseLateXMath(self, source):
-        name = 'ERROR'
-        decoratedName = 'ERROR'
-        if 'mathit' in source:
-            # Matches expressions similar to 'latexmath:[$\lceil{\mathit{rasterizationSamples} \over 32}\rceil$]'
-            match = re.match(r'latexmath\s*\:\s*\[\s*\$\\l(\w+)\s*\{\s*\\mathit\s*\{\s*(\w+)\s*\}\s*\\over\s*(\d+)\s*\}\s*\\r(\w+)\$\s*\]', source)
-            if not match or match.group(1) != match.group(4):
-                raise 'Unrecognized latexmath expression'
-            name = match.group(2)
-            decoratedName = '{}({}/{})'.format(*match.group(1, 2, 3))
-        else:
-            # Matches expressions similar to 'latexmath : [$dataSize \over 4$]'
-            match = re.match(r'latexmath\s*\:\s*\[\s*\$\s*(\w+)\s*\\over\s*(\d+)\s*\$\s*\]', source)
-            name = match.group(1)
-            decoratedName = '{}/{}'.format(*match.group(1, 2))
-        return name, decoratedName
-    #
-    # Get the length paramater record for the specified parameter name
-    def getLenParam(self, params, name):
+    # Get the length paramater record for an array, given the array's LenInfo
+    #   params - dictionary of the records of the other parameters or members, keyed by name
+    def getLenParam(self, params, lenInfo):
         lenParam = None
-        if name:
-            if '->' in name:
+        if lenInfo and lenInfo.expr:
+            if lenInfo.dereference:
                 # The count is obtained by dereferencing a member of a struct parameter
-                lenParam = self.CommandParam(name=name, iscount=True, ispointer=False, isbool=False, israngedenum=False, isconst=False,
-                                             isstaticarray=None, isoptional=False, type=None, noautovalidity=False, len=None, extstructs=None,
-                                             condition=None, cdecl=None)
-            elif 'latexmath' in name:
-                lenName, decoratedName = self.parseLateXMath(name)
-                lenParam = self.getParamByName(params, lenName)
-                # TODO: Zero-check the result produced by the equation?
-                # Copy the stored len parameter entry and overwrite the name with the processed latexmath equation
-                #param = self.getParamByName(params, lenName)
-                #lenParam = self.CommandParam(name=decoratedName, iscount=param.iscount, ispointer=param.ispointer,
-                #                             isoptional=param.isoptional, type=param.type, len=param.len,
-                #                             isstaticarray=param.isstaticarray, extstructs=param.extstructs,
-                #                             noautovalidity=True, condition=None, cdecl=param.cdecl)
+                lenParam = self.CommandParam(name=lenInfo.expr, iscount=True, ispointer=False, isbool=False, israngedenum=False, isconst=False,
+                                             isstaticarray=None, isoptional=False, type=None, noautovalidity=False, len=None, lenInfo=None,
+                                             extstructs=None, condition=None, cdecl=None)
+            elif lenInfo.latexmath:
+                # Currently an inflexible solution that looks for specific patterns that are found in vk.xml.  LenInfo will
+                # need to be updated when new patterns are introduced.
+                if not lenInfo.paramName:
+                    self.logMsg('error', 'ParameterValidation: Unrecognized latexmath expression', lenInfo.text)
+                # TODO: Zero-check the result produced by the equation (lenInfo.cExpr)?
+                lenParam = params.get(lenInfo.paramName)
             else:
-                lenParam = self.getParamByName(params, name)
+                lenParam = params.get(lenInfo.expr)
         return lenParam
     #
     # Convert a vulkan.h command declaration into a parameter_validation.h definition
@@ -628,8 +553,8 @@ class ParamCheckerOutputGenerator(OutputGenerator):
     def genConditionalCall(self, prefix, condition, exprs):
         checkedExpr = []
         localIndent = ''
-        formattedCondition = condition.format(prefix)
-        checkedExpr.append(localIndent + 'if ({})\n'.format(formattedCondition))
+        formattedCondition = CodeTemplate.format(condition, prefix)
+        checkedExpr.append(localIndent + CodeTemplate.format('if ({})\n', formattedCondition))
         checkedExpr.append(localIndent + '{\n')
         localIndent = self.incIndent(localIndent)
         for expr in exprs:
@@ -646,15 +571,15 @@ class ParamCheckerOutputGenerator(OutputGenerator):
             # This is an array with a pointer to a count value
             if lenValue.ispointer:
                 # When the length parameter is a pointer, there is an extra Boolean parameter in the function call to indicate if it is required
-                checkExpr.append('skipCall |= validate_struct_type_array(report_data, "{}", {ppp}"{ldn}"{pps}, {ppp}"{dn}"{pps}, "{sv}", {pf}{ln}, {pf}{vn}, {sv}, {}, {}, {});\n'.format(
+                checkExpr.append(CodeTemplate.format('skipCall |= validate_struct_type_array(report_data, "{}", {ppp}"{ldn}"{pps}, {ppp}"{dn}"{pps}, "{sv}", {pf}{ln}, {pf}{vn}, {sv}, {}, {}, {});\n',
                     funcPrintName, lenPtrRequired, lenValueRequired, valueRequired, ln=lenValue.name, ldn=lenPrintName, dn=valuePrintName, vn=value.name, sv=stype.value, pf=prefix, **postProcSpec))
             # This is an array with an integer count value
             else:
-                checkExpr.append('skipCall |= validate_struct_type_array(report_data, "{}", {ppp}"{ldn}"{pps}, {ppp}"{dn}"{pps}, "{sv}", {pf}{ln}, {pf}{vn}, {sv}, {}, {});\n'.format(
+                checkExpr.append(CodeTemplate.format('skipCall |= validate_struct_type_array(report_data, "{}", {ppp}"{ldn}"{pps}, {ppp}"{dn}"{pps}, "{sv}", {pf}{ln}, {pf}{vn}, {sv}, {}, {});\n',
                     funcPrintName, lenValueRequired, valueRequired, ln=lenValue.name, ldn=lenPrintName, dn=valuePrintName, vn=value.name, sv=stype.value, pf=prefix, **postProcSpec))
         # This is an individual struct
         else:
-            checkExpr.append('skipCall |= validate_struct_type(report_data, "{}", {ppp}"{}"{pps}, "{sv}", {}{vn}, {sv}, {});\n'.format(
+            checkExpr.append(CodeTemplate.format('skipCall |= validate_struct_type(report_data, "{}", {ppp}"{}"{pps}, "{sv}", {}{vn}, {sv}, {});\n',
                 funcPrintName, valuePrintName, prefix, valueRequired, vn=value.name, sv=stype.value, **postProcSpec))
         return checkExpr
     #
@@ -667,7 +592,7 @@ class ParamCheckerOutputGenerator(OutputGenerator):
                 raise('Unsupported parameter validation case: Output handle array elements are not NULL checked')
             else:
                 # This is an array with an integer count value
-                checkExpr.append('skipCall |= validate_handle_array(report_data, "{}", {ppp}"{ldn}"{pps}, {ppp}"{dn}"{pps}, {pf}{ln}, {pf}{vn}, {}, {});\n'.format(
+                checkExpr.append(CodeTemplate.format('skipCall |= validate_handle_array(report_data, "{}", {ppp}"{ldn}"{pps}, {ppp}"{dn}"{pps}, {pf}{ln}, {pf}{vn}, {}, {});\n',
                     funcPrintName, lenValueRequired, valueRequired, ln=lenValue.name, ldn=lenPrintName, dn=valuePrintName, vn=value.name, pf=prefix, **postProcSpec))
         else:
             # This is assumed to be an output handle pointer
@@ -682,7 +607,7 @@ class ParamCheckerOutputGenerator(OutputGenerator):
             raise('Unsupported parameter validation case: array of reserved VkFlags')
         else:
             allFlags = 'All' + flagBitsName
-            checkExpr.append('skipCall |= validate_flags_array(report_data, "{}", {ppp}"{}"{pps}, {ppp}"{}"{pps}, "{}", {}, {pf}{}, {pf}{}, {}, {});\n'.format(funcPrintName, lenPrintName, valuePrintName, flagBitsName, allFlags, lenValue.name, value.name, lenValueRequired, valueRequired, pf=prefix, **postProcSpec))
+            checkExpr.append(CodeTemplate.format('skipCall |= validate_flags_array(report_data, "{}", {ppp}"{}"{pps}, {ppp}"{}"{pps}, "{}", {}, {pf}{}, {pf}{}, {}, {});\n', funcPrintName, lenPrintName, valuePrintName, flagBitsName, allFlags, lenValue.name, value.name, lenValueRequired, valueRequired, pf=prefix, **postProcSpec))
         return checkExpr
     #
     # Generate pNext check string
@@ -698,7 +623,7 @@ class ParamCheckerOutputGenerator(OutputGenerator):
             extStructCount = 'ARRAY_SIZE(allowedStructs)'
             extStructVar = 'allowedStructs'
             extStructNames = '"' + ', '.join(structs) + '"'
-        checkExpr.append('skipCall |= validate_struct_pnext(report_data, "{}", {ppp}"{}"{pps}, {}, {}{}, {}, {}, GeneratedHeaderVersion);\n'.format(
+        checkExpr.append(CodeTemplate.format('skipCall |= validate_struct_pnext(report_data, "{}", {ppp}"{}"{pps}, {}, {}{}, {}, {}, GeneratedHeaderVersion);\n',
             funcPrintName, valuePrintName, extStructNames, prefix, value.name, extStructCount, extStructVar, **postProcSpec))
         return checkExpr
     #
@@ -711,7 +636,7 @@ class ParamCheckerOutputGenerator(OutputGenerator):
                 # If count and array parameters are optional, there will be no validation
                 if valueRequired == 'true' or lenPtrRequired == 'true' or lenValueRequired == 'true':
                     # When the length parameter is a pointer, there is an extra Boolean parameter in the function call to indicate if it is required
-                    checkExpr.append('skipCall |= validate_array(report_data, "{}", {ppp}"{ldn}"{pps}, {ppp}"{dn}"{pps}, {pf}{ln}, {pf}{vn}, {}, {}, {});\n'.format(
+                    checkExpr.append(CodeTemplate.format('skipCall |= validate_array(report_data, "{}", {ppp}"{ldn}"{pps}, {ppp}"{dn}"{pps}, {pf}{ln}, {pf}{vn}, {}, {}, {});\n',
                         funcPrintName, lenPtrRequired, lenValueRequired, valueRequired, ln=lenValue.name, ldn=lenPrintName, dn=valuePrintName, vn=value.name, pf=prefix, **postProcSpec))
             # This is an array with an integer count value
             else:
@@ -719,7 +644,7 @@ class ParamCheckerOutputGenerator(OutputGenerator):
                 if valueRequired == 'true' or lenValueRequired == 'true':
                     # Arrays of strings receive special processing
                     validationFuncName = 'validate_array' if value.type != 'char' else 'validate_string_array'
-                    checkExpr.append('skipCall |= {}(report_data, "{}", {ppp}"{ldn}"{pps}, {ppp}"{dn}"{pps}, {pf}{ln}, {pf}{vn}, {}, {});\n'.format(
+                    checkExpr.append(CodeTemplate.format('skipCall |= {}(report_data, "{}", {ppp}"{ldn}"{pps}, {ppp}"{dn}"{pps}, {pf}{ln}, {pf}{vn}, {}, {});\n',
                         validationFuncName, funcPrintName, lenValueRequired, valueRequired, ln=lenValue.name, ldn=lenPrintName, dn=valuePrintName, vn=value.name, pf=prefix, **postProcSpec))
             if checkExpr:
                 if lenValue and ('->' in lenValue.name):
@@ -729,83 +654,73 @@ class ParamCheckerOutputGenerator(OutputGenerator):
         elif not value.isoptional:
             # Function pointers need a reinterpret_cast to void*
             if value.type[:4] == 'PFN_':
-                checkExpr.append('skipCall |= validate_required_pointer(report_data, "{}", {ppp}"{}"{pps}, reinterpret_cast<const void*>({}{}));\n'.format(funcPrintName, valuePrintName, prefix, value.name, **postProcSpec))
+                checkExpr.append(CodeTemplate.format('skipCall |= validate_required_pointer(report_data, "{}", {ppp}"{}"{pps}, reinterpret_cast<const void*>({}{}));\n', funcPrintName, valuePrintName, prefix, value.name, **postProcSpec))
             else:
-                checkExpr.append('skipCall |= validate_required_pointer(report_data, "{}", {ppp}"{}"{pps}, {}{});\n'.format(funcPrintName, valuePrintName, prefix, value.name, **postProcSpec))
+                checkExpr.append(CodeTemplate.format('skipCall |= validate_required_pointer(report_data, "{}", {ppp}"{}"{pps}, {}{});\n', funcPrintName, valuePrintName, prefix, value.name, **postProcSpec))
         return checkExpr
     #
-    # Process struct member validation code, performing name suibstitution if required
-    def processStructMemberCode(self, line, funcName, memberNamePrefix, memberDisplayNamePrefix, postProcSpec):
-        # Build format specifier list
-        kwargs = {}
-        if '{postProcPrefix}' in line:
-            # If we have a tuple that includes a format string and format parameters, need to use ParameterName class
-            if type(memberDisplayNamePrefix) is tuple:
-                kwargs['postProcPrefix'] = 'ParameterName('
-            else:
-                kwargs['postProcPrefix'] = postProcSpec['ppp']
-        if '{postProcSuffix}' in line:
-            # If we have a tuple that includes a format string and format parameters, need to use ParameterName class
-            if type(memberDisplayNamePrefix) is tuple:
-                kwargs['postProcSuffix'] = ', ParameterName::IndexVector{{ {}{} }})'.format(postProcSpec['ppi'], memberDisplayNamePrefix[1])
-            else:
-                kwargs['postProcSuffix'] = postProcSpec['pps']
-        if '{postProcInsert}' in line:
-            # If we have a tuple that includes a format string and format parameters, need to use ParameterName class
-            if type(memberDisplayNamePrefix) is tuple:
-                kwargs['postProcInsert'] = '{}{}, '.format(postProcSpec['ppi'], memberDisplayNamePrefix[1])
-            else:
-                kwargs['postProcInsert'] = postProcSpec['ppi']
-        if '{funcName}' in line:
-            kwargs['funcName'] = funcName
-        if '{valuePrefix}' in line:
-            kwargs['valuePrefix'] = memberNamePrefix
-        if '{displayNamePrefix}' in line:
-            # Check for a tuple that includes a format string and format parameters to be used with the ParameterName class
-            if type(memberDisplayNamePrefix) is tuple:
-                kwargs['displayNamePrefix'] = memberDisplayNamePrefix[0]
-            else:
-                kwargs['displayNamePrefix'] = memberDisplayNamePrefix
-
-        if kwargs:
-            # Need to escape the C++ curly braces
-            if 'IndexVector' in line:
-                line = line.replace('IndexVector{ ', 'IndexVector{{ ')
-                line = line.replace(' }),', ' }}),')
-            return line.format(**kwargs)
+    # Build the values substituted into the fields of struct member validation code, when the code is expanded
+    # for a function or parent struct.  Values are CodeTemplates, keeping their fields, when expanding into a
+    # parent struct's validation code.
+    def makeStructMemberValues(self, funcName, memberNamePrefix, memberDisplayNamePrefix, postProcSpec):
+        values = {}
+        # If we have a tuple that includes a format string and format parameters, need to use ParameterName class
+        if type(memberDisplayNamePrefix) is tuple:
+            values['postProcPrefix'] = 'ParameterName('
+            values['postProcSuffix'] = CodeTemplate.format(', ParameterName::IndexVector{{ {}{} }})', postProcSpec['ppi'], memberDisplayNamePrefix[1])
+            values['postProcInsert'] = CodeTemplate.format('{}{}, ', postProcSpec['ppi'], memberDisplayNamePrefix[1])
+            values['displayNamePrefix'] = memberDisplayNamePrefix[0]
+        else:
+            values['postProcPrefix'] = postProcSpec['ppp']
+            values['postProcSuffix'] = postProcSpec['pps']
+            values['postProcInsert'] = postProcSpec['ppi']
+            values['displayNamePrefix'] = memberDisplayNamePrefix
+        values['funcName'] = funcName
+        values['valuePrefix'] = memberNamePrefix
+        return values
+    #
+    # Process struct member validation code, performing name substitution if required.  The result is a
+    # string when every placeholder was substituted, and a CodeTemplate otherwise.
+    def processStructMemberCode(self, line, values):
+        if type(line) is not CodeTemplate:
+            return line
+        line = line.bind(values)
+        if line.isLiteral():
+            return line.text()
         return line
     #
     # Process struct validation code for inclusion in function or parent struct validation code
     def expandStructCode(self, lines, funcName, memberNamePrefix, memberDisplayNamePrefix, indent, output, postProcSpec):
+        values = self.makeStructMemberValues(funcName, memberNamePrefix, memberDisplayNamePrefix, postProcSpec)
         for line in lines:
             if output:
                 output[-1] += '\n'
             if type(line) is list:
                 for sub in line:
-                    output.append(self.processStructMemberCode(indent + sub, funcName, memberNamePrefix, memberDisplayNamePrefix, postProcSpec))
+                    output.append(self.processStructMemberCode(indent + sub, values))
             else:
-                output.append(self.processStructMemberCode(indent + line, funcName, memberNamePrefix, memberDisplayNamePrefix, postProcSpec))
+                output.append(self.processStructMemberCode(indent + line, values))
         return output
     #
     # Process struct pointer/array validation code, perfoeming name substitution if required
     def expandStructPointerCode(self, prefix, value, lenValue, funcName, valueDisplayName, postProcSpec):
         expr = []
-        expr.append('if ({}{} != NULL)\n'.format(prefix, value.name))
+        expr.append(CodeTemplate.format('if ({}{} != NULL)\n', prefix, value.name))
         expr.append('{')
         indent = self.incIndent(None)
         if lenValue:
             # Need to process all elements in the array
             indexName = lenValue.name.replace('Count', 'Index')
             expr[-1] += '\n'
-            expr.append(indent + 'for (uint32_t {iname} = 0; {iname} < {}{}; ++{iname})\n'.format(prefix, lenValue.name, iname=indexName))
+            expr.append(indent + CodeTemplate.format('for (uint32_t {iname} = 0; {iname} < {}{}; ++{iname})\n', prefix, lenValue.name, iname=indexName))
             expr.append(indent + '{')
             indent = self.incIndent(indent)
             # Prefix for value name to display in error message
-            memberNamePrefix = '{}{}[{}].'.format(prefix, value.name, indexName)
-            memberDisplayNamePrefix = ('{}[%i].'.format(valueDisplayName), indexName)
+            memberNamePrefix = CodeTemplate.format('{}{}[{}].', prefix, value.name, indexName)
+            memberDisplayNamePrefix = (CodeTemplate.format('{}[%i].', valueDisplayName), indexName)
         else:
-            memberNamePrefix = '{}{}->'.format(prefix, value.name)
-            memberDisplayNamePrefix = '{}->'.format(valueDisplayName)
+            memberNamePrefix = CodeTemplate.format('{}{}->', prefix, value.name)
+            memberDisplayNamePrefix = CodeTemplate.format('{}->', valueDisplayName)
         #
         # Expand the struct validation lines
         expr = self.expandStructCode(self.validatedStructs[value.type], funcName, memberNamePrefix, memberDisplayNamePrefix, indent, expr, postProcSpec)
@@ -817,22 +732,52 @@ class ParamCheckerOutputGenerator(OutputGenerator):
         expr.append('}\n')
         return expr
     #
+    # Generate the calls to a struct validation helper for a pointer/array, when genStructHelpers is set
+    def makeStructHelperPointerCall(self, prefix, value, lenValue, funcName, valueDisplayName, postProcSpec, structTypeName):
+        self.structHelperCalls.add(value.type)
+        expr = []
+        expr.append(CodeTemplate.format('if ({}{} != NULL)\n', prefix, value.name))
+        expr.append('{\n')
+        indent = self.incIndent(None)
+        if lenValue:
+            # Need to process all elements in the array
+            indexName = lenValue.name.replace('Count', 'Index')
+            expr.append(indent + CodeTemplate.format('for (uint32_t {iname} = 0; {iname} < {}{}; ++{iname})\n', prefix, lenValue.name, iname=indexName))
+            expr.append(indent + '{\n')
+            indent = self.incIndent(indent)
+            if structTypeName:
+                # Array elements of a struct member are named lazily from the name of the struct, which is only
+                # formatted if an error is reported
+                expr.append(indent + CodeTemplate.format('skipCall |= validate_{}(report_data, "{}", ParameterName(parameter_name, "{}[%i].", {iname}), &{}{}[{iname}]);\n',
+                    value.type, funcName, valueDisplayName, prefix, value.name, iname=indexName))
+            else:
+                expr.append(indent + CodeTemplate.format('skipCall |= validate_{}(report_data, "{}", ParameterName("{}[%i].", ParameterName::IndexVector{{ {iname} }}), &{}{}[{iname}]);\n',
+                    value.type, funcName, valueDisplayName, prefix, value.name, iname=indexName))
+            indent = self.decIndent(indent)
+            expr.append(indent + '}\n')
+        else:
+            expr.append(indent + CodeTemplate.format('skipCall |= validate_{}(report_data, "{}", {ppp}"{}->"{pps}, {}{});\n',
+                value.type, funcName, valueDisplayName, prefix, value.name, **postProcSpec))
+        expr.append('}\n')
+        return expr
+    #
     # Generate the parameter checking code
     def genFuncBody(self, funcName, values, valuePrefix, displayNamePrefix, structTypeName):
         lines = []    # Generated lines of code
         unused = []   # Unused variable names
+        valuesByName = None  # Values keyed by name, for finding array lengths
         for value in values:
             usedLines = []
             lenParam = None
             #
             # Prefix and suffix for post processing of parameter names for struct members.  Arrays of structures need special processing to include the array index in the full parameter name.
             postProcSpec = {}
-            postProcSpec['ppp'] = '' if not structTypeName else '{postProcPrefix}'
-            postProcSpec['pps'] = '' if not structTypeName else '{postProcSuffix}'
-            postProcSpec['ppi'] = '' if not structTypeName else '{postProcInsert}'
+            postProcSpec['ppp'] = '' if not structTypeName else CodeTemplate.field('postProcPrefix')
+            postProcSpec['pps'] = '' if not structTypeName else CodeTemplate.field('postProcSuffix')
+            postProcSpec['ppi'] = '' if not structTypeName else CodeTemplate.field('postProcInsert')
             #
             # Generate the full name of the value, which will be printed in the error message, by adding the variable prefix to the value name
-            valueDisplayName = '{}{}'.format(displayNamePrefix, value.name)
+            valueDisplayName = CodeTemplate.format('{}{}', displayNamePrefix, value.name)
             #
             # Check for NULL pointers, ignore the inout count parameters that
             # will be validated with their associated array
@@ -849,8 +794,10 @@ class ParamCheckerOutputGenerator(OutputGenerator):
                     req = 'false'
                 if value.len:
                     # The parameter is an array with an explicit count parameter
-                    lenParam = self.getLenParam(values, value.len)
-                    lenDisplayName = '{}{}'.format(displayNamePrefix, lenParam.name)
+                    if valuesByName == None:
+                        valuesByName = dict([(v.name, v) for v in values])
+                    lenParam = self.getLenParam(valuesByName, value.lenInfo)
+                    lenDisplayName = CodeTemplate.format('{}{}', displayNamePrefix, lenParam.name)
                     if lenParam.ispointer:
                         # Count parameters that are pointers are inout
                         if type(lenParam.isoptional) is list:
@@ -870,7 +817,7 @@ class ParamCheckerOutputGenerator(OutputGenerator):
                 # members not tagged as 'noatuvalidity' will be validated
                 if value.noautovalidity:
                     # Log a diagnostic message when validation cannot be automatically generated and must be implemented manually
-                    self.logMsg('diag', 'ParameterValidation: No validation for {} {}'.format(structTypeName if structTypeName else funcName, value.name))
+                    self.logMsg('diag', lambda: 'ParameterValidation: No validation for {} {}'.format(structTypeName if structTypeName else funcName, value.name))
                 else:
                     #
                     # If this is a pointer to a struct with an sType field, verify the type
@@ -882,10 +829,10 @@ class ParamCheckerOutputGenerator(OutputGenerator):
                     elif value.type in self.flags and value.isconst:
                         usedLines += self.makeFlagsArrayCheck(valuePrefix, value, lenParam, req, cvReq, funcName, lenDisplayName, valueDisplayName, postProcSpec)
                     elif value.isbool and value.isconst:
-                        usedLines.append('skipCall |= validate_bool32_array(report_data, "{}", {ppp}"{}"{pps}, {ppp}"{}"{pps}, {pf}{}, {pf}{}, {}, {});\n'.format(funcName, lenDisplayName, valueDisplayName, lenParam.name, value.name, cvReq, req, pf=valuePrefix, **postProcSpec))
+                        usedLines.append(CodeTemplate.format('skipCall |= validate_bool32_array(report_data, "{}", {ppp}"{}"{pps}, {ppp}"{}"{pps}, {pf}{}, {pf}{}, {}, {});\n', funcName, lenDisplayName, valueDisplayName, lenParam.name, value.name, cvReq, req, pf=valuePrefix, **postProcSpec))
                     elif value.israngedenum and value.isconst:
                         enumRange = self.enumRanges[value.type]
-                        usedLines.append('skipCall |= validate_ranged_enum_array(report_data, "{}", {ppp}"{}"{pps}, {ppp}"{}"{pps}, "{}", {}, {}, {pf}{}, {pf}{}, {}, {});\n'.format(funcName, lenDisplayName, valueDisplayName, value.type, enumRange[0], enumRange[1], lenParam.name, value.name, cvReq, req, pf=valuePrefix, **postProcSpec))
+                        usedLines.append(CodeTemplate.format('skipCall |= validate_ranged_enum_array(report_data, "{}", {ppp}"{}"{pps}, {ppp}"{}"{pps}, "{}", {}, {}, {pf}{}, {pf}{}, {}, {});\n', funcName, lenDisplayName, valueDisplayName, value.type, enumRange[0], enumRange[1], lenParam.name, value.name, cvReq, req, pf=valuePrefix, **postProcSpec))
                     elif value.name == 'pNext':
                         # We need to ignore VkDeviceCreateInfo and VkInstanceCreateInfo, as the loader manipulates them in a way that is not documented in vk.xml
                         if not structTypeName in ['VkDeviceCreateInfo', 'VkInstanceCreateInfo']:
@@ -895,7 +842,10 @@ class ParamCheckerOutputGenerator(OutputGenerator):
                     #
                     # If this is a pointer to a struct (input), see if it contains members that need to be checked
                     if value.type in self.validatedStructs and value.isconst:
-                        usedLines.append(self.expandStructPointerCode(valuePrefix, value, lenParam, funcName, valueDisplayName, postProcSpec))
+                        if self.genOpts.genStructHelpers:
+                            usedLines.append(self.makeStructHelperPointerCall(valuePrefix, value, lenParam, funcName, valueDisplayName, postProcSpec, structTypeName))
+                        else:
+                            usedLines.append(self.expandStructPointerCode(valuePrefix, value, lenParam, funcName, valueDisplayName, postProcSpec))
             # Non-pointer types
             else:
                 #
@@ -904,33 +854,37 @@ class ParamCheckerOutputGenerator(OutputGenerator):
                 # members not tagged as 'noatuvalidity' will be validated
                 if value.noautovalidity:
                     # Log a diagnostic message when validation cannot be automatically generated and must be implemented manually
-                    self.logMsg('diag', 'ParameterValidation: No validation for {} {}'.format(structTypeName if structTypeName else funcName, value.name))
+                    self.logMsg('diag', lambda: 'ParameterValidation: No validation for {} {}'.format(structTypeName if structTypeName else funcName, value.name))
                 else:
                     if value.type in self.structTypes:
                         stype = self.structTypes[value.type]
-                        usedLines.append('skipCall |= validate_struct_type(report_data, "{}", {ppp}"{}"{pps}, "{sv}", &({}{vn}), {sv}, false);\n'.format(
+                        usedLines.append(CodeTemplate.format('skipCall |= validate_struct_type(report_data, "{}", {ppp}"{}"{pps}, "{sv}", &({}{vn}), {sv}, false);\n',
                             funcName, valueDisplayName, valuePrefix, vn=value.name, sv=stype.value, **postProcSpec))
                     elif value.type in self.handleTypes:
                         if not self.isHandleOptional(value, None):
-                            usedLines.append('skipCall |= validate_required_handle(report_data, "{}", {ppp}"{}"{pps}, {}{});\n'.format(funcName, valueDisplayName, valuePrefix, value.name, **postProcSpec))
+                            usedLines.append(CodeTemplate.format('skipCall |= validate_required_handle(report_data, "{}", {ppp}"{}"{pps}, {}{});\n', funcName, valueDisplayName, valuePrefix, value.name, **postProcSpec))
                     elif value.type in self.flags:
                         flagBitsName = value.type.replace('Flags', 'FlagBits')
                         if not flagBitsName in self.flagBits:
-                            usedLines.append('skipCall |= validate_reserved_flags(report_data, "{}", {ppp}"{}"{pps}, {pf}{});\n'.format(funcName, valueDisplayName, value.name, pf=valuePrefix, **postProcSpec))
+                            usedLines.append(CodeTemplate.format('skipCall |= validate_reserved_flags(report_data, "{}", {ppp}"{}"{pps}, {pf}{});\n', funcName, valueDisplayName, value.name, pf=valuePrefix, **postProcSpec))
                         else:
                             flagsRequired = 'false' if value.isoptional else 'true'
                             allFlagsName = 'All' + flagBitsName
-                            usedLines.append('skipCall |= validate_flags(report_data, "{}", {ppp}"{}"{pps}, "{}", {}, {pf}{}, {});\n'.format(funcName, valueDisplayName, flagBitsName, allFlagsName, value.name, flagsRequired, pf=valuePrefix, **postProcSpec))
+                            usedLines.append(CodeTemplate.format('skipCall |= validate_flags(report_data, "{}", {ppp}"{}"{pps}, "{}", {}, {pf}{}, {});\n', funcName, valueDisplayName, flagBitsName, allFlagsName, value.name, flagsRequired, pf=valuePrefix, **postProcSpec))
                     elif value.isbool:
-                        usedLines.append('skipCall |= validate_bool32(report_data, "{}", {ppp}"{}"{pps}, {}{});\n'.format(funcName, valueDisplayName, valuePrefix, value.name, **postProcSpec))
+                        usedLines.append(CodeTemplate.format('skipCall |= validate_bool32(report_data, "{}", {ppp}"{}"{pps}, {}{});\n', funcName, valueDisplayName, valuePrefix, value.name, **postProcSpec))
                     elif value.israngedenum:
                         enumRange = self.enumRanges[value.type]
-                        usedLines.append('skipCall |= validate_ranged_enum(report_data, "{}", {ppp}"{}"{pps}, "{}", {}, {}, {}{});\n'.format(funcName, valueDisplayName, value.type, enumRange[0], enumRange[1], valuePrefix, value.name, **postProcSpec))
+                        usedLines.append(CodeTemplate.format('skipCall |= validate_ranged_enum(report_data, "{}", {ppp}"{}"{pps}, "{}", {}, {}, {}{});\n', funcName, valueDisplayName, value.type, enumRange[0], enumRange[1], valuePrefix, value.name, **postProcSpec))
                     #
                     # If this is a struct, see if it contains members that need to be checked
-                    if value.type in self.validatedStructs:
-                        memberNamePrefix = '{}{}.'.format(valuePrefix, value.name)
-                        memberDisplayNamePrefix = '{}.'.format(valueDisplayName)
+                    if value.type in self.validatedStructs and self.genOpts.genStructHelpers:
+                        self.structHelperCalls.add(value.type)
+                        usedLines.append(CodeTemplate.format('skipCall |= validate_{}(report_data, "{}", {ppp}"{}."{pps}, &({}{}));\n',
+                            value.type, funcName, valueDisplayName, valuePrefix, value.name, **postProcSpec))
+                    elif value.type in self.validatedStructs:
+                        memberNamePrefix = CodeTemplate.format('{}{}.', valuePrefix, value.name)
+                        memberDisplayNamePrefix = CodeTemplate.format('{}.', valueDisplayName)
                         usedLines.append(self.expandStructCode(self.validatedStructs[value.type], funcName, memberNamePrefix, memberDisplayNamePrefix, '', [], postProcSpec))
             #
             # Append the parameter check to the function body for the current command
@@ -949,39 +903,95 @@ class ParamCheckerOutputGenerator(OutputGenerator):
     def processStructMemberData(self):
         indent = self.incIndent(None)
         for struct in self.structMembers:
+            self.structHelperCalls = set()
             #
             # The string returned by genFuncBody will be nested in an if check for a NULL pointer, so needs its indent incremented
-            lines, unused = self.genFuncBody('{funcName}', struct.members, '{valuePrefix}', '{displayNamePrefix}', struct.name)
+            lines, unused = self.genFuncBody(CodeTemplate.field('funcName'), struct.members, CodeTemplate.field('valuePrefix'),
+                                             CodeTemplate.field('displayNamePrefix'), struct.name)
             if lines:
                 self.validatedStructs[struct.name] = lines
+                if self.genOpts.genStructHelpers:
+                    code = self.makeStructHelper(struct.name, self.validatedStructs[struct.name])
+                    self.structHelpers.append(self.StructHelperData(name=struct.name, code=code, calls=self.structHelperCalls))
+        self.structHelperCalls = set()
+    #
+    # Write the struct validation helpers called, directly or through other helpers, by the command parameter
+    # checking code.  Structs are processed in dependency order, so each helper is defined before it is called.
+    def processStructHelperData(self):
+        called = self.structHelperCalls
+        for helper in reversed(self.structHelpers):
+            if helper.name in called:
+                called |= helper.calls
+        for helper in self.structHelpers:
+            if helper.name in called:
+                self.appendSection('struct', helper.code)
+    #
+    # Generate the validate_<struct>() helper function called in place of the struct's expanded member checks, when
+    # genStructHelpers is set.  The helper receives the name of the struct, including the trailing '.' or '->', as
+    # a ParameterName holding its format string and index values.  Member names are ParameterNames referring to it,
+    # which are only formatted and concatenated if an error is reported.
+    def makeStructHelper(self, structName, lines):
+        # The function name placeholder is quoted in the member checks, to produce a string literal, but is replaced
+        # by the api_name parameter here
+        values = { 'funcName' : 'api_name', 'valuePrefix' : 'value->', 'displayNamePrefix' : '',
+                   'postProcPrefix' : 'ParameterName(parameter_name, ', 'postProcSuffix' : ')', 'postProcInsert' : '' }
+        def render(line):
+            if type(line) is not CodeTemplate:
+                return line
+            parts = list(line.parts)
+            for i in range(1, len(parts), 2):
+                if parts[i] == 'funcName' and parts[i - 1].endswith('"') and parts[i + 1].startswith('"'):
+                    parts[i - 1] = parts[i - 1][:-1]
+                    parts[i + 1] = parts[i + 1][1:]
+            return CodeTemplate(parts).bind(values).text()
+        helper = CodeBlock(indentSpaces=self.INDENT_SPACES)
+        helper.append('static bool validate_{}(debug_report_data *report_data, const char *api_name, const ParameterName &parameter_name,\n'.format(structName))
+        helper.append('{}const {} *value)\n'.format(' ' * len('static bool validate_{}('.format(structName)), structName))
+        helper.append('{\n')
+        helper.incIndent()
+        helper.append('bool skipCall = false;\n')
+        for line in lines:
+            helper.blank()
+            if type(line) is list:
+                helper.append([render(sub) for sub in line])
+            else:
+                helper.append(render(line))
+        helper.blank()
+        helper.append('return skipCall;\n')
+        helper.decIndent()
+        helper.append('}\n')
+        return helper.text()
     #
     # Generate the command param check code from the captured data
     def processCmdData(self):
-        indent = self.incIndent(None)
         for command in self.commands:
-            # Skip first parameter if it is a dispatch handle (everything except vkCreateInstance)
-            startIndex = 0 if command.name == 'vkCreateInstance' else 1
-            lines, unused = self.genFuncBody(command.name, command.params[startIndex:], '', '', None)
-            if lines:
-                cmdDef = self.getCmdDef(command) + '\n'
-                cmdDef += '{\n'
-                # Process unused parameters, Ignoring the first dispatch handle parameter, which is not
-                # processed by parameter_validation (except for vkCreateInstance, which does not have a
-                # handle as its first parameter)
-                if unused:
-                    for name in unused:
-                        cmdDef += indent + 'UNUSED_PARAMETER({});\n'.format(name)
-                    if len(unused) > 0:
-                        cmdDef += '\n'
-                cmdDef += indent + 'bool skipCall = false;\n'
-                for line in lines:
-                    cmdDef += '\n'
-                    if type(line) is list:
-                        for sub in line:
-                            cmdDef += indent + sub
-                    else:
-                        cmdDef += indent + line
-                cmdDef += '\n'
-                cmdDef += indent + 'return skipCall;\n'
-                cmdDef += '}\n'
+            cmdDef = self.renderCmd(command)
+            if cmdDef:
                 self.appendSection('command', cmdDef)
+    #
+    # Generate the param check code for a command, returning None if it has no parameters to check
+    def renderCmd(self, command):
+        # Skip first parameter if it is a dispatch handle (everything except vkCreateInstance)
+        startIndex = 0 if command.name == 'vkCreateInstance' else 1
+        lines, unused = self.genFuncBody(command.name, command.params[startIndex:], '', '', None)
+        if not lines:
+            return None
+        cmdDef = CodeBlock(indentSpaces=self.INDENT_SPACES)
+        cmdDef.append(self.getCmdDef(command) + '\n', '{\n')
+        cmdDef.incIndent()
+        # Process unused parameters, Ignoring the first dispatch handle parameter, which is not
+        # processed by parameter_validation (except for vkCreateInstance, which does not have a
+        # handle as its first parameter)
+        if unused:
+            for name in unused:
+                cmdDef.append('UNUSED_PARAMETER({});\n'.format(name))
+            cmdDef.blank()
+        cmdDef.append('bool skipCall = false;\n')
+        for line in lines:
+            cmdDef.blank()
+            cmdDef.append(line)
+        cmdDef.blank()
+        cmdDef.append('return skipCall;\n')
+        cmdDef.decIndent()
+        cmdDef.append('}\n')
+        return cmdDef.text()
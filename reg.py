@@ -67,34 +67,174 @@ def matchAPIProfile(api, profile, elem):
 
 # BaseInfo - base class for information about a registry feature
 # (type/group/enum/command/API/extension).
-#   required - should this feature be defined during header generation
-#     (has it been removed by a profile or version)?
-#   declared - has this feature been defined already?
 #   elem - etree Element for this feature
-#   resetState() - reset required/declared to initial values. Used
-#     prior to generating a new API interface.
+# Whether a feature is required or has already been declared depends on
+# what is being generated, and is tracked by GenerationState instead.
 class BaseInfo:
     """Represents the state of a registry feature, used during API generation"""
     def __init__(self, elem):
-        self.required = False
-        self.declared = False
         self.elem = elem
-    def resetState(self):
-        self.required = False
-        self.declared = False
 
-# TypeInfo - registry information about a type. No additional state
-#   beyond BaseInfo is required.
+# LenInfo - parsed form of the 'len' attribute of a <param> or <member>.
+# Attributes are compiled once by compileLen() and the result shared by
+# every parameter with the same attribute.
+#   text - the attribute, as written
+#   nullTerminated - True if the array, or each string in an array of
+#     strings, is null-terminated
+#   expr - the expression giving the length of the array, with any
+#     'null-terminated' dropped and '::' replaced by '->', or None for a
+#     single null-terminated string
+#   paramName - name of the parameter or member the length is derived
+#     from, or None
+#   dereference - True if the length is a member of the struct pointed
+#     to by paramName (expr is 'paramName->member')
+#   latexmath - True if expr is a latexmath equation
+#   divisor - the length is paramName divided by this integer, for
+#     latexmath equations, or None
+#   rounding - 'ceil' or 'floor' if the division is rounded explicitly,
+#     otherwise None
+#   cExpr - C expression computing the length, or None
+class LenInfo:
+    """Represents a parsed 'len' attribute"""
+    def __init__(self, text):
+        self.text = text
+        self.nullTerminated = 'null-terminated' in text
+        self.expr = None
+        self.paramName = None
+        self.dereference = False
+        self.latexmath = False
+        self.divisor = None
+        self.rounding = None
+        self.cExpr = None
+        if (text == 'null-terminated'):
+            return
+        # For string arrays, 'len' can look like 'count,null-terminated',
+        # indicating a null-terminated array of strings; only the string
+        # count is kept.
+        self.expr = text.split(',')[0] if self.nullTerminated else text
+        self.expr = self.expr.replace('::', '->')
+        self.cExpr = self.expr
+        if ('latexmath' in self.expr):
+            self.latexmath = True
+            self.cExpr = None
+            # Expressions similar to 'latexmath:[$\lceil{\mathit{rasterizationSamples} \over 32}\rceil$]'
+            match = latexmathRoundedRatio.match(self.expr)
+            if (match and match.group(1) == match.group(4)):
+                self.paramName = match.group(2)
+                self.divisor = int(match.group(3))
+                self.rounding = match.group(1)
+                if (self.rounding == 'ceil'):
+                    self.cExpr = '({} + {}) / {}'.format(self.paramName, self.divisor - 1, self.divisor)
+                else:
+                    self.cExpr = '{} / {}'.format(self.paramName, self.divisor)
+            # Expressions similar to 'latexmath : [$dataSize \over 4$]'
+            match = latexmathRatio.match(self.expr)
+            if (match):
+                self.paramName = match.group(1)
+                self.divisor = int(match.group(2))
+                self.cExpr = '{} / {}'.format(self.paramName, self.divisor)
+        else:
+            self.paramName = self.expr.split('->')[0]
+            self.dereference = '->' in self.expr
+
+# Patterns for the latexmath equations found in 'len' attributes
+latexmathRoundedRatio = re.compile(r'latexmath\s*\:\s*\[\s*\$\\l(\w+)\s*\{\s*\\mathit\s*\{\s*(\w+)\s*\}\s*\\over\s*(\d+)\s*\}\s*\\r(\w+)\$\s*\]')
+latexmathRatio = re.compile(r'latexmath\s*\:\s*\[\s*\$\s*(\w+)\s*\\over\s*(\d+)\s*\$\s*\]')
+
+# lenInfoCache - dictionary of LenInfo objects, keyed by attribute text.
+# Parsing depends only on the text, so the cache is shared by registries.
+lenInfoCache = {}
+
+# compileLen - return the LenInfo for a 'len' attribute, or None
+#   text - the attribute, or None if not present
+def compileLen(text):
+    if (text == None):
+        return None
+    info = lenInfoCache.get(text)
+    if (info == None):
+        info = LenInfo(text)
+        lenInfoCache[text] = info
+    return info
+
+# ParamInfo - registry information about a command <param> or a struct /
+# union <member>, derived once from its Element so that every generator
+# interprets it the same way without walking the XML again.
+#   elem - the <param> / <member> Element
+#   type - type name, from the nested <type> tag ('' if none)
+#   name - parameter / member name, from the nested <name> tag
+#   pointerDepth - number of '*' indirections following the type
+#   staticArrayDepth - number of '[]' dimensions following the name
+#   isconst - True if the declaration contains 'const'
+#   lenAttr - the 'len' attribute, as written, or None
+#   lenInfo - the LenInfo for the 'len' attribute, or None
+#   len - the expression giving the length of an array (lenInfo.expr),
+#     or None
+#   optional - the 'optional' attribute: True, False, or for
+#     comma-separated attributes ('false,true') a list of booleans
+#   externsync - the 'externsync' attribute, or None
+#   noautovalidity - True if the 'noautovalidity' attribute is present
+#   validextensionstructs - the 'validextensionstructs' attribute, or None
+#   cdecl - indented C declaration, as for OutputGenerator.makeCParamDecl()
+#     with no alignment
+class ParamInfo:
+    """Represents a command parameter or struct member"""
+    def __init__(self, elem):
+        self.elem = elem
+        self.type = ''
+        self.name = ''
+        for child in elem:
+            if (child.tag == 'type'):
+                self.type = noneStr(child.text)
+            elif (child.tag == 'name'):
+                self.name = noneStr(child.text)
+        self.pointerDepth = 0
+        typeElem = elem.find('type')
+        if (typeElem is not None):
+            self.pointerDepth = noneStr(typeElem.tail).count('*')
+        self.staticArrayDepth = 0
+        nameElem = elem.find('name')
+        if (nameElem is not None):
+            self.staticArrayDepth = noneStr(nameElem.tail).count('[')
+        self.cdecl = '    ' + noneStr(elem.text)
+        for child in elem:
+            self.cdecl += noneStr(child.text) + noneStr(child.tail)
+        self.isconst = 'const' in self.cdecl
+        self.lenAttr = elem.get('len')
+        self.lenInfo = compileLen(self.lenAttr)
+        self.len = self.lenInfo.expr if self.lenInfo else None
+        self.optional = False
+        optString = elem.get('optional')
+        if (optString == 'true'):
+            self.optional = True
+        elif (optString and ',' in optString):
+            self.optional = [opt.strip() == 'true' for opt in optString.split(',')
+                             if opt.strip() in ('true', 'false')]
+        self.externsync = elem.get('externsync')
+        self.noautovalidity = elem.get('noautovalidity') is not None
+        self.validextensionstructs = elem.get('validextensionstructs')
+
+# TypeInfo - registry information about a type
+#   members - list of ParamInfo objects for the <member> tags of a struct
+#     or union type; empty for other types
+#   dependencies - list of (name, 'type' | 'enum') tuples for the features
+#     this type depends on: the type in its 'requires' attribute, followed
+#     by the <type> and <enum> tags nested anywhere within it (e.g. member
+#     types and array sizes), in document order.
 class TypeInfo(BaseInfo):
     """Represents the state of a registry type"""
     def __init__(self, elem):
         BaseInfo.__init__(self, elem)
-        self.additionalValidity = []
-        self.removedValidity = []
-    def resetState(self):
-        BaseInfo.resetState(self)
-        self.additionalValidity = []
-        self.removedValidity = []
+        if (elem.get('category') in ('struct', 'union')):
+            self.members = [ParamInfo(member) for member in elem.findall('.//member')]
+        else:
+            self.members = []
+        self.dependencies = []
+        if ('requires' in elem.attrib):
+            self.dependencies.append((elem.get('requires'), 'type'))
+        for subtype in elem.findall('.//type'):
+            self.dependencies.append((subtype.text, 'type'))
+        for subenum in elem.findall('.//enum'):
+            self.dependencies.append((subenum.text, 'enum'))
 
 # GroupInfo - registry information about a group of related enums
 # in an <enums> block, generally corresponding to a C "enum" type.
@@ -106,25 +246,27 @@ class GroupInfo(BaseInfo):
 # EnumInfo - registry information about an enum
 #   type - numeric type of the value of the <enum> tag
 #     ( '' for GLint, 'u' for GLuint, 'ull' for GLuint64 )
+#   dependencies - always empty; enums have no dependencies
 class EnumInfo(BaseInfo):
     """Represents the state of a registry enum"""
     def __init__(self, elem):
         BaseInfo.__init__(self, elem)
+        self.dependencies = []
         self.type = elem.get('type')
         if (self.type == None):
             self.type = ''
 
 # CmdInfo - registry information about a command
+#   params - list of ParamInfo objects for the <param> tags
+#   dependencies - list of (name, 'type') tuples for the <type> tags
+#     nested anywhere within the command (return and parameter types),
+#     in document order.
 class CmdInfo(BaseInfo):
     """Represents the state of a registry command"""
     def __init__(self, elem):
         BaseInfo.__init__(self, elem)
-        self.additionalValidity = []
-        self.removedValidity = []
-    def resetState(self):
-        BaseInfo.resetState(self)
-        self.additionalValidity = []
-        self.removedValidity = []
+        self.params = [ParamInfo(param) for param in elem.findall('param')]
+        self.dependencies = [(type.text, 'type') for type in elem.findall('.//type')]
 
 # FeatureInfo - registry information about an API <feature>
 # or <extension>
@@ -137,7 +279,6 @@ class CmdInfo(BaseInfo):
 #     assigning enumerant offsets. <feature> features do
 #     not have extension numbers and are assigned number 0.
 #   category - category, e.g. VERSION or khr/vendor tag
-#   emit - has this feature been defined already?
 class FeatureInfo(BaseInfo):
     """Represents the state of an API feature (version/extension)"""
     def __init__(self, elem):
@@ -155,9 +296,48 @@ class FeatureInfo(BaseInfo):
             self.version = "0"
             self.number = elem.get('number')
             self.supported = elem.get('supported')
-        self.emit = False
 
-from generator import write, GeneratorOptions, OutputGenerator
+# GenerationState - state of a single Registry.apiGen() call. Features
+# are tagged here rather than in their *Info objects, so generation never
+# modifies the Registry and several apiGen() calls can share one Registry
+# at the same time.
+#   gen - OutputGenerator object used to write headers / messages
+#   genOpts - GeneratorOptions object used to control which
+#     features to write and how to format them
+#   required - set of *Info objects which should be defined (required
+#     by a version / extension, and not removed by a later one)
+#   declared - set of *Info objects which have been defined already
+#   emit - set of FeatureInfo objects whose interfaces are actually
+#     written, rather than only tagged as declared
+#   emitFeatures - True to actually emit features for the version /
+#     extension being generated, or False to just treat them as emitted
+#   additionalValidity, removedValidity - dictionaries of lists of <usage>
+#     Elements, keyed by TypeInfo / CmdInfo object
+#   diag - True if gen writes diagnostics. Checked before logging
+#     diagnostics in the per-feature loops, so they cost nothing otherwise.
+class GenerationState:
+    """Represents the state of one API generation from a Registry"""
+    def __init__(self, gen, genOpts):
+        self.gen = gen
+        self.genOpts = genOpts
+        self.required = set()
+        self.declared = set()
+        self.emit = set()
+        self.emitFeatures = False
+        self.additionalValidity = {}
+        self.removedValidity = {}
+        self.diag = gen.logEnabled('diag')
+    #
+    # setRequired - tag a feature as required or not
+    #   info - *Info object for the feature
+    #   required - boolean
+    def setRequired(self, info, required):
+        if (required):
+            self.required.add(info)
+        else:
+            self.required.discard(info)
+
+from generator import noneStr, write, GeneratorOptions, OutputGenerator
 
 # Registry - object representing an API registry, loaded from an XML file
 # Members
@@ -169,11 +349,11 @@ from generator import write, GeneratorOptions, OutputGenerator
 #   apidict - dictionary of <api> Elements keyed by API name
 #   extensions - list of <extension> Elements
 #   extdict - dictionary of <extension> Elements keyed by extension name
-#   gen - OutputGenerator object used to write headers / messages
-#   genOpts - GeneratorOptions object used to control which
-#     fetures to write and how to format them
-#   emitFeatures - True to actually emit features for a version / extension,
-#     or False to just treat them as emitted
+#   gen - default OutputGenerator object used to write headers / messages
+#   declCache - dictionary of C parameter lists of commands, built by
+#     OutputGenerator.makeCParamDecls() and keyed by the <command> Element
+#     and parameter alignment, so each list is built once per registry
+#     load however many generators and targets ask for it
 # Public methods
 #   loadElementTree(etree) - load registry from specified ElementTree
 #   loadFile(filename) - load registry from XML file
@@ -183,10 +363,12 @@ from generator import write, GeneratorOptions, OutputGenerator
 #     to specified file handle (default stdout). Truncates type /
 #     enum / command elements to maxlen characters (default 80)
 #   generator(g) - specify the output generator object
-#   apiGen(apiname, genOpts) - generate API headers for the API type
+#   apiGen(genOpts, gen, timer) - generate API headers for the API type
 #     and profile specified in genOpts, but only for the versions and
 #     extensions specified there.
-#   apiReset() - call between calls to apiGen() to reset internal state
+# The Registry is not modified once parsed, so it may be shared by
+# concurrent apiGen() calls using separate generators. (declCache is
+# added to, but entries are never changed.)
 # Private methods
 #   addElementInfo(elem,info,infoName,dictionary) - add feature info to dict
 #   lookupElementInfo(fname,dictionary) - lookup feature info in dict
@@ -201,11 +383,10 @@ class Registry:
         self.apidict      = {}
         self.extensions   = []
         self.extdict      = {}
+        self.declCache    = {}
         # A default output generator, so commands prior to apiGen can report
         # errors via the generator object.
         self.gen          = OutputGenerator()
-        self.genOpts      = None
-        self.emitFeatures = False
     def loadElementTree(self, tree):
         """Load ElementTree into a Registry object and parse it"""
         self.tree = tree
@@ -243,8 +424,9 @@ class Registry:
     # If an object qualified by API name exists, use that.
     #   fname - name of type / enum / command
     #   dictionary - self.{type|enum|cmd}dict
-    def lookupElementInfo(self, fname, dictionary):
-        key = (fname, self.genOpts.apiname)
+    #   apiname - name of the API being generated
+    def lookupElementInfo(self, fname, dictionary, apiname):
+        key = (fname, apiname)
         if (key in dictionary):
             # self.gen.logMsg('diag', 'Found API-specific element for feature', fname)
             return dictionary[key]
@@ -257,6 +439,7 @@ class Registry:
         """Parse the registry Element, once created"""
         # This must be the Element for the root <registry>
         self.reg = self.tree.getroot()
+        self.declCache = {}
         #
         # Create dictionary of registry types from toplevel <types> tags
         # and add 'name' attribute to each <type> tag (where missing)
@@ -287,15 +470,10 @@ class Registry:
         #   defined in those tags, but the actual names all share the
         #   same dictionary.
         # Required <enum> attributes: 'name', 'value'
-        # For containing <enums> which have type="enum" or type="bitmask",
-        # tag all contained <enum>s are required. This is a stopgap until
-        # a better scheme for tagging core and extension enums is created.
         self.enumdict = {}
         for enums in self.reg.findall('enums'):
-            required = (enums.get('type') != None)
             for enum in enums.findall('enum'):
                 enumInfo = EnumInfo(enum)
-                enumInfo.required = required
                 self.addElementInfo(enum, enumInfo, 'enum', self.enumdict)
         #
         # Create dictionary of registry commands from <command> tags
@@ -423,104 +601,109 @@ class Registry:
     #
     # typename - name of type
     # required - boolean (to tag features as required or not)
-    def markTypeRequired(self, typename, required):
+    # state - GenerationState being tagged
+    def markTypeRequired(self, typename, required, state):
         """Require (along with its dependencies) or remove (but not its dependencies) a type"""
-        self.gen.logMsg('diag', '*** tagging type:', typename, '-> required =', required)
+        if (state.diag):
+            state.gen.logMsg('diag', '*** tagging type:', typename, '-> required =', required)
         # Get TypeInfo object for <type> tag corresponding to typename
-        type = self.lookupElementInfo(typename, self.typedict)
+        type = self.lookupElementInfo(typename, self.typedict, state.genOpts.apiname)
         if (type != None):
             if (required):
-                # Tag type dependencies in 'required' attributes as
-                # required. This DOES NOT un-tag dependencies in a <remove>
-                # tag. See comments in markRequired() below for the reason.
-                if ('requires' in type.elem.attrib):
-                    depType = type.elem.get('requires')
-                    self.gen.logMsg('diag', '*** Generating dependent type',
-                        depType, 'for type', typename)
-                    self.markTypeRequired(depType, required)
-                # Tag types used in defining this type (e.g. in nested
-                # <type> tags)
-                # Look for <type> in entire <command> tree,
-                # not just immediate children
-                for subtype in type.elem.findall('.//type'):
-                    self.gen.logMsg('diag', '*** markRequired: type requires dependent <type>', subtype.text)
-                    self.markTypeRequired(subtype.text, required)
-                # Tag enums used in defining this type, for example in
+                # Tag type dependencies in the 'requires' attribute, types
+                # used in defining this type (e.g. in nested <type> tags),
+                # and enums used in defining it, for example in
                 #   <member><name>member</name>[<enum>MEMBER_SIZE</enum>]</member>
-                for subenum in type.elem.findall('.//enum'):
-                    self.gen.logMsg('diag', '*** markRequired: type requires dependent <enum>', subenum.text)
-                    self.markEnumRequired(subenum.text, required)
-            type.required = required
+                # as required. This DOES NOT un-tag dependencies in a
+                # <remove> tag. See comments in markRequired() below for
+                # the reason.
+                for (index, (depname, deptype)) in enumerate(type.dependencies):
+                    if (state.diag):
+                        if (self.isRequiresDependency(type, index)):
+                            state.gen.logMsg('diag', '*** Generating dependent type',
+                                depname, 'for type', typename)
+                        else:
+                            state.gen.logMsg('diag', '*** markRequired: type requires dependent <' + deptype + '>', depname)
+                    if (deptype == 'type'):
+                        self.markTypeRequired(depname, required, state)
+                    else:
+                        self.markEnumRequired(depname, required, state)
+            state.setRequired(type, required)
         else:
-            self.gen.logMsg('warn', '*** type:', typename , 'IS NOT DEFINED')
+            state.gen.logMsg('warn', '*** type:', typename , 'IS NOT DEFINED')
     #
     # enumname - name of enum
     # required - boolean (to tag features as required or not)
-    def markEnumRequired(self, enumname, required):
-        self.gen.logMsg('diag', '*** tagging enum:', enumname, '-> required =', required)
-        enum = self.lookupElementInfo(enumname, self.enumdict)
+    # state - GenerationState being tagged
+    def markEnumRequired(self, enumname, required, state):
+        if (state.diag):
+            state.gen.logMsg('diag', '*** tagging enum:', enumname, '-> required =', required)
+        enum = self.lookupElementInfo(enumname, self.enumdict, state.genOpts.apiname)
         if (enum != None):
-            enum.required = required
+            state.setRequired(enum, required)
         else:
-            self.gen.logMsg('warn', '*** enum:', enumname , 'IS NOT DEFINED')
+            state.gen.logMsg('warn', '*** enum:', enumname , 'IS NOT DEFINED')
     #
     # features - Element for <require> or <remove> tag
     # required - boolean (to tag features as required or not)
-    def markRequired(self, features, required):
+    # state - GenerationState being tagged
+    def markRequired(self, features, required, state):
         """Require or remove features specified in the Element"""
-        self.gen.logMsg('diag', '*** markRequired (features = <too long to print>, required =', required, ')')
+        if (state.diag):
+            state.gen.logMsg('diag', '*** markRequired (features = <too long to print>, required =', required, ')')
         # Loop over types, enums, and commands in the tag
         # @@ It would be possible to respect 'api' and 'profile' attributes
         #  in individual features, but that's not done yet.
         for typeElem in features.findall('type'):
-            self.markTypeRequired(typeElem.get('name'), required)
+            self.markTypeRequired(typeElem.get('name'), required, state)
         for enumElem in features.findall('enum'):
-            self.markEnumRequired(enumElem.get('name'), required)
+            self.markEnumRequired(enumElem.get('name'), required, state)
         for cmdElem in features.findall('command'):
             name = cmdElem.get('name')
-            self.gen.logMsg('diag', '*** tagging command:', name, '-> required =', required)
-            cmd = self.lookupElementInfo(name, self.cmddict)
+            if (state.diag):
+                state.gen.logMsg('diag', '*** tagging command:', name, '-> required =', required)
+            cmd = self.lookupElementInfo(name, self.cmddict, state.genOpts.apiname)
             if (cmd != None):
-                cmd.required = required
+                state.setRequired(cmd, required)
                 # Tag all parameter types of this command as required.
                 # This DOES NOT remove types of commands in a <remove>
                 # tag, because many other commands may use the same type.
                 # We could be more clever and reference count types,
                 # instead of using a boolean.
                 if (required):
-                    # Look for <type> in entire <command> tree,
-                    # not just immediate children
-                    for type in cmd.elem.findall('.//type'):
-                        self.gen.logMsg('diag', '*** markRequired: command implicitly requires dependent type', type.text)
-                        self.markTypeRequired(type.text, required)
+                    for (depname, deptype) in cmd.dependencies:
+                        if (state.diag):
+                            state.gen.logMsg('diag', '*** markRequired: command implicitly requires dependent type', depname)
+                        self.markTypeRequired(depname, required, state)
             else:
-                self.gen.logMsg('warn', '*** command:', name, 'IS NOT DEFINED')
+                state.gen.logMsg('warn', '*** command:', name, 'IS NOT DEFINED')
     #
     # interface - Element for <version> or <extension>, containing
     #   <require> and <remove> tags
     # api - string specifying API name being generated
     # profile - string specifying API profile being generated
-    def requireAndRemoveFeatures(self, interface, api, profile):
+    # state - GenerationState being tagged
+    def requireAndRemoveFeatures(self, interface, api, profile, state):
         """Process <recquire> and <remove> tags for a <version> or <extension>"""
         # <require> marks things that are required by this version/profile
         for feature in interface.findall('require'):
             if (matchAPIProfile(api, profile, feature)):
-                self.markRequired(feature,True)
+                self.markRequired(feature,True,state)
         # <remove> marks things that are removed by this version/profile
         for feature in interface.findall('remove'):
             if (matchAPIProfile(api, profile, feature)):
-                self.markRequired(feature,False)
+                self.markRequired(feature,False,state)
 
-    def assignAdditionalValidity(self, interface, api, profile):
+    def assignAdditionalValidity(self, interface, api, profile, state):
         #
         # Loop over all usage inside all <require> tags.
         for feature in interface.findall('require'):
             if (matchAPIProfile(api, profile, feature)):
                 for v in feature.findall('usage'):
                     if v.get('command'):
-                        self.cmddict[v.get('command')].additionalValidity.append(copy.deepcopy(v))
+                        state.additionalValidity.setdefault(self.cmddict[v.get('command')], []).append(copy.deepcopy(v))
                     if v.get('struct'):
-                        self.typedict[v.get('struct')].additionalValidity.append(copy.deepcopy(v))
+                        state.additionalValidity.setdefault(self.typedict[v.get('struct')], []).append(copy.deepcopy(v))
 
         #
         # Loop over all usage inside all <remove> tags.
@@ -528,124 +711,168 @@ class Registry:
             if (matchAPIProfile(api, profile, feature)):
                 for v in feature.findall('usage'):
                     if v.get('command'):
-                        self.cmddict[v.get('command')].removedValidity.append(copy.deepcopy(v))
+                        state.removedValidity.setdefault(self.cmddict[v.get('command')], []).append(copy.deepcopy(v))
                     if v.get('struct'):
-                        self.typedict[v.get('struct')].removedValidity.append(copy.deepcopy(v))
+                        state.removedValidity.setdefault(self.typedict[v.get('struct')], []).append(copy.deepcopy(v))
 
     #
-    # generateFeature - generate a single type / enum group / enum / command,
-    # and all its dependencies as needed.
+    # isRequiresDependency - return True if a dependency of a feature is the
+    # type in its 'requires' attribute, rather than a nested <type> or <enum>
+    #   f - TypeInfo / EnumInfo / CmdInfo object
+    #   index - index of the dependency in f.dependencies
+    def isRequiresDependency(self, f, index):
+        return (index == 0 and isinstance(f, TypeInfo) and 'requires' in f.elem.attrib)
+    #
+    # declareFeature - look up a type / enum / command for generateFeature,
+    # and mark it declared. Returns its *Info object, or None if it's not
+    # defined, not required, or already declared.
     #   fname - name of feature (<type>/<enum>/<command>)
     #   ftype - type of feature, 'type' | 'enum' | 'command'
     #   dictionary - of *Info objects - self.{type|enum|cmd}dict
-    def generateFeature(self, fname, ftype, dictionary):
-        f = self.lookupElementInfo(fname, dictionary)
+    #   state - GenerationState being generated
+    def declareFeature(self, fname, ftype, dictionary, state):
+        f = self.lookupElementInfo(fname, dictionary, state.genOpts.apiname)
         if (f == None):
             # No such feature. This is an error, but reported earlier
-            self.gen.logMsg('diag', '*** No entry found for feature', fname,
-                            'returning!')
-            return
+            if (state.diag):
+                state.gen.logMsg('diag', '*** No entry found for feature', fname,
+                                'returning!')
+            return None
         #
         # If feature isn't required, or has already been declared, return
-        if (not f.required):
-            self.gen.logMsg('diag', '*** Skipping', ftype, fname, '(not required)')
-            return
-        if (f.declared):
-            self.gen.logMsg('diag', '*** Skipping', ftype, fname, '(already declared)')
-            return
+        if (f not in state.required):
+            if (state.diag):
+                state.gen.logMsg('diag', '*** Skipping', ftype, fname, '(not required)')
+            return None
+        if (f in state.declared):
+            if (state.diag):
+                state.gen.logMsg('diag', '*** Skipping', ftype, fname, '(already declared)')
+            return None
         # Always mark feature declared, as though actually emitted
-        f.declared = True
-        #
-        # Pull in dependent declaration(s) of the feature.
-        # For types, there may be one type in the 'required' attribute of
-        #   the element, as well as many in imbedded <type> and <enum> tags
-        #   within the element.
-        # For commands, there may be many in <type> tags within the element.
-        # For enums, no dependencies are allowed (though perhaps if you
-        #   have a uint64 enum, it should require that type).
+        state.declared.add(f)
+        return f
+    #
+    # emitFeature - generate a single type / enum / command whose
+    # dependencies have already been generated.
+    #   f - *Info object for the feature
+    #   fname, ftype, state - as for declareFeature
+    def emitFeature(self, f, fname, ftype, state):
         genProc = None
         if (ftype == 'type'):
-            genProc = self.gen.genType
-            if ('requires' in f.elem.attrib):
-                depname = f.elem.get('requires')
-                self.gen.logMsg('diag', '*** Generating required dependent type',
-                                depname)
-                self.generateFeature(depname, 'type', self.typedict)
-            for subtype in f.elem.findall('.//type'):
-                self.gen.logMsg('diag', '*** Generating required dependent <type>',
-                    subtype.text)
-                self.generateFeature(subtype.text, 'type', self.typedict)
-            for subtype in f.elem.findall('.//enum'):
-                self.gen.logMsg('diag', '*** Generating required dependent <enum>',
-                    subtype.text)
-                self.generateFeature(subtype.text, 'enum', self.enumdict)
+            genProc = state.gen.genType
             # If the type is an enum group, look up the corresponding
             # group in the group dictionary and generate that instead.
             if (f.elem.get('category') == 'enum'):
-                self.gen.logMsg('diag', '*** Type', fname, 'is an enum group, so generate that instead')
-                group = self.lookupElementInfo(fname, self.groupdict)
+                if (state.diag):
+                    state.gen.logMsg('diag', '*** Type', fname, 'is an enum group, so generate that instead')
+                group = self.lookupElementInfo(fname, self.groupdict, state.genOpts.apiname)
                 if (group == None):
                     # Unless this is tested for, it's probably fatal to call below
                     genProc = None
-                    self.logMsg('warn', '*** NO MATCHING ENUM GROUP FOUND!!!')
+                    state.gen.logMsg('warn', '*** NO MATCHING ENUM GROUP FOUND!!!')
                 else:
-                    genProc = self.gen.genGroup
+                    genProc = state.gen.genGroup
                     f = group
         elif (ftype == 'command'):
-            genProc = self.gen.genCmd
-            for type in f.elem.findall('.//type'):
-                depname = type.text
-                self.gen.logMsg('diag', '*** Generating required parameter type',
-                                depname)
-                self.generateFeature(depname, 'type', self.typedict)
+            genProc = state.gen.genCmd
         elif (ftype == 'enum'):
-            genProc = self.gen.genEnum
+            genProc = state.gen.genEnum
         # Actually generate the type only if emitting declarations
-        if self.emitFeatures:
-            self.gen.logMsg('diag', '*** Emitting', ftype, 'decl for', fname)
+        if state.emitFeatures:
+            if (state.diag):
+                state.gen.logMsg('diag', '*** Emitting', ftype, 'decl for', fname)
             genProc(f, fname)
         else:
-            self.gen.logMsg('diag', '*** Skipping', ftype, fname,
-                            '(not emitting this feature)')
+            if (state.diag):
+                state.gen.logMsg('diag', '*** Skipping', ftype, fname,
+                                '(not emitting this feature)')
+    #
+    # generateFeature - generate a single type / enum group / enum / command,
+    # and all its dependencies as needed.
+    #   fname - name of feature (<type>/<enum>/<command>)
+    #   ftype - type of feature, 'type' | 'enum' | 'command'
+    #   dictionary - of *Info objects - self.{type|enum|cmd}dict
+    #   state - GenerationState being generated
+    # Dependencies (the *Info dependencies lists built by parseTree) are
+    # generated depth-first, before the feature depending on them. The walk
+    # uses an explicit stack of (name, type, info, iterator over the
+    # enumerated dependencies).
+    def generateFeature(self, fname, ftype, dictionary, state):
+        f = self.declareFeature(fname, ftype, dictionary, state)
+        if (f == None):
+            return
+        stack = [ (fname, ftype, f, iter(enumerate(f.dependencies))) ]
+        while (stack):
+            fname, ftype, f, deps = stack[-1]
+            for (index, (depname, deptype)) in deps:
+                if (state.diag):
+                    if (ftype == 'command'):
+                        state.gen.logMsg('diag', '*** Generating required parameter type',
+                                        depname)
+                    elif (self.isRequiresDependency(f, index)):
+                        state.gen.logMsg('diag', '*** Generating required dependent type',
+                                        depname)
+                    else:
+                        state.gen.logMsg('diag', '*** Generating required dependent <' + deptype + '>',
+                                        depname)
+                if (deptype == 'type'):
+                    dep = self.declareFeature(depname, deptype, self.typedict, state)
+                else:
+                    dep = self.declareFeature(depname, deptype, self.enumdict, state)
+                if (dep != None):
+                    stack.append((depname, deptype, dep, iter(enumerate(dep.dependencies))))
+                    break
+            else:
+                stack.pop()
+                self.emitFeature(f, fname, ftype, state)
     #
     # generateRequiredInterface - generate all interfaces required
     # by an API version or extension
     #   interface - Element for <version> or <extension>
-    def generateRequiredInterface(self, interface):
+    #   state - GenerationState being generated
+    def generateRequiredInterface(self, interface, state):
         """Generate required C interface for specified API version/extension"""
 
         #
         # Loop over all features inside all <require> tags.
         for features in interface.findall('require'):
             for t in features.findall('type'):
-                self.generateFeature(t.get('name'), 'type', self.typedict)
+                self.generateFeature(t.get('name'), 'type', self.typedict, state)
             for e in features.findall('enum'):
-                self.generateFeature(e.get('name'), 'enum', self.enumdict)
+                self.generateFeature(e.get('name'), 'enum', self.enumdict, state)
             for c in features.findall('command'):
-                self.generateFeature(c.get('name'), 'command', self.cmddict)
+                self.generateFeature(c.get('name'), 'command', self.cmddict, state)
 
     #
-    # apiGen(genOpts) - generate interface for specified versions
+    # apiGen(genOpts, gen, timer) - generate interface for specified versions
     #   genOpts - GeneratorOptions object with parameters used
     #   by the Generator object.
-    def apiGen(self, genOpts):
+    #   gen - OutputGenerator object to generate with. If None, the
+    #   generator specified with setGenerator() is used.
+    #   timer - GeneratorTimer to record the time spent in each pass and
+    #   generator hook, or None.
+    # All the state of the generation is kept in a GenerationState, so
+    # concurrent calls with different generators may share the Registry.
+    def apiGen(self, genOpts, gen = None, timer = None):
         """Generate interfaces for the specified API type and range of versions"""
         #
-        self.gen.logMsg('diag', '*******************************************')
-        self.gen.logMsg('diag', '  Registry.apiGen file:', genOpts.filename,
+        if (gen == None):
+            gen = self.gen
+        else:
+            gen.setRegistry(self)
+        state = GenerationState(gen, genOpts)
+        #
+        state.gen.logMsg('diag', '*******************************************')
+        state.gen.logMsg('diag', '  Registry.apiGen file:', genOpts.filename,
                         'api:', genOpts.apiname,
                         'profile:', genOpts.profile)
-        self.gen.logMsg('diag', '*******************************************')
-        #
-        self.genOpts = genOpts
-        # Reset required/declared flags for all features
-        self.apiReset()
+        state.gen.logMsg('diag', '*******************************************')
         #
         # Compile regexps used to select versions & extensions
-        regVersions = re.compile(self.genOpts.versions)
-        regEmitVersions = re.compile(self.genOpts.emitversions)
-        regAddExtensions = re.compile(self.genOpts.addExtensions)
-        regRemoveExtensions = re.compile(self.genOpts.removeExtensions)
+        regVersions = re.compile(state.genOpts.versions)
+        regEmitVersions = re.compile(state.genOpts.emitversions)
+        regAddExtensions = re.compile(state.genOpts.addExtensions)
+        regRemoveExtensions = re.compile(state.genOpts.removeExtensions)
         #
         # Get all matching API versions & add to list of FeatureInfo
         features = []
@@ -653,28 +880,28 @@ class Registry:
         for key in self.apidict:
             fi = self.apidict[key]
             api = fi.elem.get('api')
-            if (api == self.genOpts.apiname):
+            if (api == state.genOpts.apiname):
                 apiMatch = True
                 if (regVersions.match(fi.version)):
                     # Matches API & version #s being generated. Mark for
                     # emission and add to the features[] list .
-                    # @@ Could use 'declared' instead of 'emit'?
-                    fi.emit = (regEmitVersions.match(fi.version) != None)
+                    if (regEmitVersions.match(fi.version) != None):
+                        state.emit.add(fi)
                     features.append(fi)
-                    if (not fi.emit):
-                        self.gen.logMsg('diag', '*** NOT tagging feature api =', api,
+                    if (fi not in state.emit):
+                        state.gen.logMsg('diag', '*** NOT tagging feature api =', api,
                             'name =', fi.name, 'version =', fi.version,
                             'for emission (does not match emitversions pattern)')
                 else:
-                    self.gen.logMsg('diag', '*** NOT including feature api =', api,
+                    state.gen.logMsg('diag', '*** NOT including feature api =', api,
                         'name =', fi.name, 'version =', fi.version,
                         '(does not match requested versions)')
             else:
-                self.gen.logMsg('diag', '*** NOT including feature api =', api,
+                state.gen.logMsg('diag', '*** NOT including feature api =', api,
                     'name =', fi.name,
                     '(does not match requested API)')
         if (not apiMatch):
-            self.gen.logMsg('warn', '*** No matching API versions found!')
+            state.gen.logMsg('warn', '*** No matching API versions found!')
         #
         # Get all matching extensions, in order by their extension number,
         # and add to the list of features.
@@ -691,9 +918,9 @@ class Registry:
             # 'supported' must exactly match defaultExtensions, so bracket
             # it with ^(pat)$.
             pat = '^(' + ei.elem.get('supported') + ')$'
-            if (self.genOpts.defaultExtensions and
-                     re.match(pat, self.genOpts.defaultExtensions)):
-                self.gen.logMsg('diag', '*** Including extension',
+            if (state.genOpts.defaultExtensions and
+                     re.match(pat, state.genOpts.defaultExtensions)):
+                state.gen.logMsg('diag', '*** Including extension',
                     extName, "(defaultExtensions matches the 'supported' attribute)")
                 include = True
             #
@@ -702,7 +929,7 @@ class Registry:
             # forcing extensions into an interface even if they're not
             # tagged appropriately in the registry.
             if (regAddExtensions.match(extName) != None):
-                self.gen.logMsg('diag', '*** Including extension',
+                state.gen.logMsg('diag', '*** Including extension',
                     extName, '(matches explicitly requested extensions to add)')
                 include = True
             # Remove extensions if the name matches the regexp specified
@@ -710,22 +937,22 @@ class Registry:
             # extensions from an interface even if they're tagged that
             # way in the registry.
             if (regRemoveExtensions.match(extName) != None):
-                self.gen.logMsg('diag', '*** Removing extension',
+                state.gen.logMsg('diag', '*** Removing extension',
                     extName, '(matches explicitly requested extensions to remove)')
                 include = False
             #
             # If the extension is to be included, add it to the
             # extension features list.
             if (include):
-                ei.emit = True
+                state.emit.add(ei)
                 features.append(ei)
             else:
-                self.gen.logMsg('diag', '*** NOT including extension',
+                state.gen.logMsg('diag', '*** NOT including extension',
                     extName, '(does not match api attribute or explicitly requested extensions)')
         #
         # Sort the extension features list, if a sort procedure is defined
-        if (self.genOpts.sortProcedure):
-            self.genOpts.sortProcedure(features)
+        if (state.genOpts.sortProcedure):
+            state.genOpts.sortProcedure(features)
         #
         # Pass 1: loop over requested API versions and extensions tagging
         #   types/commands/features as required (in an <require> block) or no
@@ -735,44 +962,41 @@ class Registry:
         # If a profile other than 'None' is being generated, it must
         #   match the profile attribute (if any) of the <require> and
         #   <remove> tags.
-        self.gen.logMsg('diag', '*** PASS 1: TAG FEATURES ********************************************')
+        state.gen.logMsg('diag', '*** PASS 1: TAG FEATURES ********************************************')
+        if (timer != None):
+            start = timer.start()
         for f in features:
-            self.gen.logMsg('diag', '*** PASS 1: Tagging required and removed features for',
+            state.gen.logMsg('diag', '*** PASS 1: Tagging required and removed features for',
                 f.name)
-            self.requireAndRemoveFeatures(f.elem, self.genOpts.apiname, self.genOpts.profile)
-            self.assignAdditionalValidity(f.elem, self.genOpts.apiname, self.genOpts.profile)
+            self.requireAndRemoveFeatures(f.elem, state.genOpts.apiname, state.genOpts.profile, state)
+            self.assignAdditionalValidity(f.elem, state.genOpts.apiname, state.genOpts.profile, state)
+        if (timer != None):
+            timer.stop('pass 1 tagging', start)
         #
         # Pass 2: loop over specified API versions and extensions printing
         #   declarations for required things which haven't already been
         #   generated.
-        self.gen.logMsg('diag', '*** PASS 2: GENERATE INTERFACES FOR FEATURES ************************')
-        self.gen.beginFile(self.genOpts)
+        state.gen.logMsg('diag', '*** PASS 2: GENERATE INTERFACES FOR FEATURES ************************')
+        if (timer != None):
+            timer.instrument(state.gen)
+            start = timer.start()
+        state.gen.beginFile(state.genOpts)
         for f in features:
-            self.gen.logMsg('diag', '*** PASS 2: Generating interface for',
+            state.gen.logMsg('diag', '*** PASS 2: Generating interface for',
                 f.name)
-            emit = self.emitFeatures = f.emit
+            emit = state.emitFeatures = (f in state.emit)
             if (not emit):
-                self.gen.logMsg('diag', '*** PASS 2: NOT declaring feature',
+                state.gen.logMsg('diag', '*** PASS 2: NOT declaring feature',
                     f.elem.get('name'), 'because it is not tagged for emission')
             # Generate the interface (or just tag its elements as having been
             # emitted, if they haven't been).
-            self.gen.beginFeature(f.elem, emit)
-            self.generateRequiredInterface(f.elem)
-            self.gen.endFeature()
-        self.gen.endFile()
-    #
-    # apiReset - use between apiGen() calls to reset internal state
-    #
-    def apiReset(self):
-        """Reset type/enum/command dictionaries before generating another API"""
-        for type in self.typedict:
-            self.typedict[type].resetState()
-        for enum in self.enumdict:
-            self.enumdict[enum].resetState()
-        for cmd in self.cmddict:
-            self.cmddict[cmd].resetState()
-        for cmd in self.apidict:
-            self.apidict[cmd].resetState()
+            state.gen.beginFeature(f.elem, emit)
+            self.generateRequiredInterface(f.elem, state)
+            state.gen.endFeature()
+        state.gen.endFile()
+        if (timer != None):
+            timer.stop('pass 2 generation', start)
+            timer.uninstrument(state.gen)
     #
     # validateGroups - check that group= attributes match actual groups
     #
@@ -55,6 +55,16 @@ from generator import *
 #     parameter on a separate line
 #   alignFuncParam - if nonzero and parameters are being put on a
 #     separate line, align parameter names at the specified column
+#   batchArrays - True if arrays of objects should be checked with one
+#     call such as startWriteObjects(), taking the counter lock once,
+#     instead of a startWriteObject() call for each element
+#   elideUnwrittenReads - True if reads of non-dispatchable handle types
+#     which the registry only lists as externally synchronized where a
+#     command destroys or frees them should not be tracked. vk.xml
+#     doesn't mark deleting commands, so commands named vkDestroy* or
+#     vkFree* are taken to delete objects (see destroyedType())
+#   hashProcmap - True if procmap[] should be looked up with a perfect
+#     hash of the intercepted command names, as for makeProcmap()
 class ThreadGeneratorOptions(GeneratorOptions):
     def __init__(self,
                  filename = None,
@@ -67,6 +77,8 @@ class ThreadGeneratorOptions(GeneratorOptions):
                  addExtensions = None,
                  removeExtensions = None,
                  sortProcedure = regSortFeatures,
+                 writeIfChanged = False,
+                 streamOutput = False,
                  prefixText = "",
                  genFuncPointers = True,
                  protectFile = True,
@@ -78,10 +90,14 @@ class ThreadGeneratorOptions(GeneratorOptions):
                  apientryp = '',
                  indentFuncProto = True,
                  indentFuncPointer = False,
-                 alignFuncParam = 0):
+                 alignFuncParam = 0,
+                 batchArrays = False,
+                 elideUnwrittenReads = False,
+                 hashProcmap = False):
         GeneratorOptions.__init__(self, filename, directory, apiname, profile,
                                   versions, emitversions, defaultExtensions,
-                                  addExtensions, removeExtensions, sortProcedure)
+                                  addExtensions, removeExtensions, sortProcedure,
+                                  writeIfChanged, streamOutput)
         self.prefixText      = prefixText
         self.genFuncPointers = genFuncPointers
         self.protectFile     = protectFile
@@ -94,6 +110,9 @@ class ThreadGeneratorOptions(GeneratorOptions):
         self.indentFuncProto = indentFuncProto
         self.indentFuncPointer = indentFuncPointer
         self.alignFuncParam  = alignFuncParam
+        self.batchArrays     = batchArrays
+        self.elideUnwrittenReads = elideUnwrittenReads
+        self.hashProcmap     = hashProcmap
 
 # ThreadOutputGenerator - subclass of OutputGenerator.
 # Generates Thread checking framework
@@ -125,26 +144,93 @@ class ThreadOutputGenerator(OutputGenerator):
         # Internal state - accumulators for different inner block text
         self.sections = dict([(section, []) for section in self.ALL_SECTIONS])
         self.intercepts = []
+        # Handle types whose reads are not tracked, found by the first
+        # makeThreadUseBlock() call for each file
+        self.untrackedReadTypes = None
 
-    # Check if the parameter passed in is a pointer to an array
+    # Check if the parameter (a ParamInfo) passed in is a pointer to an array
     def paramIsArray(self, param):
-        return param.attrib.get('len') is not None
+        return param.lenInfo is not None
 
-    # Check if the parameter passed in is a pointer
+    # Return the C expression for the length of an array parameter (a
+    # ParamInfo). A length with no C expression, such as a latexmath
+    # equation or a null-terminated string, is an error.
+    def paramLen(self, param):
+        if param.lenInfo.cExpr is None:
+            self.logMsg('error', 'No C expression for len attribute', param.lenInfo.text, 'of parameter', param.name)
+        return param.lenInfo.cExpr
+
+    # Check if the parameter (a ParamInfo) passed in is a pointer
     def paramIsPointer(self, param):
-        ispointer = False
-        for elem in param:
-            #write('paramIsPointer '+elem.text, file=sys.stderr)
-            #write('elem.tag '+elem.tag, file=sys.stderr)
-            #if (elem.tail is None):
-            #    write('elem.tail is None', file=sys.stderr)
-            #else:
-            #    write('elem.tail '+elem.tail, file=sys.stderr)
-            if ((elem.tag is not 'type') and (elem.tail is not None)) and '*' in elem.tail:
-                ispointer = True
-            #    write('is pointer', file=sys.stderr)
-        return ispointer
-    def makeThreadUseBlock(self, cmd, functionprefix):
+        return param.pointerDepth > 0
+
+    # Check if each of a list of externsync expressions names a member
+    # object of every element of the array parameter, like
+    # "pDescriptorWrites[].dstSet"
+    def listsArrayMembers(self, param, members):
+        for member in members:
+            prefix = param.name + '[].'
+            if not member.startswith(prefix) or not member[len(prefix):].isidentifier():
+                return False
+        return True
+
+    # Type of the object named by an externsync expression, like
+    # "pSubmits[].pWaitSemaphores[]", for a parameter (a ParamInfo), or
+    # None if it can't be found in the registry
+    def externsyncType(self, param, expression):
+        type = param.type
+        for member in re.split('\.|->|::', expression)[1:]:
+            name = member.replace('[]', '')
+            typeinfo = self.registry.typedict.get(type)
+            members = [info for info in typeinfo.members if info.name == name] if typeinfo else []
+            if (not members):
+                return None
+            type = members[0].type
+        return type
+
+    # Type of the object deleted by a command (a CmdInfo) with the given
+    # name, or None if it doesn't delete one, or if it isn't clear which
+    # parameter it deletes. vk.xml has no attribute marking such commands,
+    # so by the API's naming convention they are those named vkDestroy*
+    # or vkFree*. The deleted object is the externsync handle parameter
+    # whose type isn't the parent of another parameter's handle type,
+    # like the pCommandBuffers and not the commandPool of
+    # vkFreeCommandBuffers.
+    def destroyedType(self, name, cmdinfo):
+        if (not re.match('vk(Destroy|Free)', name)):
+            return None
+        parents = set()
+        for param in cmdinfo.params:
+            typeinfo = self.registry.typedict.get(param.type)
+            if (typeinfo and typeinfo.elem.get('parent')):
+                parents.update(typeinfo.elem.get('parent').split(','))
+        destroyed = [param.type for param in cmdinfo.params
+                     if param.externsync == 'true' and param.type not in parents]
+        if (len(destroyed) != 1):
+            return None
+        return destroyed[0]
+
+    # Find the handle types which no command in the registry writes,
+    # other than by deleting objects of the type, from the externsync
+    # attributes of every command's parameters
+    def findUnwrittenTypes(self, types):
+        written = set()
+        for name, cmdinfo in self.registry.cmddict.items():
+            destroyed = self.destroyedType(name, cmdinfo)
+            for param in cmdinfo.params:
+                if (param.externsync == 'true'):
+                    if (param.type != destroyed):
+                        written.add(param.type)
+                elif (param.externsync):
+                    for expression in param.externsync.split(','):
+                        type = self.externsyncType(param, expression)
+                        if (type == None):
+                            self.logMsg('warn', 'Unknown type of externsync', expression, 'in', name)
+                            continue
+                        written.add(type)
+        return set(types) - written
+
+    def makeThreadUseBlock(self, cmdinfo, functionprefix):
         """Generate C function pointer typedef for <command> Element"""
         paramdecl = ''
         thread_check_dispatchable_objects = [
@@ -175,25 +261,39 @@ class ThreadOutputGenerator(OutputGenerator):
             "VkShaderModule",
         ]
 
+        # With elideUnwrittenReads, uses of objects that are only ever
+        # written by destroying them aren't tracked
+        if (self.untrackedReadTypes == None):
+            self.untrackedReadTypes = set()
+            if (self.genOpts.elideUnwrittenReads):
+                self.untrackedReadTypes = self.findUnwrittenTypes(thread_check_nondispatchable_objects)
+                self.logMsg('diag', 'Not tracking reads of', ', '.join(sorted(self.untrackedReadTypes)))
+
         # Find and add any parameters that are thread unsafe
-        params = cmd.findall('param')
+        params = cmdinfo.params
         for param in params:
-            paramname = param.find('name')
             if False: # self.paramIsPointer(param):
-                paramdecl += '    // not watching use of pointer ' + paramname.text + '\n'
+                paramdecl += '    // not watching use of pointer ' + param.name + '\n'
             else:
-                externsync = param.attrib.get('externsync')
+                externsync = param.externsync
                 if externsync == 'true':
-                    if self.paramIsArray(param):
-                        paramdecl += '    for (uint32_t index=0;index<' + param.attrib.get('len') + ';index++) {\n'
-                        paramdecl += '        ' + functionprefix + 'WriteObject(my_data, ' + paramname.text + '[index]);\n'
+                    if self.paramIsArray(param) and self.genOpts.batchArrays:
+                        paramdecl += '    ' + functionprefix + 'WriteObjects(my_data, ' + param.name + ', ' + self.paramLen(param) + ');\n'
+                    elif self.paramIsArray(param):
+                        paramdecl += '    for (uint32_t index=0;index<' + self.paramLen(param) + ';index++) {\n'
+                        paramdecl += '        ' + functionprefix + 'WriteObject(my_data, ' + param.name + '[index]);\n'
                         paramdecl += '    }\n'
                     else:
-                        paramdecl += '    ' + functionprefix + 'WriteObject(my_data, ' + paramname.text + ');\n'
-                elif (param.attrib.get('externsync')):
-                    if self.paramIsArray(param):
+                        paramdecl += '    ' + functionprefix + 'WriteObject(my_data, ' + param.name + ');\n'
+                elif (externsync):
+                    members = externsync.split(",")
+                    if self.paramIsArray(param) and self.genOpts.batchArrays and self.listsArrayMembers(param, members):
+                        # Externsync lists a member object of each struct in the array
+                        for member in members:
+                            paramdecl += '    ' + functionprefix + 'WriteObjects(my_data, ' + param.name + ', ' + self.paramLen(param) + ', &' + param.type + '::' + member.split('.')[-1] + ');\n'
+                    elif self.paramIsArray(param):
                         # Externsync can list pointers to arrays of members to synchronize
-                        paramdecl += '    for (uint32_t index=0;index<' + param.attrib.get('len') + ';index++) {\n'
+                        paramdecl += '    for (uint32_t index=0;index<' + self.paramLen(param) + ';index++) {\n'
                         for member in externsync.split(","):
                             # Replace first empty [] in member name with index
                             element = member.replace('[]','[index]',1)
@@ -206,6 +306,10 @@ class ThreadOutputGenerator(OutputGenerator):
                                 limit = element[0:element.find('s[]')] + 'Count'
                                 dotp = limit.rfind('.p')
                                 limit = limit[0:dotp+1] + limit[dotp+2:dotp+3].lower() + limit[dotp+3:]
+                                if self.genOpts.batchArrays and element.endswith('[]'):
+                                    # Externsync lists an array of objects in each struct
+                                    paramdecl += '        ' + functionprefix + 'WriteObjects(my_data, ' + element[:-2] + ', ' + limit + ');\n'
+                                    continue
                                 paramdecl += '        for(uint32_t index2=0;index2<'+limit+';index2++)\n'
                                 element = element.replace('[]','[index2]')
                             paramdecl += '            ' + functionprefix + 'WriteObject(my_data, ' + element + ');\n'
@@ -216,39 +320,38 @@ class ThreadOutputGenerator(OutputGenerator):
                             member = str(member).replace("::", "->")
                             paramdecl += '    ' + functionprefix + 'WriteObject(my_data, ' + member + ');\n'
                 else:
-                    paramtype = param.find('type')
-                    if paramtype is not None:
-                        paramtype = paramtype.text
-                    else:
-                        paramtype = 'None'
-                    if paramtype in thread_check_dispatchable_objects or paramtype in thread_check_nondispatchable_objects:
-                        if self.paramIsArray(param) and ('pPipelines' != paramname.text):
-                            paramdecl += '    for (uint32_t index=0;index<' + param.attrib.get('len') + ';index++) {\n'
-                            paramdecl += '        ' + functionprefix + 'ReadObject(my_data, ' + paramname.text + '[index]);\n'
+                    paramtype = param.type
+                    if paramtype in self.untrackedReadTypes:
+                        pass
+                    elif paramtype in thread_check_dispatchable_objects or paramtype in thread_check_nondispatchable_objects:
+                        if self.paramIsArray(param) and ('pPipelines' != param.name) and self.genOpts.batchArrays:
+                            paramdecl += '    ' + functionprefix + 'ReadObjects(my_data, ' + param.name + ', ' + self.paramLen(param) + ');\n'
+                        elif self.paramIsArray(param) and ('pPipelines' != param.name):
+                            paramdecl += '    for (uint32_t index=0;index<' + self.paramLen(param) + ';index++) {\n'
+                            paramdecl += '        ' + functionprefix + 'ReadObject(my_data, ' + param.name + '[index]);\n'
                             paramdecl += '    }\n'
                         elif not self.paramIsPointer(param):
                             # Pointer params are often being created.
                             # They are not being read from.
-                            paramdecl += '    ' + functionprefix + 'ReadObject(my_data, ' + paramname.text + ');\n'
-        explicitexternsyncparams = cmd.findall("param[@externsync]")
+                            paramdecl += '    ' + functionprefix + 'ReadObject(my_data, ' + param.name + ');\n'
+        explicitexternsyncparams = [param for param in params if param.externsync is not None]
         if (explicitexternsyncparams is not None):
             for param in explicitexternsyncparams:
-                externsyncattrib = param.attrib.get('externsync')
-                paramname = param.find('name')
+                externsyncattrib = param.externsync
                 paramdecl += '    // Host access to '
                 if externsyncattrib == 'true':
                     if self.paramIsArray(param):
-                        paramdecl += 'each member of ' + paramname.text
+                        paramdecl += 'each member of ' + param.name
                     elif self.paramIsPointer(param):
-                        paramdecl += 'the object referenced by ' + paramname.text
+                        paramdecl += 'the object referenced by ' + param.name
                     else:
-                        paramdecl += paramname.text
+                        paramdecl += param.name
                 else:
                     paramdecl += externsyncattrib
                 paramdecl += ' must be externally synchronized\n'
 
         # Find and add any "implicit" parameters that are thread unsafe
-        implicitexternsyncparams = cmd.find('implicitexternsyncparams')
+        implicitexternsyncparams = cmdinfo.elem.find('implicitexternsyncparams')
         if (implicitexternsyncparams is not None):
             for elem in implicitexternsyncparams:
                 paramdecl += '    // '
@@ -261,6 +364,7 @@ class ThreadOutputGenerator(OutputGenerator):
             return paramdecl
     def beginFile(self, genOpts):
         OutputGenerator.beginFile(self, genOpts)
+        self.untrackedReadTypes = None
         # C-specific
         #
         # Multiple inclusion protection & C++ namespace.
@@ -281,10 +385,7 @@ class ThreadOutputGenerator(OutputGenerator):
         # Finish C++ namespace and multiple inclusion protection
         self.newline()
         # record intercepted procedures
-        write('// intercepts', file=self.outFile)
-        write('struct { const char* name; PFN_vkVoidFunction pFunc;} procmap[] = {', file=self.outFile)
-        write('\n'.join(self.intercepts), file=self.outFile)
-        write('};\n', file=self.outFile)
+        write(makeProcmap(self.intercepts, self.genOpts.hashProcmap), file=self.outFile)
         self.newline()
         write('} // namespace threading', file=self.outFile)
         if (self.genOpts.protectFile and self.genOpts.filename):
@@ -398,7 +499,7 @@ class ThreadOutputGenerator(OutputGenerator):
             self.appendSection('command', '')
             self.appendSection('command', '// declare only')
             self.appendSection('command', decls[0])
-            self.intercepts += [ '    {"%s", reinterpret_cast<PFN_vkVoidFunction>(%s)},' % (name,name[2:]) ]
+            self.intercepts.append((name, name[2:], None))
             return
         if "KHR" in name:
             self.appendSection('command', '// TODO - not wrapping KHR function ' + name)
@@ -407,16 +508,12 @@ class ThreadOutputGenerator(OutputGenerator):
             self.appendSection('command', '// TODO - not wrapping EXT function ' + name)
             return
         # Determine first if this function needs to be intercepted
-        startthreadsafety = self.makeThreadUseBlock(cmdinfo.elem, 'start')
+        startthreadsafety = self.makeThreadUseBlock(cmdinfo, 'start')
         if startthreadsafety is None:
             return
-        finishthreadsafety = self.makeThreadUseBlock(cmdinfo.elem, 'finish')
+        finishthreadsafety = self.makeThreadUseBlock(cmdinfo, 'finish')
         # record that the function will be intercepted
-        if (self.featureExtraProtect != None):
-            self.intercepts += [ '#ifdef %s' % self.featureExtraProtect ]
-        self.intercepts += [ '    {"%s", reinterpret_cast<PFN_vkVoidFunction>(%s)},' % (name,name[2:]) ]
-        if (self.featureExtraProtect != None):
-            self.intercepts += [ '#endif' ]
+        self.intercepts.append((name, name[2:], self.featureExtraProtect))
 
         OutputGenerator.genCmd(self, cmdinfo, name)
         #
@@ -58,6 +58,19 @@ from collections import namedtuple
 #     parameter on a separate line
 #   alignFuncParam - if nonzero and parameters are being put on a
 #     separate line, align parameter names at the specified column
+#   sharedHandleLock - True to generate code for a layer built with
+#     UNIQUE_OBJECTS_SHARED_HANDLE_LOCK, where global_lock is a
+#     reader-writer lock: commands which only unwrap handles hold it
+#     shared, and only commands creating or destroying handles hold it
+#     exclusively. Defaults to False, for a std::mutex global_lock held
+#     for every access.
+#   scratchCount - if nonzero, wrappers make the local copies of
+#     parameters they unwrap handles in, single structs and arrays of
+#     up to this many elements, in scratch_storage on the stack rather
+#     than with new, falling back to the heap for larger arrays.
+#     Defaults to 0, for heap copies.
+#   hashProcmap - True if procmap[] should be looked up with a perfect
+#     hash of the intercepted command names, as for makeProcmap()
 class UniqueObjectsGeneratorOptions(GeneratorOptions):
     def __init__(self,
                  filename = None,
@@ -70,6 +83,8 @@ class UniqueObjectsGeneratorOptions(GeneratorOptions):
                  addExtensions = None,
                  removeExtensions = None,
                  sortProcedure = regSortFeatures,
+                 writeIfChanged = False,
+                 streamOutput = False,
                  prefixText = "",
                  genFuncPointers = True,
                  protectFile = True,
@@ -81,10 +96,14 @@ class UniqueObjectsGeneratorOptions(GeneratorOptions):
                  apientryp = '',
                  indentFuncProto = True,
                  indentFuncPointer = False,
-                 alignFuncParam = 0):
+                 alignFuncParam = 0,
+                 sharedHandleLock = False,
+                 scratchCount = 0,
+                 hashProcmap = False):
         GeneratorOptions.__init__(self, filename, directory, apiname, profile,
                                   versions, emitversions, defaultExtensions,
-                                  addExtensions, removeExtensions, sortProcedure)
+                                  addExtensions, removeExtensions, sortProcedure,
+                                  writeIfChanged, streamOutput)
         self.prefixText      = prefixText
         self.genFuncPointers = genFuncPointers
         self.protectFile     = protectFile
@@ -97,6 +116,9 @@ class UniqueObjectsGeneratorOptions(GeneratorOptions):
         self.indentFuncProto = indentFuncProto
         self.indentFuncPointer = indentFuncPointer
         self.alignFuncParam  = alignFuncParam
+        self.sharedHandleLock = sharedHandleLock
+        self.scratchCount    = scratchCount
+        self.hashProcmap     = hashProcmap
 
 # UniqueObjectsOutputGenerator - subclass of OutputGenerator.
 # Generates unique objects layer non-dispatchable handle-wrapping code.
@@ -158,13 +180,14 @@ class UniqueObjectsOutputGenerator(OutputGenerator):
         self.structTypes = dict()                         # Map of Vulkan struct typename to required VkStructureType
         self.handleTypes = set()                          # Set of handle type names
         self.commands = []                                # List of CommandData records for all Vulkan commands
-        self.structMembers = []                           # List of StructMemberData records for all Vulkan structs
+        self.structMembers = dict()                       # Map of Vulkan struct typename to list of member CommandParam records
+        self.cmdMembers = dict()                          # Map of Vulkan command name to list of parameter CommandParam records
+        self.structContainsNdo = dict()                   # Map of Vulkan struct typename to True if it contains an NDO at some level
         self.flags = set()                                # Map of flags typenames
         # Named tuples to store struct and command data
         self.StructType = namedtuple('StructType', ['name', 'value'])
         self.CommandParam = namedtuple('CommandParam', ['type', 'name', 'ispointer', 'isconst', 'iscount', 'len', 'extstructs', 'cdecl', 'islocal', 'iscreate', 'isdestroy'])
         self.CommandData = namedtuple('CommandData', ['name', 'return_type', 'params', 'cdecl'])
-        self.StructMemberData = namedtuple('StructMemberData', ['name', 'members'])
     #
     def incIndent(self, indent):
         inc = ' ' * self.INDENT_SPACES
@@ -191,6 +214,12 @@ class UniqueObjectsOutputGenerator(OutputGenerator):
         if (genOpts.prefixText):
             for s in genOpts.prefixText:
                 write(s, file=self.outFile)
+        # The generated locking code must match the type of global_lock
+        if (genOpts.sharedHandleLock):
+            self.newline()
+            write('#ifndef UNIQUE_OBJECTS_SHARED_HANDLE_LOCK', file=self.outFile)
+            write('#error "unique_objects_wrappers.h was generated with -sharedhandlelock, but UNIQUE_OBJECTS_SHARED_HANDLE_LOCK is not defined"', file=self.outFile)
+            write('#endif', file=self.outFile)
         # Namespace
         self.newline()
         write('namespace unique_objects {', file = self.outFile)
@@ -198,10 +227,7 @@ class UniqueObjectsOutputGenerator(OutputGenerator):
     def endFile(self):
         self.newline()
         # Record intercepted procedures
-        write('// intercepts', file=self.outFile)
-        write('struct { const char* name; PFN_vkVoidFunction pFunc;} procmap[] = {', file=self.outFile)
-        write('\n'.join(self.intercepts), file=self.outFile)
-        write('};\n', file=self.outFile)
+        write(makeProcmap(self.intercepts, self.genOpts.hashProcmap), file=self.outFile)
         self.newline()
         write('} // namespace unique_objects', file=self.outFile)
         # Finish processing in superclass
@@ -216,11 +242,10 @@ class UniqueObjectsOutputGenerator(OutputGenerator):
         self.structTypes = dict()
         self.handleTypes = set()
         self.commands = []
-        self.structMembers = []
-        self.cmdMembers = []
+        self.structMembers = dict()
+        self.cmdMembers = dict()
+        self.structContainsNdo = dict()
         self.flags = set()
-        self.StructMemberData = namedtuple('StructMemberData', ['name', 'members'])
-        self.CmdMemberData = namedtuple('CmdMemberData', ['name', 'members'])
     #
     def endFeature(self):
         # Actually write the interface to the output file.
@@ -256,56 +281,24 @@ class UniqueObjectsOutputGenerator(OutputGenerator):
         # self.sections[section].append('SECTION: ' + section + '\n')
         self.sections[section].append(text)
     #
-    # Check if the parameter passed in is a pointer
+    # Check if the parameter (a ParamInfo) passed in is a pointer
     def paramIsPointer(self, param):
-        ispointer = False
-        for elem in param:
-            if ((elem.tag is not 'type') and (elem.tail is not None)) and '*' in elem.tail:
-                ispointer = True
-        return ispointer
+        return param.pointerDepth > 0
     #
     # Get the category of a type
     def getTypeCategory(self, typename):
-        types = self.registry.tree.findall("types/type")
-        for elem in types:
-            if (elem.find("name") is not None and elem.find('name').text == typename) or elem.attrib.get('name') == typename:
-                return elem.attrib.get('category')
+        typeinfo = self.registry.lookupElementInfo(typename, self.registry.typedict, self.genOpts.apiname)
+        if typeinfo is not None:
+            return typeinfo.elem.attrib.get('category')
     #
     # Check if a parent object is dispatchable or not
     def isHandleTypeNonDispatchable(self, handletype):
-        handle = self.registry.tree.find("types/type/[name='" + handletype + "'][@category='handle']")
-        if handle is not None and handle.find('type').text == 'VK_DEFINE_NON_DISPATCHABLE_HANDLE':
+        typeinfo = self.registry.lookupElementInfo(handletype, self.registry.typedict, self.genOpts.apiname)
+        if typeinfo is not None and typeinfo.elem.get('category') == 'handle' and typeinfo.elem.find('type').text == 'VK_DEFINE_NON_DISPATCHABLE_HANDLE':
             return True
         else:
             return False
     #
-    # Retrieve the type and name for a parameter
-    def getTypeNameTuple(self, param):
-        type = ''
-        name = ''
-        for elem in param:
-            if elem.tag == 'type':
-                type = noneStr(elem.text)
-            elif elem.tag == 'name':
-                name = noneStr(elem.text)
-        return (type, name)
-    #
-    # Retrieve the value of the len tag
-    def getLen(self, param):
-        result = None
-        len = param.attrib.get('len')
-        if len and len != 'null-terminated':
-            # For string arrays, 'len' can look like 'count,null-terminated', indicating that we
-            # have a null terminated array of strings.  We strip the null-terminated from the
-            # 'len' field and only return the parameter specifying the string count
-            if 'null-terminated' in len:
-                result = len.split(',')[0]
-            else:
-                result = len
-            # Spec has now notation for len attributes, using :: instead of platform specific pointer symbol
-            result = str(result).replace('::', '->')
-        return result
-    #
     # Generate a VkStructureType based on a structure typename
     def genVkStructureType(self, typename):
         # Add underscore between lowercase then uppercase
@@ -322,21 +315,18 @@ class UniqueObjectsOutputGenerator(OutputGenerator):
     # declarations are supported (no nested structs etc.)
     def genStruct(self, typeinfo, typeName):
         OutputGenerator.genStruct(self, typeinfo, typeName)
-        members = typeinfo.elem.findall('.//member')
+        members = typeinfo.members
         # Iterate over members once to get length parameters for arrays
         lens = set()
         for member in members:
-            len = self.getLen(member)
-            if len:
-                lens.add(len)
+            if member.len:
+                lens.add(member.len)
         # Generate member info
         membersInfo = []
         for member in members:
             # Get the member's type and name
-            info = self.getTypeNameTuple(member)
-            type = info[0]
-            name = info[1]
-            cdecl = self.makeCParamDecl(member, 0)
+            type = member.type
+            name = member.name
             # Process VkStructureType
             if type == 'VkStructureType':
                 # Extract the required struct type value from the comments
@@ -353,32 +343,63 @@ class UniqueObjectsOutputGenerator(OutputGenerator):
             membersInfo.append(self.CommandParam(type=type,
                                                  name=name,
                                                  ispointer=self.paramIsPointer(member),
-                                                 isconst=True if 'const' in cdecl else False,
+                                                 isconst=member.isconst,
                                                  iscount=True if name in lens else False,
-                                                 len=self.getLen(member),
-                                                 extstructs=member.attrib.get('validextensionstructs') if name == 'pNext' else None,
-                                                 cdecl=cdecl,
+                                                 len=member.len,
+                                                 extstructs=member.validextensionstructs if name == 'pNext' else None,
+                                                 cdecl=member.cdecl,
                                                  islocal=False,
                                                  iscreate=False,
                                                  isdestroy=False))
-        self.structMembers.append(self.StructMemberData(name=typeName, members=membersInfo))
+        self.structMembers[typeName] = membersInfo
+    #
+    # Insert a lock_guard line.  Commands classified as 'unwrap' by handle_access() only read the map, so with
+    # sharedHandleLock they take global_lock shared; commands creating or destroying handles take it exclusively.
+    def lock_guard(self, indent, access):
+        if self.genOpts.sharedHandleLock and access == 'unwrap':
+            return '%sshared_lock_guard<global_mutex_t> lock(global_lock);\n' % indent
+        return '%sstd::lock_guard<%s> lock(global_lock);\n' % (indent, self.mutex_type())
     #
-    # Insert a lock_guard line
-    def lock_guard(self, indent):
-        return '%sstd::lock_guard<std::mutex> lock(global_lock);\n' % indent
+    # Classify how a command uses unique_id_mapping, given its generated create and destroy code: 'create' and
+    # 'destroy' commands add or remove entries, any other command only reads it to unwrap its handle parameters
+    def handle_access(self, create_ndo_code, destroy_ndo_code):
+        if create_ndo_code:
+            return 'create'
+        if destroy_ndo_code:
+            return 'destroy'
+        return 'unwrap'
     #
-    # Determine if a struct has an NDO as a member or an embedded member
+    # Type of global_lock, for code taking it exclusively to create or destroy handles
+    def mutex_type(self):
+        if self.genOpts.sharedHandleLock:
+            return 'global_mutex_t'
+        return 'std::mutex'
+    #
+    # Expression looking up the handle wrapped by a unique id, with global_lock held by lock_guard().  The map
+    # must not be modified with the lock held shared, so then the lookup can't use unique_id_mapping[], which
+    # inserts unknown ids.
+    def unwrap_handle(self, unique_id):
+        if self.genOpts.sharedHandleLock:
+            return 'unique_id_lookup(dev_data, %s)' % unique_id
+        return 'dev_data->unique_id_mapping[%s]' % unique_id
+    #
+    # Determine if a struct has an NDO as a member or an embedded member. The result is
+    # remembered for each struct; a struct's members are always captured before it is
+    # queried, so it can't change later in the feature.
     def struct_contains_ndo(self, struct_item):
-        struct_member_dict = dict(self.structMembers)
-        struct_members = struct_member_dict[struct_item]
-
-        for member in struct_members:
+        if struct_item in self.structContainsNdo:
+            return self.structContainsNdo[struct_item]
+        contains_ndo = False
+        for member in self.structMembers[struct_item]:
             if self.isHandleTypeNonDispatchable(member.type):
-                return True
-            elif member.type in struct_member_dict:
+                contains_ndo = True
+                break
+            elif member.type in self.structMembers:
                 if self.struct_contains_ndo(member.type) == True:
-                    return True
-        return False
+                    contains_ndo = True
+                    break
+        self.structContainsNdo[struct_item] = contains_ndo
+        return contains_ndo
     #
     # Return list of struct members which contain, or which sub-structures contain
     # an NDO in a given list of parameters or members
@@ -417,7 +438,7 @@ class UniqueObjectsOutputGenerator(OutputGenerator):
                 handle_name = params[-1].find('name')
                 create_ndo_code += '%sif (VK_SUCCESS == result) {\n' % (indent)
                 indent = self.incIndent(indent)
-                create_ndo_code += '%sstd::lock_guard<std::mutex> lock(global_lock);\n' % (indent)
+                create_ndo_code += '%sstd::lock_guard<%s> lock(global_lock);\n' % (indent, self.mutex_type())
                 ndo_dest = '*%s' % handle_name.text
                 if ndo_array == True:
                     create_ndo_code += '%sfor (uint32_t index0 = 0; index0 < %s; index0++) {\n' % (indent, cmd_info[-1].len)
@@ -449,7 +470,7 @@ class UniqueObjectsOutputGenerator(OutputGenerator):
                     # This API is freeing an array of handles.  Remove them from the unique_id map.
                     destroy_ndo_code += '%sif ((VK_SUCCESS == result) && (%s)) {\n' % (indent, cmd_info[param].name)
                     indent = self.incIndent(indent)
-                    destroy_ndo_code += '%sstd::unique_lock<std::mutex> lock(global_lock);\n' % (indent)
+                    destroy_ndo_code += '%sstd::unique_lock<%s> lock(global_lock);\n' % (indent, self.mutex_type())
                     destroy_ndo_code += '%sfor (uint32_t index0 = 0; index0 < %s; index0++) {\n' % (indent, cmd_info[param].len)
                     indent = self.incIndent(indent)
                     destroy_ndo_code += '%s%s handle = %s[index0];\n' % (indent, cmd_info[param].type, cmd_info[param].name)
@@ -461,7 +482,7 @@ class UniqueObjectsOutputGenerator(OutputGenerator):
                     destroy_ndo_code += '%s}\n' % indent
                 else:
                     # Remove a single handle from the map
-                    destroy_ndo_code += '%sstd::unique_lock<std::mutex> lock(global_lock);\n' % (indent)
+                    destroy_ndo_code += '%sstd::unique_lock<%s> lock(global_lock);\n' % (indent, self.mutex_type())
                     destroy_ndo_code += '%suint64_t %s_id = reinterpret_cast<uint64_t &>(%s);\n' % (indent, cmd_info[param].name, cmd_info[param].name)
                     destroy_ndo_code += '%s%s = (%s)dev_data->unique_id_mapping[%s_id];\n' % (indent, cmd_info[param].name, cmd_info[param].type, cmd_info[param].name)
                     destroy_ndo_code += '%sdev_data->unique_id_mapping.erase(%s_id);\n' % (indent, cmd_info[param].name)
@@ -469,8 +490,30 @@ class UniqueObjectsOutputGenerator(OutputGenerator):
         return ndo_array, destroy_ndo_code
 
     #
-    # Clean up local declarations
+    # Declare the pointer local_name to a local copy of count elements of type, or of a single element if
+    # count is None, and with scratchCount the scratch_storage it is made in
+    def declareLocal(self, indent, type, local_name, count):
+        decl = ''
+        if self.genOpts.scratchCount:
+            decl += '%sscratch_storage<%s, %d> %s_storage;\n' % (indent, type, self.genOpts.scratchCount if count is not None else 1, local_name)
+        decl += '%s%s *%s = NULL;\n' % (indent, type, local_name)
+        return decl
+    #
+    # Expression making the local copy declared by declareLocal(): a default-constructed array of count elements,
+    # or if count is None a single element constructed from src
+    def allocateLocal(self, type, local_name, count, src = None):
+        if self.genOpts.scratchCount:
+            if count is not None:
+                return '%s_storage.allocate(%s)' % (local_name, count)
+            return '%s_storage.copy(%s)' % (local_name, src)
+        if count is not None:
+            return 'new %s[%s]' % (type, count)
+        return 'new %s(%s)' % (type, src)
+    #
+    # Clean up local declarations. Copies made in scratch_storage are destroyed along with it.
     def cleanUpLocalDeclarations(self, indent, prefix, name, len):
+        if self.genOpts.scratchCount:
+            return ''
         cleanup = '%sif (local_%s%s)\n' % (indent, prefix, name)
         if len is not None:
             cleanup += '%s    delete[] local_%s%s;\n' % (indent, prefix, name)
@@ -485,37 +528,37 @@ class UniqueObjectsOutputGenerator(OutputGenerator):
         post_call_code = ''
         if ndo_count is not None:
             if top_level == True:
-                decl_code += '%s%s *local_%s%s = NULL;\n' % (indent, ndo_type, prefix, ndo_name)
+                decl_code += self.declareLocal(indent, ndo_type, 'local_%s%s' % (prefix, ndo_name), ndo_count)
             pre_call_code += '%s    if (%s%s) {\n' % (indent, prefix, ndo_name)
             indent = self.incIndent(indent)
             if top_level == True:
-                pre_call_code += '%s    local_%s%s = new %s[%s];\n' % (indent, prefix, ndo_name, ndo_type, ndo_count)
+                pre_call_code += '%s    local_%s%s = %s;\n' % (indent, prefix, ndo_name, self.allocateLocal(ndo_type, 'local_%s%s' % (prefix, ndo_name), ndo_count))
                 pre_call_code += '%s    for (uint32_t %s = 0; %s < %s; ++%s) {\n' % (indent, index, index, ndo_count, index)
                 indent = self.incIndent(indent)
-                pre_call_code += '%s    local_%s%s[%s] = (%s)dev_data->unique_id_mapping[reinterpret_cast<const uint64_t &>(%s[%s])];\n' % (indent, prefix, ndo_name, index, ndo_type, ndo_name, index)
+                pre_call_code += '%s    local_%s%s[%s] = (%s)%s;\n' % (indent, prefix, ndo_name, index, ndo_type, self.unwrap_handle('reinterpret_cast<const uint64_t &>(%s[%s])' % (ndo_name, index)))
             else:
                 pre_call_code += '%s    for (uint32_t %s = 0; %s < %s; ++%s) {\n' % (indent, index, index, ndo_count, index)
                 indent = self.incIndent(indent)
-                pre_call_code += '%s    %s%s[%s] = (%s)dev_data->unique_id_mapping[reinterpret_cast<const uint64_t &>(%s%s[%s])];\n' % (indent, prefix, ndo_name, index, ndo_type, prefix, ndo_name, index)
+                pre_call_code += '%s    %s%s[%s] = (%s)%s;\n' % (indent, prefix, ndo_name, index, ndo_type, self.unwrap_handle('reinterpret_cast<const uint64_t &>(%s%s[%s])' % (prefix, ndo_name, index)))
             indent = self.decIndent(indent)
             pre_call_code += '%s    }\n' % indent
             indent = self.decIndent(indent)
             pre_call_code += '%s    }\n' % indent
-            if top_level == True:
+            if (top_level == True) and (not self.genOpts.scratchCount):
                 post_call_code += '%sif (local_%s%s)\n' % (indent, prefix, ndo_name)
                 indent = self.incIndent(indent)
                 post_call_code += '%sdelete[] local_%s;\n' % (indent, ndo_name)
         else:
             if top_level == True:
                 if (destroy_func == False) or (destroy_array == True):       #### LUGMAL This line needs to be skipped for destroy_ndo and not destroy_array
-                    pre_call_code += '%s    %s = (%s)dev_data->unique_id_mapping[reinterpret_cast<uint64_t &>(%s)];\n' % (indent, ndo_name, ndo_type, ndo_name)
+                    pre_call_code += '%s    %s = (%s)%s;\n' % (indent, ndo_name, ndo_type, self.unwrap_handle('reinterpret_cast<uint64_t &>(%s)' % ndo_name))
             else:
                 # Make temp copy of this var with the 'local' removed. It may be better to not pass in 'local_'
                 # as part of the string and explicitly print it
                 fix = str(prefix).strip('local_');
                 pre_call_code += '%s    if (%s%s) {\n' % (indent, fix, ndo_name)
                 indent = self.incIndent(indent)
-                pre_call_code += '%s    %s%s = (%s)dev_data->unique_id_mapping[reinterpret_cast<const uint64_t &>(%s%s)];\n' % (indent, prefix, ndo_name, ndo_type, fix, ndo_name)
+                pre_call_code += '%s    %s%s = (%s)%s;\n' % (indent, prefix, ndo_name, ndo_type, self.unwrap_handle('reinterpret_cast<const uint64_t &>(%s%s)' % (fix, ndo_name)))
                 indent = self.decIndent(indent)
                 pre_call_code += '%s    }\n' % indent
         return decl_code, pre_call_code, post_call_code
@@ -528,7 +571,6 @@ class UniqueObjectsOutputGenerator(OutputGenerator):
         decls = ''
         pre_code = ''
         post_code = ''
-        struct_member_dict = dict(self.structMembers)
         index = 'index%s' % str(array_index)
         array_index += 1
         # Process any NDOs in this structure and recurse for any sub-structs in this struct
@@ -546,23 +588,23 @@ class UniqueObjectsOutputGenerator(OutputGenerator):
                     pre_code += tmp_pre
                     post_code += tmp_post
             # Handle Structs that contain NDOs at some level
-            elif member.type in struct_member_dict:
+            elif member.type in self.structMembers:
                 # All structs at first level will have an NDO
                 if self.struct_contains_ndo(member.type) == True:
-                    struct_info = struct_member_dict[member.type]
+                    struct_info = self.structMembers[member.type]
                     # Struct Array
                     if member.len is not None:
                         # Update struct prefix
                         if first_level_param == True:
                             new_prefix = 'local_%s' % member.name
                             # Declare safe_VarType for struct
-                            decls += '%ssafe_%s *%s = NULL;\n' % (indent, member.type, new_prefix)
+                            decls += self.declareLocal(indent, 'safe_%s' % member.type, new_prefix, member.len)
                         else:
                             new_prefix = '%s%s' % (prefix, member.name)
                         pre_code += '%s    if (%s%s) {\n' % (indent, prefix, member.name)
                         indent = self.incIndent(indent)
                         if first_level_param == True:
-                            pre_code += '%s    %s = new safe_%s[%s];\n' % (indent, new_prefix, member.type, member.len)
+                            pre_code += '%s    %s = %s;\n' % (indent, new_prefix, self.allocateLocal('safe_%s' % member.type, new_prefix, member.len))
                         pre_code += '%s    for (uint32_t %s = 0; %s < %s%s; ++%s) {\n' % (indent, index, index, prefix, member.len, index)
                         indent = self.incIndent(indent)
                         if first_level_param == True:
@@ -584,14 +626,14 @@ class UniqueObjectsOutputGenerator(OutputGenerator):
                         # Update struct prefix
                         if first_level_param == True:
                             new_prefix = 'local_%s->' % member.name
-                            decls += '%ssafe_%s *local_%s%s = NULL;\n' % (indent, member.type, prefix, member.name)
+                            decls += self.declareLocal(indent, 'safe_%s' % member.type, 'local_%s%s' % (prefix, member.name), None)
                         else:
                             new_prefix = '%s%s->' % (prefix, member.name)
                         # Declare safe_VarType for struct
                         pre_code += '%s    if (%s%s) {\n' % (indent, prefix, member.name)
                         indent = self.incIndent(indent)
                         if first_level_param == True:
-                            pre_code += '%s    local_%s%s = new safe_%s(%s);\n' % (indent, prefix, member.name, member.type, member.name)
+                            pre_code += '%s    local_%s%s = %s;\n' % (indent, prefix, member.name, self.allocateLocal('safe_%s' % member.type, 'local_%s%s' % (prefix, member.name), None, member.name))
                         # Process sub-structs in this struct
                         (tmp_decl, tmp_pre, tmp_post) = self.uniquify_members(struct_info, indent, new_prefix, array_index, create_func, destroy_func, destroy_array, False)
                         decls += tmp_decl
@@ -609,8 +651,7 @@ class UniqueObjectsOutputGenerator(OutputGenerator):
         proto = cmd.find('proto/name')
         params = cmd.findall('param')
         if proto.text is not None:
-            cmd_member_dict = dict(self.cmdMembers)
-            cmd_info = cmd_member_dict[proto.text]
+            cmd_info = self.cmdMembers[proto.text]
             # Handle ndo create/allocate operations
             if cmd_info[0].iscreate:
                 create_ndo_code = self.generate_create_ndo_code(indent, proto, params, cmd_info)
@@ -625,8 +666,9 @@ class UniqueObjectsOutputGenerator(OutputGenerator):
             paramdecl = ''
             param_pre_code = ''
             param_post_code = ''
-            create_func = True if create_ndo_code else False
-            destroy_func = True if destroy_ndo_code else False
+            access = self.handle_access(create_ndo_code, destroy_ndo_code)
+            create_func = (access == 'create')
+            destroy_func = (access == 'destroy')
             (paramdecl, param_pre_code, param_post_code) = self.uniquify_members(cmd_info, indent, '', 0, create_func, destroy_func, destroy_array, True)
             param_post_code += create_ndo_code
             if destroy_ndo_code:
@@ -636,7 +678,7 @@ class UniqueObjectsOutputGenerator(OutputGenerator):
                     param_pre_code += destroy_ndo_code
             if param_pre_code:
                 if (not destroy_func) or (destroy_array):
-                    param_pre_code = '%s{\n%s%s%s%s}\n' % ('    ', indent, self.lock_guard(indent), param_pre_code, indent)
+                    param_pre_code = '%s{\n%s%s%s%s}\n' % ('    ', indent, self.lock_guard(indent, access), param_pre_code, indent)
         return paramdecl, param_pre_code, param_post_code
     #
     # Capture command parameter info needed to wrap NDOs as well as handling some boilerplate code
@@ -648,30 +690,27 @@ class UniqueObjectsOutputGenerator(OutputGenerator):
             self.appendSection('command', '')
             self.appendSection('command', '// Declare only')
             self.appendSection('command', decls[0])
-            self.intercepts += [ '    {"%s", reinterpret_cast<PFN_vkVoidFunction>(%s)},' % (cmdname,cmdname[2:]) ]
+            self.intercepts.append((cmdname, cmdname[2:], None))
             return
         # Add struct-member type information to command parameter information
         OutputGenerator.genCmd(self, cmdinfo, cmdname)
-        members = cmdinfo.elem.findall('.//param')
+        members = cmdinfo.params
         # Iterate over members once to get length parameters for arrays
         lens = set()
         for member in members:
-            len = self.getLen(member)
-            if len:
-                lens.add(len)
-        struct_member_dict = dict(self.structMembers)
+            if member.len:
+                lens.add(member.len)
         # Generate member info
         membersInfo = []
         for member in members:
             # Get type and name of member
-            info = self.getTypeNameTuple(member)
-            type = info[0]
-            name = info[1]
-            cdecl = self.makeCParamDecl(member, 0)
+            type = member.type
+            name = member.name
+            cdecl = member.cdecl
             # Check for parameter name in lens set
             iscount = True if name in lens else False
-            len = self.getLen(member)
-            isconst = True if 'const' in cdecl else False
+            len = member.len
+            isconst = member.isconst
             ispointer = self.paramIsPointer(member)
             # Mark param as local if it is an array of NDOs
             islocal = False;
@@ -679,7 +718,7 @@ class UniqueObjectsOutputGenerator(OutputGenerator):
                 if (len is not None) and (isconst == True):
                     islocal = True
             # Or if it's a struct that contains an NDO
-            elif type in struct_member_dict:
+            elif type in self.structMembers:
                 if self.struct_contains_ndo(type) == True:
                     islocal = True
 
@@ -692,23 +731,19 @@ class UniqueObjectsOutputGenerator(OutputGenerator):
                                                  isconst=isconst,
                                                  iscount=iscount,
                                                  len=len,
-                                                 extstructs=member.attrib.get('validextensionstructs') if name == 'pNext' else None,
+                                                 extstructs=member.validextensionstructs if name == 'pNext' else None,
                                                  cdecl=cdecl,
                                                  islocal=islocal,
                                                  iscreate=iscreate,
                                                  isdestroy=isdestroy))
-        self.cmdMembers.append(self.CmdMemberData(name=cmdname, members=membersInfo))
+        self.cmdMembers[cmdname] = membersInfo
         # Generate NDO wrapping/unwrapping code for all parameters
         (api_decls, api_pre, api_post) = self.generate_wrapping_code(cmdinfo.elem)
         # If API doesn't contain an NDO's, don't fool with it
         if not api_decls and not api_pre and not api_post:
             return
         # Record that the function will be intercepted
-        if (self.featureExtraProtect != None):
-            self.intercepts += [ '#ifdef %s' % self.featureExtraProtect ]
-        self.intercepts += [ '    {"%s", reinterpret_cast<PFN_vkVoidFunction>(%s)},' % (cmdname,cmdname[2:]) ]
-        if (self.featureExtraProtect != None):
-            self.intercepts += [ '#endif' ]
+        self.intercepts.append((cmdname, cmdname[2:], self.featureExtraProtect))
         decls = self.makeCDecls(cmdinfo.elem)
         self.appendSection('command', '')
         self.appendSection('command', decls[0][:-1])
@@ -737,8 +772,7 @@ class UniqueObjectsOutputGenerator(OutputGenerator):
         # Pull out the text for each of the parameters, separate them by commas in a list
         paramstext = ', '.join([str(param.text) for param in params])
         # If any of these paramters has been replaced by a local var, fix up the list
-        cmd_member_dict = dict(self.cmdMembers)
-        params = cmd_member_dict[cmdname]
+        params = self.cmdMembers[cmdname]
         for param in params:
             if param.islocal == True:
                 if param.ispointer == True:
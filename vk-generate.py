@@ -101,29 +101,49 @@ class DispatchTableOpsSubcommand(Subcommand):
         self.protos = vulkan.protos_all
         self.outfile = None
 
+    # <prefix>_init_*_dispatch_table() implementations: one statement per
+    # entrypoint, or a loop over a table of names and dispatch table offsets
+    inits = ["unrolled", "table"]
+
     def run(self):
         if len(self.argv) < 1:
             print("DispatchTableOpsSubcommand: <prefix> unspecified")
             return
 
         self.prefix = self.argv[0]
+        self.init = "unrolled"
+        argv = self.argv[1:]
+        if argv and argv[0] in self.inits:
+            self.init = argv.pop(0)
 
-        if len(self.argv) > 2:
-            print("DispatchTableOpsSubcommand: <prefix> [outfile]")
+        if len(argv) > 1:
+            print("DispatchTableOpsSubcommand: <prefix> [%s] [outfile]" % "|".join(self.inits))
             return
 
-        if len(self.argv) == 2:
-            self.outfile = self.argv[1]
+        if len(argv) == 1:
+            self.outfile = argv[0]
 
         super(DispatchTableOpsSubcommand, self).run()
 
     def generate_header(self):
-        return "\n".join(["#include <vulkan/vulkan.h>",
-                          "#include <vulkan/vk_layer.h>",
-                          "#include <string.h>"])
+        headers = ["#include <vulkan/vulkan.h>",
+                   "#include <vulkan/vk_layer.h>",
+                   "#include <string.h>"]
+        if self.init == "table":
+            headers.append("#include <stddef.h>")
+        return "\n".join(headers)
+
+    # Initialization statement, or in table mode the table entry, for the
+    # entrypoint name of a dispatch table of type
+    def _generate_init_entry(self, type, name):
+        if self.init == "table":
+            table_type = "VkLayerDispatchTable" if type == "device" else "VkLayerInstanceDispatchTable"
+            return "    {\"vk%s\", offsetof(%s, %s)}," % (name, table_type, name)
+        return "    table->%s = (PFN_vk%s) gpa(%s, \"vk%s\");" % (name, name, type, name)
 
     def _generate_init_dispatch(self, type):
         stmts = []
+        entries = []
         func = []
         if type == "device":
             # GPA has to be first one and uses wrapped object
@@ -137,13 +157,11 @@ class DispatchTableOpsSubcommand(Subcommand):
                   proto.params[0].ty == "VkPhysicalDevice" or proto.name == "GetDeviceProcAddr":
                     continue
                 if proto.name == "GetMemoryWin32HandleNV":
-                    stmts.append("#ifdef VK_USE_PLATFORM_WIN32_KHR")
-                    stmts.append("    table->%s = (PFN_vk%s) gpa(device, \"vk%s\");" %
-                            (proto.name, proto.name, proto.name))
-                    stmts.append("#endif // VK_USE_PLATFORM_WIN32_KHR")
+                    entries.append("#ifdef VK_USE_PLATFORM_WIN32_KHR")
+                    entries.append(self._generate_init_entry(type, proto.name))
+                    entries.append("#endif // VK_USE_PLATFORM_WIN32_KHR")
                 else:
-                    stmts.append("    table->%s = (PFN_vk%s) gpa(device, \"vk%s\");" %
-                            (proto.name, proto.name, proto.name))
+                    entries.append(self._generate_init_entry(type, proto.name))
             func.append("static inline void %s_init_device_dispatch_table(VkDevice device,"
                 % self.prefix)
             func.append("%s                                               VkLayerDispatchTable *table,"
@@ -168,59 +186,76 @@ class DispatchTableOpsSubcommand(Subcommand):
                   proto.name == "CreateDevice" or proto.name == "GetInstanceProcAddr":
                     continue
                 if Win32_printed and 'Win32' not in proto.name:
-                    stmts.append("#endif // VK_USE_PLATFORM_WIN32_KHR")
+                    entries.append("#endif // VK_USE_PLATFORM_WIN32_KHR")
                     Win32_printed = False
                 if XLIB_printed and 'Xlib' not in proto.name:
-                    stmts.append("#endif // VK_USE_PLATFORM_XLIB_KHR")
+                    entries.append("#endif // VK_USE_PLATFORM_XLIB_KHR")
                     XLIB_printed = False
                 if XCB_printed and 'Xcb' not in proto.name:
-                    stmts.append("#endif // VK_USE_PLATFORM_XCB_KHR")
+                    entries.append("#endif // VK_USE_PLATFORM_XCB_KHR")
                     XCB_printed = False
                 if MIR_printed and 'Mir' not in proto.name:
-                    stmts.append("#endif // VK_USE_PLATFORM_MIR_KHR")
+                    entries.append("#endif // VK_USE_PLATFORM_MIR_KHR")
                     MIR_printed = False
                 if WAY_printed and 'Wayland' not in proto.name:
-                    stmts.append("#endif // VK_USE_PLATFORM_WAYLAND_KHR")
+                    entries.append("#endif // VK_USE_PLATFORM_WAYLAND_KHR")
                     WAY_printed = False
                 if Android_printed and 'Android' not in proto.name:
-                    stmts.append("#endif // VK_USE_PLATFORM_ANDROID_KHR")
+                    entries.append("#endif // VK_USE_PLATFORM_ANDROID_KHR")
                     Android_printed = False
                 if 'KHR' in proto.name and 'Win32' in proto.name:
                     if not Win32_printed:
-                        stmts.append("#ifdef VK_USE_PLATFORM_WIN32_KHR")
+                        entries.append("#ifdef VK_USE_PLATFORM_WIN32_KHR")
                         Win32_printed = True
                 if 'KHR' in proto.name and 'Xlib' in proto.name:
                     if not XLIB_printed:
-                        stmts.append("#ifdef VK_USE_PLATFORM_XLIB_KHR")
+                        entries.append("#ifdef VK_USE_PLATFORM_XLIB_KHR")
                         XLIB_printed = True
                 if 'KHR' in proto.name and 'Xcb' in proto.name:
                     if not XCB_printed:
-                        stmts.append("#ifdef VK_USE_PLATFORM_XCB_KHR")
+                        entries.append("#ifdef VK_USE_PLATFORM_XCB_KHR")
                         XCB_printed = True
                 if 'KHR' in proto.name and 'Mir' in proto.name:
                     if not MIR_printed:
-                        stmts.append("#ifdef VK_USE_PLATFORM_MIR_KHR")
+                        entries.append("#ifdef VK_USE_PLATFORM_MIR_KHR")
                         MIR_printed = True
                 if 'KHR' in proto.name and 'Wayland' in proto.name:
                     if not WAY_printed:
-                        stmts.append("#ifdef VK_USE_PLATFORM_WAYLAND_KHR")
+                        entries.append("#ifdef VK_USE_PLATFORM_WAYLAND_KHR")
                         WAY_printed = True
                 if 'KHR' in proto.name and 'Android' in proto.name:
                     if not Android_printed:
-                        stmts.append("#ifdef VK_USE_PLATFORM_ANDROID_KHR")
+                        entries.append("#ifdef VK_USE_PLATFORM_ANDROID_KHR")
                         Android_printed = True
                 if 'KHR' in proto.name and not KHR_printed:
-                    stmts.append("    // KHR instance extension function pointers")
+                    entries.append("    // KHR instance extension function pointers")
                     KHR_printed = True
                 if 'EXT' in proto.name and not EXT_printed:
-                    stmts.append("    // EXT instance extension function pointers")
+                    entries.append("    // EXT instance extension function pointers")
                     EXT_printed = True
-                stmts.append("    table->%s = (PFN_vk%s) gpa(instance, \"vk%s\");" %
-                      (proto.name, proto.name, proto.name))
+                entries.append(self._generate_init_entry(type, proto.name))
             func.append("static inline void %s_init_instance_dispatch_table(" % self.prefix)
             func.append("%s        VkInstance instance," % (" " * len(self.prefix)))
             func.append("%s        VkLayerInstanceDispatchTable *table," % (" " * len(self.prefix)))
             func.append("%s        PFN_vkGetInstanceProcAddr gpa)" % (" " * len(self.prefix)))
+        if self.init == "table":
+            entries_name = "%s_%s_dispatch_entries" % (self.prefix, type)
+            stmts.append("    for (size_t i = 0; i < sizeof(%s) / sizeof(%s[0]); i++) {" %
+                    (entries_name, entries_name))
+            stmts.append("        PFN_vkVoidFunction addr = gpa(%s, %s[i].name);" % (type, entries_name))
+            stmts.append("        memcpy((char *) table + %s[i].offset, &addr, sizeof(addr));" % entries_name)
+            stmts.append("    }")
+            table = []
+            table.append("static const struct {")
+            table.append("    const char *name;")
+            table.append("    size_t offset;")
+            table.append("} %s[] = {" % entries_name)
+            table.extend(entries)
+            table.append("};")
+            table.append("")
+            func = table + func
+        else:
+            stmts.extend(entries)
         func.append("{")
         func.append("%s" % "\n".join(stmts))
         func.append("}")
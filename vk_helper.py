@@ -25,6 +25,7 @@ import os
 import sys
 import re
 import vulkan
+from generator import writeIfChanged
 from source_line_info import sourcelineinfo
 
 # vk_helper.py overview
@@ -455,11 +456,11 @@ class CommonFileGen:
 
     def generate(self):
         #print("Generate to file %s" % self.filename)
-        with open(self.filename, "w") as f:
-            f.write(self.contents['copyright'])
-            f.write(self.contents['header'])
-            f.write(self.contents['body'])
-            f.write(self.contents['footer'])
+        contents = "".join([self.contents['copyright'], self.contents['header'],
+                            self.contents['body'], self.contents['footer']])
+        # Leave an unchanged file (and its timestamp) alone so that
+        # dependent sources are not rebuilt; otherwise replace it atomically
+        writeIfChanged(self.filename, contents)
 
 # class for writing a wrapper class for structures
 # The wrapper class wraps the structs and includes utility functions for